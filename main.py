@@ -14,8 +14,14 @@ from discord import app_commands, Interaction, SelectOption, ui, Embed
 from supabase import create_client, Client
 import os
 import uuid
+import time
+import bisect
+import itertools
+import heapq
+import contextlib
 from collections import defaultdict
 from collections import Counter
+from collections import deque
 from datetime import datetime, timedelta, timezone
 import zoneinfo
 import aiohttp
@@ -23,17 +29,13 @@ from discord.ext import tasks
 from discord import TextChannel, utils
 from types import SimpleNamespace
 import copy
+import sqlite3
+import numpy as np
 
 
 SUPABASE_URL = os.getenv("SUPABASE_URL")
 SUPABASE_KEY = os.getenv("SUPABASE_KEY")
 
-# Your global start_buttons dict
-# Format: {(channel_id, game_type): button_object}
-# Assume this already exists in your bot
-# start_buttons = {}
-
-
 
 MAX_RETRIES = 5
 
@@ -49,13 +51,523 @@ def setup_supabase():
 
 setup_supabase()  # ← runs immediately when script loads!
 
+SCAN_PAGE_SIZE = 1000  # stays under PostgREST's per-response row cap
+LEADERBOARD_TOP_N = 100  # rows kept for a paged leaderboard
+
+
+async def scan_table(table, columns="*", key="id", page_size=SCAN_PAGE_SIZE, where=None):
+    """Stream every row of `table` in keyset-paginated pages (no silent truncation, bounded memory).
+
+    `columns` is a PostgREST projection; key columns are added if they're missing.
+    `key` is a unique column, or a tuple of columns forming a unique key (e.g. a composite primary key).
+    `where` optionally narrows the query, e.g. `where=lambda q: q.eq("status", "running")`.
+    """
+    keys = key if isinstance(key, tuple) else (key,)
+    if columns != "*":
+        present = [c.strip() for c in columns.split(",")]
+        missing = [k for k in keys if k not in present]
+        if missing:
+            columns = ", ".join(missing + [columns])
+
+    last = None
+    while True:
+        def fetch_page():
+            query = supabase.table(table).select(columns)
+            if where:
+                query = where(query)
+            if last is not None:
+                if len(keys) == 1:
+                    query = query.gt(keys[0], last[0])
+                else:
+                    # (k1, k2, ...) > last, spelled out for PostgREST
+                    branches = []
+                    for i, k in enumerate(keys):
+                        parts = [f'{keys[j]}.eq."{last[j]}"' for j in range(i)] + [f'{k}.gt."{last[i]}"']
+                        branches.append(parts[0] if len(parts) == 1 else f"and({','.join(parts)})")
+                    query = query.or_(",".join(branches))
+            for k in keys:
+                query = query.order(k)
+            return query.limit(page_size).execute()
+
+        res = await run_db(fetch_page)
+        rows = res.data or []
+        for row in rows:
+            yield row
+        if len(rows) < page_size:
+            return
+        last = [rows[-1][k] for k in keys]
+
+
+async def top_n(rows, n, key):
+    """heapq.nlargest over an async stream: only `n` rows are held at once; ties keep stream order."""
+    heap = []
+    i = 0
+    async for row in rows:
+        item = (key(row), -i, row)
+        i += 1
+        if len(heap) < n:
+            heapq.heappush(heap, item)
+        elif item[:2] > heap[0][:2]:
+            heapq.heapreplace(heap, item)
+    return [row for *_, row in sorted(heap, key=lambda item: item[:2], reverse=True)]
+
+
+class SingleFlight:
+    """Concurrent reads for the same key share one in-flight query and its result."""
+
+    def __init__(self):
+        self.inflight = {}       # key -> future of the query already running
+        self.calls = Counter()   # namespace -> reads requested
+        self.shared = Counter()  # namespace -> reads answered by someone else's query
+
+    async def run(self, key, fn):
+        """key: tuple whose first item names the kind of read (used for the stats); fn: zero-arg coroutine function."""
+        namespace = key[0]
+        self.calls[namespace] += 1
+
+        while True:
+            pending = self.inflight.get(key)
+            if pending is None:
+                break
+            try:
+                result = await asyncio.shield(pending)
+            except asyncio.CancelledError:
+                if pending.cancelled():
+                    continue  # ✅ the leader was cancelled, not us — retry (one follower takes over)
+                raise
+            self.shared[namespace] += 1
+            # ✅ Followers get their own copy so nobody mutates the leader's rows
+            return copy.deepcopy(result)
+
+        future = asyncio.get_running_loop().create_future()
+        self.inflight[key] = future
+        try:
+            result = await fn()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            future.exception()  # followers re-raise it; don't warn if there were none
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            del self.inflight[key]
+
+    def dedup_ratio(self, namespace=None):
+        calls = self.calls[namespace] if namespace else sum(self.calls.values())
+        shared = self.shared[namespace] if namespace else sum(self.shared.values())
+        return shared / calls if calls else 0.0
+
+
+single_flight = SingleFlight()
+
+
+# ✅ Optional local read replica (set LOCAL_REPLICA_PATH, e.g. "replica.sqlite3", to enable)
+LOCAL_REPLICA_PATH = os.getenv("LOCAL_REPLICA_PATH")
+
+
+class LocalReplica:
+    """
+    SQLite copy of players, handicaps and courses.
+
+    Bootstrapped with scan_table at startup, then kept current by write_db (write-through),
+    so the bot reads its own writes. Read-only commands use it once `ready`; until then,
+    and whenever it's disabled, they read from Supabase as before.
+    """
+
+    SCHEMA_VERSION = 2  # bump when SCHEMA changes; an older file is rebuilt from scratch
+    SCHEMA = """
+        create table if not exists players (
+            id text primary key, credits integer, stats text not null default '{}', version integer
+        );
+        create table if not exists handicaps (
+            player_id text not null, course_id integer not null, score real, handicap real,
+            primary key (player_id, course_id)
+        );
+        create index if not exists handicaps_course_score on handicaps (course_id, score);
+        create table if not exists courses (
+            id integer primary key, name text, image_url text, course_par real, avg_par real
+        );
+        create index if not exists courses_name on courses (name);
+    """
+    KEYS = {
+        "players": ("id",),
+        "handicaps": ("player_id", "course_id"),
+        "courses": ("id",),
+    }
+    COLUMNS = {
+        "players": ("id", "credits", "stats", "version"),
+        "handicaps": ("player_id", "course_id", "score", "handicap"),
+        "courses": ("id", "name", "image_url", "course_par", "avg_par"),
+    }
+    TEXT_COLUMNS = {  # ids Supabase may hand back as numbers; course ids stay integers like upstream
+        "players": {"id"},
+        "handicaps": {"player_id"},
+        "courses": set(),
+    }
+
+    def __init__(self, path):
+        self.path = path
+        self.db = None
+        self.ready = False
+        self.bootstrapping = False
+        self.dirty = set()  # (table, key) written while bootstrapping — re-read once the snapshot is in
+        self.local_reads = 0
+
+    def open(self):
+        if self.db is None:
+            self.db = sqlite3.connect(self.path)
+            self.db.row_factory = sqlite3.Row
+            self.db.execute("pragma journal_mode = wal")
+            # ✅ WAL + normal: no fsync per commit; a crash can only lose writes the next bootstrap re-copies
+            self.db.execute("pragma synchronous = normal")
+            if self.db.execute("pragma user_version").fetchone()[0] != self.SCHEMA_VERSION:
+                for table in ("players", "handicaps", "courses", "bets"):
+                    self.db.execute(f"drop table if exists {table}")
+                self.db.execute(f"pragma user_version = {self.SCHEMA_VERSION}")
+            self.db.executescript(self.SCHEMA)
+
+    def _encode(self, table, row):
+        cols = [c for c in self.COLUMNS[table] if c in row]
+        values = []
+        for c in cols:
+            v = row[c]
+            if isinstance(v, (dict, list)):
+                v = json.dumps(v)
+            elif c in self.TEXT_COLUMNS[table] and v is not None:
+                v = str(v)
+            values.append(v)
+        return cols, values
+
+    def _upsert(self, table, rows):
+        for row in rows:
+            cols, values = self._encode(table, row)
+            if not all(k in cols for k in self.KEYS[table]):
+                continue
+            updates = ", ".join(f"{c} = excluded.{c}" for c in cols if c not in self.KEYS[table]) or None
+            self.db.execute(
+                f"insert into {table} ({', '.join(cols)}) values ({', '.join('?' * len(cols))}) "
+                f"on conflict ({', '.join(self.KEYS[table])}) do "
+                + (f"update set {updates}" if updates else "nothing"),
+                values
+            )
+
+    def _delete(self, table, rows):
+        keys = self.KEYS[table]
+        for row in rows:
+            _, values = self._encode(table, {k: row.get(k) for k in keys})
+            self.db.execute(f"delete from {table} where " + " and ".join(f"{k} = ?" for k in keys), values)
+
+    def apply(self, table, rows, delete=False):
+        """Mirror rows Supabase returned from a successful write."""
+        if self.db is None or table not in self.KEYS or not rows:
+            return
+        if self.bootstrapping:
+            self._mark_dirty(table, rows)
+        try:
+            (self._delete if delete else self._upsert)(table, rows)
+            self.db.commit()
+        except sqlite3.Error as e:
+            print(f"[Replica] ⚠️ Write-through to {table} failed: {e}")
+
+    def set_stats(self, player_id, stats):
+        self.apply("players", [{"id": player_id, "stats": stats}])
+
+    def adjust_credits(self, player_id, delta):
+        if self.db is None:
+            return
+        if self.bootstrapping:
+            self._mark_dirty("players", [{"id": player_id}])
+        try:
+            self.db.execute("update players set credits = credits + ? where id = ?", (delta, str(player_id)))
+            self.db.commit()
+        except sqlite3.Error as e:
+            print(f"[Replica] ⚠️ Credit adjustment for {player_id} failed: {e}")
+
+    def _mark_dirty(self, table, rows):
+        for row in rows:
+            _, key = self._encode(table, {k: row.get(k) for k in self.KEYS[table]})
+            self.dirty.add((table, tuple(key)))
+
+    async def _refresh_dirty(self):
+        while self.dirty:
+            table, key = self.dirty.pop()
+
+            def fetch():
+                query = supabase.table(table).select(", ".join(self.COLUMNS[table]))
+                for column, value in zip(self.KEYS[table], key):
+                    query = query.eq(column, value)
+                return query.execute()
+
+            res = await run_db(fetch)
+            if res.data:
+                self._upsert(table, res.data)
+            else:
+                self._delete(table, [dict(zip(self.KEYS[table], key))])
+
+    async def bootstrap(self):
+        """Bulk copy of every replicated table, page by page."""
+        if self.ready or self.bootstrapping:
+            return
+        self.open()
+        self.bootstrapping = True
+        started = time.perf_counter()
+        try:
+            for table, key in self.KEYS.items():
+                self.db.execute(f"delete from {table}")
+                batch, copied = [], 0
+                async for row in scan_table(table, ", ".join(self.COLUMNS[table]), key=key):
+                    batch.append(row)
+                    if len(batch) >= SCAN_PAGE_SIZE:
+                        self._upsert(table, batch)
+                        copied += len(batch)
+                        batch = []
+                self._upsert(table, batch)
+                copied += len(batch)
+                self.db.commit()
+                print(f"[Replica] 📥 {table}: {copied} rows")
+
+            # ✅ Rows written while the snapshot was streaming may be stale in it — re-read them
+            await self._refresh_dirty()
+            self.db.commit()
+            self.ready = True
+            print(f"[Replica] ✅ Ready in {time.perf_counter() - started:.1f}s")
+        except Exception as e:
+            print(f"[Replica] ❌ Bootstrap failed, reads stay remote: {e}")
+        finally:
+            self.bootstrapping = False
+            self.dirty = set()
+
+    # ✅ Reads (only called when ready)
+
+    def _rows(self, sql, params=()):
+        self.local_reads += 1
+        return [dict(r) for r in self.db.execute(sql, params).fetchall()]
+
+    def player(self, player_id):
+        rows = self._rows("select id, credits, stats from players where id = ?", (str(player_id),))
+        if not rows:
+            return None
+        rows[0]["stats"] = json.loads(rows[0]["stats"] or "{}")
+        return rows[0]
+
+    def players(self):
+        for row in self._rows("select id, credits, stats from players"):
+            row["stats"] = json.loads(row["stats"] or "{}")
+            yield row
+
+    def handicaps(self, player_id=None):
+        if player_id is None:
+            return self._rows("select player_id, handicap from handicaps")
+        return self._rows("select handicap from handicaps where player_id = ?", (str(player_id),))
+
+    def handicap_summary(self, player_id):
+        """Same shape as the get_player_handicaps RPC."""
+        return self._rows(
+            "select c.id as course_id, c.name as course_name, c.course_par, c.avg_par, "
+            "h.score as best_score, h.handicap "
+            "from handicaps h join courses c on c.id = h.course_id "
+            "where h.player_id = ? order by c.name",
+            (str(player_id),)
+        )
+
+    def courses(self, columns="*"):
+        return self._rows(f"select {columns} from courses")
+
+
+replica = LocalReplica(LOCAL_REPLICA_PATH)
+
+
+async def write_db(table, fn, delete=False):
+    """run_db for writes to replicated tables: mirrors the returned rows into the local replica."""
+    res = await run_db(fn)
+    if res is not None and not getattr(res, "error", None):
+        replica.apply(table, res.data, delete=delete)
+    return res
+
 # ✅ Discord intents
 intents = discord.Intents.all()
 intents.message_content = True
 intents.members = True
 
-bot = commands.Bot(command_prefix="!", intents=intents)
-bot.tournaments = {}
+# ✅ Outbound Discord traffic: priority classes, highest first
+PRIORITY_INTERACTION = 0   # interaction responses / follow-ups
+PRIORITY_GAME = 1          # lobby, room and vote result edits
+PRIORITY_NOTIFY = 2        # alert pings
+PRIORITY_COSMETIC = 3      # leaderboards, countdowns, bulk role edits
+OUTBOUND_CONCURRENCY = 8
+# ✅ Low classes can never hold every slot: the rest stays free for interactions and games
+OUTBOUND_CLASS_LIMITS = {PRIORITY_NOTIFY: 3, PRIORITY_COSMETIC: 2}
+
+
+class OutboundScheduler:
+    """Gates outbound Discord calls by priority and by the rate-limit buckets Discord reports."""
+
+    CLASS_NAMES = ("interaction", "game", "notify", "cosmetic")
+
+    def __init__(self, concurrency=OUTBOUND_CONCURRENCY, class_limits=OUTBOUND_CLASS_LIMITS):
+        self.concurrency = concurrency
+        self.class_limits = class_limits
+        self.in_flight = 0
+        self.class_in_flight = [0] * len(self.CLASS_NAMES)
+        self.waiting = []                   # heap of (priority, seq, future)
+        self.seq = itertools.count()
+        self.route_buckets = {}             # "PATCH /channels/:id/messages/:id" -> X-RateLimit-Bucket hash
+        self.buckets = {}                   # "<hash>:channels/<id>" -> (remaining, reset_at)
+        self.bucket_waits = Counter()       # hash -> seconds requests spent waiting on it
+        self.depth = [0] * len(self.CLASS_NAMES)
+        self.waited = [0] * len(self.CLASS_NAMES)
+        self.wait_total = [0.0] * len(self.CLASS_NAMES)
+        self.wait_max = [0.0] * len(self.CLASS_NAMES)
+
+    # ---- rate-limit buckets (fed by the aiohttp trace below) ----
+
+    @staticmethod
+    def major_route(path):
+        """Discord buckets per major parameter: /channels/<id>, /guilds/<id>, /webhooks/<id>."""
+        parts = path.strip("/").split("/")
+        for i, part in enumerate(parts[:-1]):
+            if part in ("channels", "guilds", "webhooks"):
+                return f"{part}/{parts[i + 1]}"
+        return None
+
+    @staticmethod
+    def endpoint(method, path):
+        """Method + path with ids blanked out — the unit Discord assigns a bucket hash to."""
+        parts = [":id" if part.isdigit() else part for part in path.strip("/").split("/")]
+        return f"{method} /{'/'.join(parts)}"
+
+    def bucket_key(self, method, path):
+        endpoint = self.endpoint(method, path)
+        bucket = self.route_buckets.get(endpoint, endpoint)  # until Discord names the bucket
+        return bucket, f"{bucket}:{self.major_route(path)}"
+
+    def observe(self, method, path, status, headers):
+        if not self.major_route(path):
+            return
+        bucket = headers.get("X-RateLimit-Bucket")
+        if bucket:
+            self.route_buckets[self.endpoint(method, path)] = bucket
+        _, key = self.bucket_key(method, path)
+
+        if status == 429:
+            retry_after = float(headers.get("Retry-After", 1))
+            self.buckets[key] = (0, time.monotonic() + retry_after)
+            print(f"[Outbound] 🚦 429 on {key} — holding for {retry_after:.2f}s")
+            return
+        remaining = headers.get("X-RateLimit-Remaining")
+        reset_after = headers.get("X-RateLimit-Reset-After")
+        if remaining is not None and reset_after is not None:
+            self.buckets[key] = (int(remaining), time.monotonic() + float(reset_after))
+
+        if len(self.buckets) > 1000:
+            now = time.monotonic()
+            self.buckets = {k: b for k, b in self.buckets.items() if b[1] > now}
+
+    async def before_request(self, method, path):
+        """Hold a request until its own bucket has room; other endpoints on the channel aren't affected."""
+        if not self.major_route(path):
+            return
+        bucket, key = self.bucket_key(method, path)
+        started = time.monotonic()
+        while key in self.buckets:
+            remaining, reset_at = self.buckets[key]
+            now = time.monotonic()
+            if now >= reset_at:
+                del self.buckets[key]
+                break
+            if remaining > 0:
+                self.buckets[key] = (remaining - 1, reset_at)  # ✅ claim a request from the window
+                break
+            await asyncio.sleep(reset_at - now)
+        waited = time.monotonic() - started
+        if waited > 0.001:
+            self.bucket_waits[bucket] += waited
+
+    # ---- priority gate ----
+
+    def _dispatch(self):
+        # ✅ Hand free slots to the highest-priority waiters whose class is under its cap
+        capped = []
+        while self.waiting and self.in_flight < self.concurrency:
+            entry = heapq.heappop(self.waiting)
+            priority, _, future = entry
+            if future.done():
+                continue
+            limit = self.class_limits.get(priority)
+            if limit is not None and self.class_in_flight[priority] >= limit:
+                capped.append(entry)
+                continue
+            self.in_flight += 1
+            self.class_in_flight[priority] += 1
+            future.set_result(None)
+        for entry in capped:
+            heapq.heappush(self.waiting, entry)
+
+    async def _acquire(self, priority):
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self.waiting, (priority, next(self.seq), future))
+        self.depth[priority] += 1
+        try:
+            self._dispatch()
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                self._release(priority)  # slot was handed over just as we were cancelled
+            raise
+        finally:
+            self.depth[priority] -= 1
+
+    def _release(self, priority):
+        self.in_flight -= 1
+        self.class_in_flight[priority] -= 1
+        self._dispatch()
+
+    @contextlib.asynccontextmanager
+    async def slot(self, priority):
+        """`async with outbound.slot(PRIORITY_GAME):` around a Discord call."""
+        started = time.perf_counter()
+        await self._acquire(priority)
+
+        waited = time.perf_counter() - started
+        self.waited[priority] += 1
+        self.wait_total[priority] += waited
+        self.wait_max[priority] = max(self.wait_max[priority], waited)
+        try:
+            yield
+        finally:
+            self._release(priority)
+
+    def stats(self):
+        return {
+            name: {
+                "depth": self.depth[i],
+                "in_flight": self.class_in_flight[i],
+                "avg_wait_ms": 1000 * self.wait_total[i] / self.waited[i] if self.waited[i] else 0.0,
+                "max_wait_ms": 1000 * self.wait_max[i],
+            }
+            for i, name in enumerate(self.CLASS_NAMES)
+        }
+
+
+outbound = OutboundScheduler()
+
+
+async def _trace_request_start(session, ctx, params):
+    await outbound.before_request(params.method, params.url.path)
+
+
+async def _trace_request_end(session, ctx, params):
+    outbound.observe(params.method, params.url.path, params.response.status, params.response.headers)
+
+http_trace = aiohttp.TraceConfig()
+http_trace.on_request_start.append(_trace_request_start)
+http_trace.on_request_end.append(_trace_request_end)
+
+bot = commands.Bot(command_prefix="!", intents=intents, http_trace=http_trace)
 tree = bot.tree 
 
 
@@ -71,64 +583,378 @@ TEST_PLAYER_IDS = [
     1041382761996492830
 ]
 
-start_buttons = {}  # (channel_id, game_type) => Message
+# ✅ How many open lobbies of one game type a channel may hold at once
+MAX_LOBBIES_PER_CHANNEL = int(os.getenv("MAX_LOBBIES_PER_CHANNEL", "3"))
+LOBBY_ABANDON_SECONDS = 15 * 60
+LOBBY_EDIT_DEBOUNCE = 0.5  # seconds; joins inside this window share one lobby edit
+
+
+class RegistryEntry:
+    """One live object (lobby, room, tournament or start button) and the ids it is indexed under."""
+
+    def __init__(self, kind, key, obj, channel_id, game_type=None):
+        self.kind = kind
+        self.key = key
+        self.obj = obj
+        self.channel_id = channel_id
+        self.game_type = game_type
+        self.thread_id = None
+        self.message_id = None
+        self.players = set()
+        self.created_at = time.monotonic()
+
+
+class GameRegistry:
+    """Single home for live game state with O(1) lookups by channel, thread, message and player."""
+
+    KINDS = ("lobby", "room", "tournament", "button")
+
+    def __init__(self):
+        self.entries = {}                    # entry key -> RegistryEntry
+        self.by_object = {}                  # id(obj) -> entry key
+        self.by_channel = defaultdict(set)   # channel_id -> entry keys
+        self.by_thread = {}                  # thread_id -> entry key
+        self.by_message = {}                 # message_id -> entry key
+        self.by_player = defaultdict(set)    # player_id -> entry keys
+        self.lobby_index = defaultdict(dict) # (game_type, channel_id) -> {lobby_id: GameView}
+        self.evicted = 0
+
+    # ---- indexing ----
+
+    def _describe(self, entry):
+        """(message, thread_id, players) for an entry, read off the live object."""
+        obj = entry.obj
+        # ✅ Buttons are registered as the message itself; everything else carries .message
+        if entry.kind == "button":
+            return obj, None, []
+        if entry.kind == "lobby":
+            thread = getattr(obj, "thread", None)
+            return obj.message, thread.id if thread else None, obj.players
+        if entry.kind == "room":
+            return obj.message, obj.channel.id if obj.channel else None, obj.players
+        return obj.message, None, obj.players
+
+    def _unindex(self, entry):
+        if entry.message_id and self.by_message.get(entry.message_id) == entry.key:
+            del self.by_message[entry.message_id]
+        if entry.thread_id and self.by_thread.get(entry.thread_id) == entry.key:
+            del self.by_thread[entry.thread_id]
+        for pid in entry.players:
+            keys = self.by_player.get(pid)
+            if keys is not None:
+                keys.discard(entry.key)
+                if not keys:
+                    del self.by_player[pid]
+
+    def _index(self, entry):
+        message, thread_id, players = self._describe(entry)
+        entry.message_id = message.id if message else None
+        entry.thread_id = thread_id
+        entry.players = set(players)
+        if entry.message_id:
+            self.by_message[entry.message_id] = entry.key
+        if entry.thread_id:
+            self.by_thread[entry.thread_id] = entry.key
+        for pid in entry.players:
+            self.by_player[pid].add(entry.key)
+
+    def _add(self, entry):
+        if entry.key in self.entries:
+            self._remove(entry.key)
+        self.entries[entry.key] = entry
+        self.by_object[id(entry.obj)] = entry.key
+        self.by_channel[entry.channel_id].add(entry.key)
+        self._index(entry)
+        return entry
+
+    def _remove(self, key):
+        entry = self.entries.pop(key, None)
+        if not entry:
+            return None
+        self._unindex(entry)
+        self.by_object.pop(id(entry.obj), None)
+        keys = self.by_channel.get(entry.channel_id)
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self.by_channel[entry.channel_id]
+        if entry.kind == "lobby":
+            lobbies = self.lobby_index.get((entry.game_type, entry.channel_id))
+            if lobbies is not None:
+                lobbies.pop(entry.obj.lobby_id, None)
+                if not lobbies:
+                    del self.lobby_index[(entry.game_type, entry.channel_id)]
+        return entry
+
+    def refresh(self, obj):
+        """Re-read message/thread/players after a lifecycle change on a registered object."""
+        key = self.by_object.get(id(obj))
+        entry = self.entries.get(key) if key else None
+        if entry:
+            self._unindex(entry)
+            self._index(entry)
+
+    # ---- lobbies ----
+
+    def add_lobby(self, view):
+        self._add(RegistryEntry("lobby", ("lobby", view.lobby_id), view, view.channel.id, view.game_type))
+        self.lobby_index[(view.game_type, view.channel.id)][view.lobby_id] = view
+
+    def remove_lobby(self, view):
+        self._remove(("lobby", view.lobby_id))
+
+    def lobbies(self, game_type, channel_id):
+        """Open lobbies for a game type in a channel, keyed by lobby id."""
+        return self.lobby_index.get((game_type, channel_id), {})
+
+    # ---- match rooms ----
+
+    def add_room(self, room_view):
+        self._add(RegistryEntry("room", ("room", room_view.channel.id), room_view, room_view.channel.id, room_view.game_type))
+
+    def remove_room(self, thread_id):
+        self._remove(("room", thread_id))
+
+    def room(self, thread_id):
+        entry = self.entries.get(("room", thread_id))
+        return entry.obj if entry else None
+
+    # ---- tournaments ----
+
+    def add_tournament(self, manager):
+        channel_id = manager.parent_channel.id
+        self._add(RegistryEntry("tournament", ("tournament", channel_id), manager, channel_id, "tournament"))
+
+    def remove_tournament(self, channel_id):
+        self._remove(("tournament", channel_id))
+
+    def tournament(self, channel_id):
+        entry = self.entries.get(("tournament", channel_id))
+        return entry.obj if entry else None
+
+    # ---- start buttons ----
+
+    def add_button(self, channel_id, game_type, message):
+        self._add(RegistryEntry("button", ("button", channel_id, game_type), message, channel_id, game_type))
+
+    def pop_button(self, channel_id, game_type):
+        entry = self._remove(("button", channel_id, game_type))
+        return entry.obj if entry else None
+
+    def button(self, channel_id, game_type):
+        entry = self.entries.get(("button", channel_id, game_type))
+        return entry.obj if entry else None
+
+    def buttons_in(self, channel_id):
+        """{game_type: Message} for every start button posted in a channel."""
+        return {
+            key[2]: self.entries[key].obj
+            for key in self.by_channel.get(channel_id, ())
+            if key[0] == "button"
+        }
+
+    def all_buttons(self):
+        return [e.obj for e in self.entries.values() if e.kind == "button"]
+
+    # ---- lookups ----
+
+    def by_message_id(self, message_id):
+        key = self.by_message.get(message_id)
+        return self.entries[key].obj if key else None
+
+    def by_thread_id(self, thread_id):
+        key = self.by_thread.get(thread_id)
+        return self.entries[key].obj if key else None
+
+    def for_player(self, player_id):
+        """Every live lobby, room or tournament the player is seated in."""
+        return [self.entries[key].obj for key in self.by_player.get(player_id, ())]
+
+    # ---- housekeeping ----
+
+    def _is_stale(self, entry, now):
+        obj = entry.obj
+        if entry.kind == "lobby":
+            never_posted = obj.message is None and now - entry.created_at > LOBBY_ABANDON_SECONDS
+            return obj.has_started or never_posted
+        if entry.kind == "room":
+            return getattr(obj, "has_finalized", False)
+        if entry.kind == "tournament":
+            return bool(obj.bracket) and obj.bracket.champion is not None
+        return False
+
+    def evict_stale(self):
+        """Drop entries whose game has already moved on without deregistering."""
+        now = time.monotonic()
+        stale = [key for key, entry in self.entries.items() if self._is_stale(entry, now)]
+        for key in stale:
+            self._remove(key)
+        self.evicted += len(stale)
+        return len(stale)
+
+    def clear(self, kind):
+        for key in [k for k, e in self.entries.items() if e.kind == kind]:
+            self._remove(key)
+
+    def counts(self):
+        counts = dict.fromkeys(self.KINDS, 0)
+        for entry in self.entries.values():
+            counts[entry.kind] += 1
+        counts["players"] = len(self.by_player)
+        counts["evicted"] = self.evicted
+        return counts
+
+
+registry = GameRegistry()
 
-# Globals
-games = {}
 
-pending_games = {}
+# ✅ Per-game actor: every state change for one game runs one at a time
+GAME_MAILBOX_SIZE = 32
+GAME_BUSY_MESSAGE = "⏳ This game is busy right now — try again in a moment."
+
+
+class ActorBusy(Exception):
+    """Raised when a game's mailbox is full and the event was not queued."""
+
+
+class GameActor:
+    """Serialized mailbox for one live game (lobby + its room share an actor)."""
+
+    rejected_total = 0
+
+    def __init__(self, name):
+        self.name = name
+        self.mailbox = asyncio.Queue(maxsize=GAME_MAILBOX_SIZE)
+        self.task = None
+        self.processed = 0
+        self.rejected = 0
+        self.stopping = False
+
+    def in_actor(self):
+        return self.task is not None and asyncio.current_task() is self.task
+
+    def stop(self):
+        """Cancel the actor; the running event and everything still queued fail with CancelledError."""
+        self.stopping = True
+        if self.task is not None and not self.task.done():
+            self.task.cancel()
+        self._fail_queued()
+
+    def _fail_queued(self):
+        while not self.mailbox.empty():
+            _, _, future = self.mailbox.get_nowait()
+            future.cancel()
+
+    async def _run(self):
+        # ✅ Drain and exit; the next call starts a fresh task, so idle games hold no task
+        while not self.mailbox.empty():
+            fn, args, future = self.mailbox.get_nowait()
+            try:
+                result = await fn(*args)
+            except BaseException as e:
+                # ✅ A handler's CancelledError only fails its own caller; the mailbox keeps draining
+                if not future.done():
+                    future.set_exception(e)
+                if self.stopping or isinstance(e, (KeyboardInterrupt, SystemExit)):
+                    self._fail_queued()
+                    raise
+            else:
+                if not future.done():
+                    future.set_result(result)
+            self.processed += 1
+
+    async def call(self, fn, *args, block=False):
+        """Run `fn(*args)` inside the actor and return its result.
+
+        Player events use the default and get ActorBusy when the mailbox is full;
+        timers pass block=True to wait for room instead of being dropped.
+        """
+        if self.in_actor():
+            return await fn(*args)  # ✅ already inside this game's actor — queuing would deadlock
+
+        future = asyncio.get_running_loop().create_future()
+        if block:
+            await self.mailbox.put((fn, args, future))
+        else:
+            try:
+                self.mailbox.put_nowait((fn, args, future))
+            except asyncio.QueueFull:
+                self.rejected += 1
+                GameActor.rejected_total += 1
+                print(f"[Actor] ⏳ {self.name} mailbox full — rejected {fn.__name__}")
+                raise ActorBusy(self.name)
+
+        if self.task is None or self.task.done():
+            self.task = asyncio.create_task(self._run())
+        return await future
+
 
 players_data = "players.json"
 
 
 WORDS = ["alpha", "bravo", "delta", "foxtrot", "gamma"]
 
-default_template = {
-    "credits": 1000,
-    "stats": {
-        "games_since_credit": 0,
-        "singles": {
-            "rank": 1000,
-            "wins": 0,
-            "losses": 0,
-            "draws": 0,
-            "games_played": 0,
-            "current_streak": 0,
-            "best_streak": 0,
-            "trophies": 0
-        },
-        "doubles": {
-            "rank": 1000,
-            "wins": 0,
-            "losses": 0,
-            "draws": 0,
-            "games_played": 0,
-            "current_streak": 0,
-            "best_streak": 0,
-            "trophies": 0
-        },
-        "triples": {
-            "rank": 1000,
-            "wins": 0,
-            "losses": 0,
-            "draws": 0,
-            "games_played": 0,
-            "current_streak": 0,
-            "best_streak": 0,
-            "trophies": 0
-        },
-        "tournament": {
-            "rank": 1000,
-            "wins": 0,
-            "losses": 0,
-            "draws": 0,
-            "games_played": 0,
-            "current_streak": 0,
-            "best_streak": 0,
-            "trophies": 0
-        }
-    }
-}
+PLAYER_GAME_TYPES = ("singles", "doubles", "triples", "tournament")
+DEFAULT_RANK = 1000
+DEFAULT_CREDITS = 1000
+STAT_FIELDS = ("rank", "wins", "losses", "draws", "games_played", "current_streak", "best_streak", "trophies")
+
+
+class GameStats:
+    """One game type's record. Slotted, and built fresh per player — never shared with a template."""
+
+    __slots__ = STAT_FIELDS
+
+    def __init__(self, rank=DEFAULT_RANK, wins=0, losses=0, draws=0, games_played=0,
+                 current_streak=0, best_streak=0, trophies=0):
+        self.rank = rank
+        self.wins = wins
+        self.losses = losses
+        self.draws = draws
+        self.games_played = games_played
+        self.current_streak = current_streak
+        self.best_streak = best_streak
+        self.trophies = trophies
+
+    @classmethod
+    def from_dict(cls, data):
+        """Missing or null fields fall back to defaults; unknown keys are ignored."""
+        if not data:
+            return cls()
+        return cls(**{f: data[f] for f in STAT_FIELDS if data.get(f) is not None})
+
+    def to_dict(self):
+        return {f: getattr(self, f) for f in STAT_FIELDS}
+
+
+class PlayerRecord:
+    """A players row: credits, the global games_since_credit counter and one GameStats per game type."""
+
+    __slots__ = ("id", "credits", "games_since_credit", "modes")
+
+    def __init__(self, id, credits=DEFAULT_CREDITS, games_since_credit=0, modes=None):
+        self.id = str(id)
+        self.credits = credits
+        self.games_since_credit = games_since_credit
+        self.modes = modes or {gt: GameStats() for gt in PLAYER_GAME_TYPES}
+
+    @classmethod
+    def from_row(cls, row):
+        stats = row.get("stats") or {}
+        return cls(
+            row.get("id"),
+            credits=row["credits"] if row.get("credits") is not None else DEFAULT_CREDITS,
+            games_since_credit=stats.get("games_since_credit") or 0,
+            modes={gt: GameStats.from_dict(stats.get(gt)) for gt in PLAYER_GAME_TYPES}
+        )
+
+    def stats(self, game_type):
+        return self.modes[game_type]
+
+    def to_row(self):
+        stats = {gt: s.to_dict() for gt, s in self.modes.items()}
+        stats["games_since_credit"] = self.games_since_credit
+        return {"id": self.id, "credits": self.credits, "stats": stats}
 
 
 # Helpers
@@ -267,13 +1093,13 @@ class HandicapModal(ui.Modal, title="Set Handicap"):
 
         try:
             # Step 1: Fetch avg_par
-            course_res = await run_db(lambda: supabase
+            course_res = await single_flight.run(("course_avg_par", self.course_id), lambda: run_db(lambda: supabase
                 .table("courses")
                 .select("avg_par")
                 .eq("id", self.course_id)
                 .maybe_single()
                 .execute()
-            )
+            ))
 
             if not course_res or not course_res.data:
                 await interaction.response.send_message("❌ Course not found.", ephemeral=True)
@@ -288,7 +1114,7 @@ class HandicapModal(ui.Modal, title="Set Handicap"):
             handicap = score - avg_par
 
             # Step 3: Save to Supabase
-            await run_db(lambda: supabase
+            await write_db("handicaps", lambda: supabase
                 .table("handicaps")
                 .upsert({
                     "player_id": str(self.user_id),
@@ -353,33 +1179,57 @@ def probability_to_odds(probability: float) -> float:
     return round(1 / probability, 2) if probability > 0 else 99.99
 
 
+def tournament_champion_odds(bracket, ratings):
+    """Exact probability of each entrant winning the bracket.
+
+    Dynamic programming over the fixed bracket shape: in round r a slot can
+    only meet the slots of its sibling block (size 2^(r-1)), so
+    reach[r+1] = reach[r] * (P(win) @ reach[r] over that block). Each round is
+    one vectorized O(n^2) pass; decided matches are pinned to their result.
+    """
+    slots = [p for match in bracket.rounds[0] for p in match.players]
+    slot_of = {p: i for i, p in enumerate(slots) if p is not None}
+    size = len(slots)
+
+    rating = np.array([float(ratings.get(p, 1000)) if p is not None else 0.0 for p in slots])
+    win = 1.0 / (1.0 + 10.0 ** ((rating[None, :] - rating[:, None]) / 400.0))  # win[i, j] = P(i beats j)
+    reach = np.array([p is not None for p in slots], dtype=float)
+    idx = np.arange(size)
+
+    for round_no, matches in enumerate(bracket.rounds, start=1):
+        block = 1 << (round_no - 1)
+        sibling = (idx[:, None] // block) == ((idx[None, :] // block) ^ 1)
+        opponent = sibling * reach[None, :]
+        # ✅ An empty sibling block (bye) is a walkover
+        advance = (win * opponent).sum(axis=1) + (1.0 - opponent.sum(axis=1))
+        reach = reach * advance
+
+        for k, match in enumerate(matches):
+            if match.winner is not None:
+                reach[k * 2 * block:(k + 1) * 2 * block] = 0.0
+                reach[slot_of[match.winner]] = 1.0
+
+    return {slots[i]: float(reach[i]) for i in range(size) if slots[i] is not None}
+
+
 async def ensure_start_buttons(bot):
-    print("[AutoInit] ensure_start_buttons() triggered")
+    """Reconcile start buttons against the registry; Discord is only touched on a mismatch."""
+    drift = [
+        key for key in start_button_manager.homes
+        if not start_button_manager.is_in_sync(*key)
+    ]
 
-    for channel_id, (game_type, max_players) in CHANNEL_GAME_MAP.items():
+    for channel_id, game_type in drift:
         channel = bot.get_channel(channel_id)
         if not isinstance(channel, discord.TextChannel):
             print(f"[AutoInit] ❌ Channel {channel_id} not found — skipping.")
             continue
 
-        if pending_games.get((game_type, channel_id)):
-            print(f"[AutoInit] ⏸️ Skipping '{game_type}' — a game is already pending.")
-            continue
-
-        if any(k[0] == channel_id and k[1] == game_type for k in start_buttons):
-            print(f"[AutoInit] ✅ Button already exists in {channel.name} for '{game_type}' — skipping.")
-            continue
-
         try:
-            print(f"[AutoInit] 🟢 Posting button for '{game_type}' in {channel.name}")
-            if game_type == "tournament":
-                creator = channel.guild.get_member(bot.user.id)
-                await start_new_game_button(channel, game_type)
-            else:
-                await start_new_game_button(channel, game_type, max_players=max_players)
-            print(f"[AutoInit] ✅ Button posted in {channel.name}")
+            print(f"[AutoInit] 🔁 Reconciling '{game_type}' button in {channel.name}")
+            await start_button_manager.sync(channel, game_type)
         except Exception as e:
-            print(f"[AutoInit] ❌ Failed to post button in {channel.name}: {e}")
+            print(f"[AutoInit] ❌ Failed to reconcile button in {channel.name}: {e}")
 
 
 async def start_hourly_scheduler(guild: discord.Guild, channel: discord.TextChannel):
@@ -445,12 +1295,8 @@ async def post_hourly_game(guild: discord.Guild, channel: discord.TextChannel):
         bot=bot
     )
 
-    # ✅ Store using ("singles", channel.id) for consistency
-    pending_games[("singles", channel.id)] = {
-        "players": [],
-        "channel_id": channel.id,
-        "view": view
-    }
+    # ✅ Register alongside any player-started singles lobbies
+    registry.add_lobby(view)
 
     # ✅ Start void timer (30 min from scheduled time)
     view.hourly_void_task = asyncio.create_task(view._void_if_not_started())
@@ -458,6 +1304,7 @@ async def post_hourly_game(guild: discord.Guild, channel: discord.TextChannel):
     # ✅ Send the lobby embed
     embed = await view.build_embed(channel.guild)
     view.message = await channel.send(embed=embed, view=view)
+    registry.refresh(view)
 
     print("[HOURLY] ✅ Hourly lobby created and void timer started.")
 
@@ -495,7 +1342,8 @@ class HourlyCountdownView(discord.ui.View):
     async def update_message(self, content):
         if self.message:
             try:
-                await self.message.edit(content=content, view=self)
+                async with outbound.slot(PRIORITY_COSMETIC):
+                    await self.message.edit(content=content, view=self)
             except discord.NotFound:
                 print("[Countdown] ⚠️ Message not found — maybe deleted.")
             except Exception as e:
@@ -515,18 +1363,29 @@ async def set_parameter(key: str, value: str):
     )
 
 async def get_parameter(key: str):
-    res = await run_db(
+    res = await single_flight.run(("parameter", key), lambda: run_db(
         lambda: supabase
             .table("parameters")
             .select("value")
             .eq("key", key)
             .execute()
-    )
+    ))
     if res and res.data:
         return res.data[0]["value"]
     return None
 
 
+
+async def load_courses(columns="*"):
+    """All course rows; simultaneous lobby/round starts share one query."""
+    if replica.ready:
+        return replica.courses(columns)
+    res = await single_flight.run(("courses", columns), lambda: run_db(
+        lambda: supabase.table("courses").select(columns).execute()
+    ))
+    return res.data or []
+
+
 def resolve_bet_choice_name(choice, game_type, players=None, guild=None):
     choice = str(choice)
     
@@ -552,9 +1411,121 @@ def resolve_bet_choice_name(choice, game_type, players=None, guild=None):
     except:
         return f"User {choice}"
 
+# ✅ Broadcasts (alerts, results) go out through channel webhooks, off the bot's own budget
+WEBHOOK_NAME = "Putt Club"
+ALERT_DIGEST_WINDOW = 10  # seconds; lobby alerts inside this window share one message
+ALERT_BANNER_URL = "https://cdn.discordapp.com/attachments/1378860910310854666/1399365960195903639/new_game_logo.png"
+
+
+class Broadcaster:
+    """Background fan-out of broadcast messages via one cached webhook per channel."""
+
+    def __init__(self):
+        self.webhooks = {}                     # parent channel_id -> discord.Webhook
+        self.queue = asyncio.Queue()
+        self.worker = None
+        self.pending_alerts = defaultdict(list)  # alert channel_id -> [(game_type, lobby_link)]
+        self.digest_tasks = {}
+        self.sent = 0
+        self.collapsed = 0
+
+    def post(self, channel, **kwargs):
+        """Queue a message for `channel` (a text channel or thread); await the result to wait for delivery."""
+        future = asyncio.get_running_loop().create_future()
+        self.queue.put_nowait((channel, kwargs, future))
+        if self.worker is None or self.worker.done():
+            self.worker = asyncio.create_task(self._run())
+        return future
+
+    async def _webhook_for(self, channel):
+        hook = self.webhooks.get(channel.id)
+        if hook:
+            return hook
+        for existing in await channel.webhooks():
+            if existing.name == WEBHOOK_NAME and existing.user and existing.user.id == bot.user.id:
+                hook = existing
+                break
+        else:
+            hook = await channel.create_webhook(name=WEBHOOK_NAME, reason="Game broadcasts")
+            print(f"[Broadcast] 🪝 Created webhook in #{channel.name}")
+        self.webhooks[channel.id] = hook
+        return hook
+
+    async def _deliver(self, channel, kwargs):
+        thread = channel if isinstance(channel, discord.Thread) else None
+        parent = channel.parent if thread else channel
+        try:
+            hook = await self._webhook_for(parent)
+            extra = {"thread": thread} if thread else {}
+            async with outbound.slot(PRIORITY_NOTIFY):
+                await hook.send(username=WEBHOOK_NAME, avatar_url=bot.user.display_avatar.url, **extra, **kwargs)
+        except discord.NotFound:
+            self.webhooks.pop(parent.id, None)  # ✅ deleted by someone — recreate next time
+            raise
+        except discord.Forbidden:
+            # ✅ No Manage Webhooks permission here — fall back to a normal bot message
+            async with outbound.slot(PRIORITY_NOTIFY):
+                await channel.send(**kwargs)
+
+    async def _run(self):
+        while not self.queue.empty():
+            channel, kwargs, future = self.queue.get_nowait()
+            try:
+                try:
+                    await self._deliver(channel, kwargs)
+                except discord.NotFound:
+                    await self._deliver(channel, kwargs)  # one retry with a fresh webhook
+                self.sent += 1
+                if not future.done():
+                    future.set_result(True)
+            except Exception as e:
+                print(f"[Broadcast] ❌ Failed to post in #{getattr(channel, 'name', channel)}: {e}")
+                if not future.done():
+                    future.set_result(False)
+
+    def alert(self, channel, role, game_type, lobby_link):
+        """Collect a lobby alert; everything inside the digest window is sent as one message."""
+        pending = self.pending_alerts[channel.id]
+        pending.append((game_type, lobby_link))
+        if len(pending) > 1:
+            self.collapsed += 1
+        if channel.id not in self.digest_tasks:
+            self.digest_tasks[channel.id] = asyncio.create_task(self._flush_alerts(channel, role))
+
+    async def _flush_alerts(self, channel, role):
+        await asyncio.sleep(ALERT_DIGEST_WINDOW)
+        alerts = self.pending_alerts.pop(channel.id, [])
+        self.digest_tasks.pop(channel.id, None)
+        if not alerts:
+            return
+
+        if len(alerts) == 1:
+            game_type, lobby_link = alerts[0]
+            content = f"{role.mention} ⛳ **New `{game_type}` game alert!**"
+            description = (
+                f"A new **`{game_type}`** lobby just opened!\n\n"
+                f"[👉 **Click here to join the lobby!**]({lobby_link})"
+            )
+        else:
+            content = f"{role.mention} ⛳ **{len(alerts)} new lobbies just opened!**"
+            description = "\n".join(
+                f"• **`{game_type}`** — [👉 join]({lobby_link})" for game_type, lobby_link in alerts
+            )
+
+        embed = discord.Embed(title="🏌️ **THE PUTT CLUB SERVER**", description=description, color=discord.Color.green())
+        embed.set_image(url=ALERT_BANNER_URL)
+        embed.set_footer(text="Putt Club")
+
+        self.post(channel, content=content, embed=embed, allowed_mentions=discord.AllowedMentions(roles=True))
+        print(f"[INFO] Global alert queued for {len(alerts)} lobby(s) to #{channel.name}")
+
+
+broadcaster = Broadcaster()
+
+
 async def send_global_notification(game_type: str, lobby_link: str, guild: discord.Guild):
     """
-    🔔 Send a push-worthy notification to the alerts channel, with @role ping, embed, and banner.
+    🔔 Queue a push-worthy notification to the alerts channel, with @role ping, embed, and banner.
     """
 
     # 📌 Match each game type to its ping role
@@ -577,349 +1548,195 @@ async def send_global_notification(game_type: str, lobby_link: str, guild: disco
         print(f"[ERROR] Channel ID {ALERT_CHANNEL_ID} not found in guild {guild.name}")
         return
 
-    embed = discord.Embed(
-        title="🏌️ **THE PUTT CLUB SERVER**",
-        description=(
-            f"A new **`{game_type}`** lobby just opened!\n\n"
-            f"[👉 **Click here to join the lobby!**]({lobby_link})"
-        ),
-        color=discord.Color.green()
-    )
-    embed.set_image(
-        url="https://cdn.discordapp.com/attachments/1378860910310854666/1399365960195903639/new_game_logo.png"
-    )
-    embed.set_footer(text="Putt Club")
-
-    await channel.send(
-        content=f"{role.mention} ⛳ **New `{game_type}` game alert!**",
-        embed=embed,
-        allowed_mentions=discord.AllowedMentions(roles=True)
-    )
-
-    print(f"[INFO] Global alert sent for '{game_type}' to #{channel.name}")
-
-def ensure_full_stats(stats: dict):
-    defaults = {
-        "rank": 1000,
-        "wins": 0,
-        "losses": 0,
-        "draws": 0,
-        "games_played": 0,
-        "current_streak": 0,
-        "best_streak": 0,
-        "trophies": 0
-    }
-    for k, v in defaults.items():
-        stats.setdefault(k, v)
+    broadcaster.alert(channel, role, game_type, lobby_link)
 
 async def expected_score(rating_a, rating_b):
     """Expected score for player/team A vs B"""
     return 1 / (1 + 10 ** ((rating_b - rating_a) / 400))
 
-async def update_elo_pair_and_save(player1_id, player2_id, winner, k=32, game_type="singles"):
-    """
-    Singles: ELO + stats per game_type.
-    winner: 1 (player1), 2 (player2), 0.5 (draw)
+class StatPatch:
+    """Server-side edits to one player's `stats` JSON — only the touched paths are sent and written.
+
+    Paths are dotted and relative to `stats` (e.g. "singles.rank", "games_since_credit").
+    Ops run in order inside the `patch_player_stats` RPC, so a `max` can read a counter
+    incremented earlier in the same patch.
     """
-    p1 = await get_player(player1_id)
-    p2 = await get_player(player2_id)
-
-    # ✅ Safely initialize full stat block
-    default_stats = {
-        "rank": 1000,
-        "wins": 0,
-        "losses": 0,
-        "draws": 0,
-        "games_played": 0,
-        "current_streak": 0,
-        "best_streak": 0,
-        "trophies": 0
-    }
 
-    p1.setdefault("stats", {}).setdefault(game_type, default_stats.copy())
-    p2.setdefault("stats", {}).setdefault(game_type, default_stats.copy())
+    def __init__(self, player_id):
+        self.player_id = str(player_id)
+        self.ops = []
+
+    def inc(self, path, amount=1, default=0):
+        self.ops.append({"op": "inc", "path": path.split("."), "value": amount, "default": default})
+        return self
+
+    def set(self, path, value):
+        self.ops.append({"op": "set", "path": path.split("."), "value": value})
+        return self
+
+    def max(self, path, from_path):
+        """stats[path] = max(stats[path], stats[from_path]) — evaluated server-side."""
+        self.ops.append({"op": "max", "path": path.split("."), "from": from_path.split(".")})
+        return self
+
+    def record_result(self, game_type, outcome, rank_delta=0):
+        """One finished game: outcome is "win", "loss" or "draw"."""
+        self.inc(f"{game_type}.rank", rank_delta, default=DEFAULT_RANK)
+        self.inc(f"{game_type}.games_played")
+        if outcome == "win":
+            self.inc(f"{game_type}.wins")
+            self.inc(f"{game_type}.trophies")
+            self.inc(f"{game_type}.current_streak")
+            self.max(f"{game_type}.best_streak", f"{game_type}.current_streak")
+        else:
+            self.inc(f"{game_type}.losses" if outcome == "loss" else f"{game_type}.draws")
+            self.set(f"{game_type}.current_streak", 0)
+        return self
 
-    s1 = p1["stats"][game_type]
-    s2 = p2["stats"][game_type]
+    async def _call(self, rpc, **params):
+        # ✅ null means there's no players row yet: create it from defaults and retry once
+        for attempt in range(2):
+            res = await run_db(lambda: supabase
+                .rpc(rpc, {"p_player_id": self.player_id, "p_ops": self.ops, **params})
+                .execute()
+            )
+            if res.data is not None:
+                return res.data
+            if attempt == 0:
+                await get_player(self.player_id)
+        raise PlayerRowMissing(f"{rpc} for player {self.player_id}")
 
-    ensure_full_stats(s1)
-    ensure_full_stats(s2)
+    async def apply(self) -> dict:
+        """Send the patch; returns the player's stats after it was applied."""
+        if not self.ops:
+            return {}
+        stats = await self._call("patch_player_stats")
+        replica.set_stats(self.player_id, stats)
+        return stats
 
-    r1 = s1["rank"]
-    r2 = s2["rank"]
 
-    e1 = await expected_score(r1, r2)
+class PlayerRowMissing(Exception):
+    """Raised when a stats patch finds no players row, even after creating one."""
 
-    if winner == 1:
-        actual1 = 1
-    elif winner == 2:
-        actual1 = 0
-    else:
-        actual1 = 0.5
 
-    delta = round(k * (actual1 - e1))
+# ✅ Every GAMES_PER_CREDIT_REWARD games played pays CREDIT_REWARD credits
+GAMES_PER_CREDIT_REWARD = 10
+CREDIT_REWARD = 100
+
 
-    s1["rank"] += delta
-    s2["rank"] -= delta
+async def elo_pair_patches(player1_id, player2_id, winner, k=32, game_type="singles"):
+    """
+    Singles: ELO + stats per game_type, as patches for apply_game_patches.
+    winner: 1 (player1), 2 (player2), 0.5 (draw)
+    """
+    r1, r2 = await player_repo.ranks([player1_id, player2_id], game_type)
 
-    s1["games_played"] += 1
-    s2["games_played"] += 1
+    e1 = await expected_score(r1, r2)
 
     if winner == 1:
-        s1["wins"] += 1
-        s2["losses"] += 1
-        s1["current_streak"] += 1
-        s2["current_streak"] = 0
-        s1["best_streak"] = max(s1["best_streak"], s1["current_streak"])
-        s1["trophies"] += 1
+        actual1, out1, out2 = 1, "win", "loss"
     elif winner == 2:
-        s2["wins"] += 1
-        s1["losses"] += 1
-        s2["current_streak"] += 1
-        s1["current_streak"] = 0
-        s2["best_streak"] = max(s2["best_streak"], s2["current_streak"])
-        s2["trophies"] += 1
+        actual1, out1, out2 = 0, "loss", "win"
     else:
-        s1["draws"] += 1
-        s2["draws"] += 1
-        s1["current_streak"] = 0
-        s2["current_streak"] = 0
+        actual1, out1, out2 = 0.5, "draw", "draw"
 
-    await save_player(player1_id, p1)
-    await save_player(player2_id, p2)
-
-    print(f"[ELO] {game_type.title()}: {player1_id} {r1} → {s1['rank']} | {player2_id} {r2} → {s2['rank']}")
-    return s1["rank"], s2["rank"]
+    delta = round(k * (actual1 - e1))
 
+    print(f"[ELO] {game_type.title()}: {player1_id} {r1} → {r1 + delta} | {player2_id} {r2} → {r2 - delta}")
+    return [
+        StatPatch(player1_id).record_result(game_type, out1, delta),
+        StatPatch(player2_id).record_result(game_type, out2, -delta),
+    ]
 
 
-async def update_elo_doubles_and_save(teamA_ids, teamB_ids, winner, k=32, game_type="doubles"):
-    teamA = [await get_player(pid) for pid in teamA_ids]
-    teamB = [await get_player(pid) for pid in teamB_ids]
 
-    for p in teamA + teamB:
-        p.setdefault("stats", {})
-        p["stats"].setdefault(game_type, {
-            "rank": 1000,
-            "games_played": 0,
-            "wins": 0,
-            "losses": 0,
-            "draws": 0,
-            "trophies": 0,
-            "current_streak": 0,
-            "best_streak": 0,
-        })
+async def elo_doubles_patches(teamA_ids, teamB_ids, winner, k=32, game_type="doubles"):
+    ranks = await player_repo.ranks(list(teamA_ids) + list(teamB_ids), game_type)
 
-    avgA = sum(p["stats"][game_type]["rank"] for p in teamA) / 2
-    avgB = sum(p["stats"][game_type]["rank"] for p in teamB) / 2
+    avgA = sum(ranks[:2]) / 2
+    avgB = sum(ranks[2:]) / 2
 
     eA = await expected_score(avgA, avgB)
 
     if winner.upper() == "A":
-        sA, sB = 1, 0
+        sA, outA, outB = 1, "win", "loss"
     elif winner.upper() == "B":
-        sA, sB = 0, 1
+        sA, outA, outB = 0, "loss", "win"
     else:
-        sA, sB = 0.5, 0.5
+        sA, outA, outB = 0.5, "draw", "draw"
 
     delta = round(k * (sA - eA))
 
-    for idx, p in enumerate(teamA):
-        s = p["stats"][game_type]
-        ensure_full_stats(s)
-        old = s["rank"]
-        s["rank"] += delta
-        s["games_played"] += 1
-
-        if sA > sB:
-            s["wins"] += 1
-            s["trophies"] += 1
-            s["current_streak"] += 1
-            s["best_streak"] = max(s["best_streak"], s["current_streak"])
-        elif sA < sB:
-            s["losses"] += 1
-            s["current_streak"] = 0
-        else:
-            s["draws"] += 1
-            s["current_streak"] = 0
-
-        await save_player(teamA_ids[idx], p)
-        print(f"[ELO] Team A Player {teamA_ids[idx]}: {old} → {s['rank']}")
-
-    for idx, p in enumerate(teamB):
-        s = p["stats"][game_type]
-        ensure_full_stats(s)
-        old = s["rank"]
-        s["rank"] -= delta
-        s["games_played"] += 1
-
-        if sB > sA:
-            s["wins"] += 1
-            s["trophies"] += 1
-            s["current_streak"] += 1
-            s["best_streak"] = max(s["best_streak"], s["current_streak"])
-        elif sB < sA:
-            s["losses"] += 1
-            s["current_streak"] = 0
-        else:
-            s["draws"] += 1
-            s["current_streak"] = 0
+    patches = []
+    old_ranks = dict(zip(list(teamA_ids) + list(teamB_ids), ranks))
+    for team_ids, outcome, team_delta, label in ((teamA_ids, outA, delta, "A"), (teamB_ids, outB, -delta, "B")):
+        for pid in team_ids:
+            patches.append(StatPatch(pid).record_result(game_type, outcome, team_delta))
+            print(f"[ELO] Team {label} Player {pid}: {old_ranks[pid]} → {old_ranks[pid] + team_delta}")
 
-        await save_player(teamB_ids[idx], p)
-        print(f"[ELO] Team B Player {teamB_ids[idx]}: {old} → {s['rank']}")
+    return patches
 
-    return [p["stats"][game_type]["rank"] for p in teamA], [p["stats"][game_type]["rank"] for p in teamB]
 
-
-async def update_elo_triples_and_save(player_ids, winner, k=32, game_type="triples"):
+async def elo_triples_patches(player_ids, winner, k=32, game_type="triples"):
     """
     Triples: free-for-all ELO + per-game-type stats.
     winner: player_id
     """
-    default_stats = {
-        "rank": 1000,
-        "wins": 0,
-        "losses": 0,
-        "draws": 0,
-        "games_played": 0,
-        "current_streak": 0,
-        "best_streak": 0,
-        "trophies": 0
-    }
-
-    players = [await get_player(pid) for pid in player_ids]
-    stats_list = []
-
-    for p in players:
-        p.setdefault("stats", {})
-        p["stats"].setdefault(game_type, {})
-        stats = p["stats"][game_type]
-        ensure_full_stats(stats)
-        stats_list.append(p["stats"][game_type])
-
-    # Compute current ranks
-    ranks = [s["rank"] for s in stats_list]
+    ranks = await player_repo.ranks(player_ids, game_type)
 
     # Expected score for each player
     exp = [10 ** (r / 400) for r in ranks]
     total = sum(exp)
     expected = [v / total for v in exp]
 
-    for idx, p in enumerate(players):
-        s = stats_list[idx]
-        pid = player_ids[idx]
-
+    patches = []
+    for pid, old_rank, E in zip(player_ids, ranks, expected):
         S = 1 if pid == winner else 0
-        E = expected[idx]
-
-        old_rank = s["rank"]
-        s["rank"] = round(old_rank + k * (S - E))
-
-        s["games_played"] += 1
-
-        if S == 1:
-            s["wins"] += 1
-            s["trophies"] += 1
-            s["current_streak"] += 1
-            s["best_streak"] = max(s["best_streak"], s["current_streak"])
-        else:
-            s["losses"] += 1
-            s["current_streak"] = 0
+        delta = round(old_rank + k * (S - E)) - old_rank
 
-        await save_player(pid, players[idx])
-        print(f"[ELO] Triples Player {pid}: {old_rank} → {s['rank']}")
+        patches.append(StatPatch(pid).record_result(game_type, "win" if S else "loss", delta))
+        print(f"[ELO] Triples Player {pid}: {old_rank} → {old_rank + delta}")
 
-    return [s["rank"] for s in stats_list]
+    return patches
 
 
-async def update_elo_series_and_save(player1_id, player2_id, results, k=32, game_type="tournament"):
+async def elo_series_patches(player1_id, player2_id, results, k=32, game_type="tournament"):
     """
     Multiple rounds ELO + stats, scoped by game_type.
     - results: list of outcomes per round: 1, 2, or 0.5 (draw)
-    Returns final ELOs for both players for this mode.
+    Returns one patch per player carrying the whole series.
     """
-    default_stats = {
-        "rank": 1000,
-        "wins": 0,
-        "losses": 0,
-        "draws": 0,
-        "games_played": 0,
-        "current_streak": 0,
-        "best_streak": 0,
-        "trophies": 0
-    }
-
-    p1 = await get_player(player1_id)
-    p2 = await get_player(player2_id)
-
-    p1.setdefault("stats", {}).setdefault(game_type, default_stats.copy())
-    p2.setdefault("stats", {}).setdefault(game_type, default_stats.copy())
-
-    ensure_full_stats(p1["stats"][game_type])
-    ensure_full_stats(p2["stats"][game_type])
-
-    s1 = p1["stats"][game_type]
-    s2 = p2["stats"][game_type]
-
-    r1 = s1["rank"]
-    r2 = s2["rank"]
+    start1, start2 = await player_repo.ranks([player1_id, player2_id], game_type)
+    r1, r2 = start1, start2
 
     for outcome in results:
         e1 = await expected_score(r1, r2)
         if outcome == 1:
-            s_actual, o_actual = 1, 0
+            s_actual = 1
         elif outcome == 2:
-            s_actual, o_actual = 0, 1
+            s_actual = 0
         else:
-            s_actual, o_actual = 0.5, 0.5
+            s_actual = 0.5
 
         delta = round(k * (s_actual - e1))
         r1 += delta
         r2 -= delta
 
-    # Final updated ranks after series
-    s1["rank"] = r1
-    s2["rank"] = r2
-
-    # Series counted as one game
-    s1["games_played"] += 1
-    s2["games_played"] += 1
-
     total = sum(results)
     rounds = len(results)
 
     if total > rounds / 2:
-        # p1 wins
-        s1["wins"] += 1
-        s2["losses"] += 1
-        s1["current_streak"] += 1
-        s2["current_streak"] = 0
-        s1["best_streak"] = max(s1["best_streak"], s1["current_streak"])
-        s1["trophies"] += 1
+        out1, out2 = "win", "loss"
     elif total < rounds / 2:
-        # p2 wins
-        s2["wins"] += 1
-        s1["losses"] += 1
-        s2["current_streak"] += 1
-        s1["current_streak"] = 0
-        s2["best_streak"] = max(s2["best_streak"], s2["current_streak"])
-        s2["trophies"] += 1
+        out1, out2 = "loss", "win"
     else:
-        # draw
-        s1["draws"] += 1
-        s2["draws"] += 1
-        s1["current_streak"] = 0
-        s2["current_streak"] = 0
-
-    # ✅ Explicit reassignment (critical!)
-    p1["stats"][game_type] = s1
-    p2["stats"][game_type] = s2
+        out1, out2 = "draw", "draw"
 
-    await save_player(player1_id, p1)
-    await save_player(player2_id, p2)
-
-    print(f"[ELO] {game_type.title()} Series updated {player1_id}: {r1} | {player2_id}: {r2}")
-    return r1, r2
+    print(f"[ELO] {game_type.title()} Series {player1_id}: {start1} → {r1} | {player2_id}: {start2} → {r2}")
+    return [
+        StatPatch(player1_id).record_result(game_type, out1, r1 - start1),
+        StatPatch(player2_id).record_result(game_type, out2, r2 - start2),
+    ]
 
 
 async def update_course_average_par(course_id: str):
@@ -948,7 +1765,7 @@ async def update_course_average_par(course_id: str):
     new_avg = round(sum(scores) / len(scores), 1)
 
     # 2) Update the course row
-    update_res = await run_db(lambda: supabase
+    update_res = await write_db("courses", lambda: supabase
         .table("courses")
         .update({"avg_par": new_avg})
         .eq("id", course_id)
@@ -1067,6 +1884,8 @@ async def deduct_credits_atomic(user_id: int, amount: int) -> bool:
         print(f"[deduct_credits_atomic] ❌ RPC Error: {res.error}")
         return False
 
+    if res.data:
+        replica.adjust_credits(user_id, -amount)
     return bool(res.data)
 
 
@@ -1080,32 +1899,143 @@ async def add_credits_atomic(user_id: int, amount: int):
         print(f"[add_credits_atomic] ❌ RPC Error: {res.error}")
         return None
 
+    if isinstance(res.data, int):
+        replica.apply("players", [{"id": user_id, "credits": res.data}])
     return res.data
 
 
-async def save_player(user_id: int, player_data: dict):
-    player_data["id"] = str(user_id)
+# ✅ Optimistic concurrency: players rows carry a `version`, writes only land if it hasn't moved
+PLAYER_CAS_RETRIES = 5
+PLAYER_CAS_BACKOFF = 0.05
 
-    if "stats" not in player_data:
-        player_data["stats"] = {}
 
-    if not isinstance(player_data["stats"], dict):
-        print(f"[SAVE] ❌ Invalid stats object for user {user_id}")
-        return
+class PlayerWriteConflict(Exception):
+    """Raised when a compare-and-swap write still loses after every retry."""
 
-    print(f"[SAVE] Writing player {user_id} with stats keys: {list(player_data['stats'].keys())}")
 
-    res = await run_db(lambda: supabase
-        .table("players")
-        .upsert(player_data)
-        .execute()
-    )
+class PlayerWriter:
+    """Read-modify-write of player columns guarded by the row version, with bounded retry."""
 
-    if getattr(res, "error", None):
-        print(f"[DB] ❌ Failed to save player {user_id}: {res.error}")
-    else:
-        print(f"[DB] ✅ Player {user_id} saved.")
+    def __init__(self, retries=PLAYER_CAS_RETRIES):
+        self.retries = retries
+        self.attempts = Counter()   # label -> writes tried
+        self.conflicts = Counter()  # label -> version mismatches
+        self.exhausted = Counter()  # label -> gave up after all retries
+        self.hot_players = Counter()
+
+    async def modify(self, user_id, columns, mutate, label="write"):
+        """
+        mutate(row) -> dict of column updates (or None to skip the write).
+        Returns the row as written, with the new version.
+        """
+        uid = str(user_id)
+        for attempt in range(self.retries):
+            res = await run_db(lambda: supabase
+                .table("players")
+                .select(f"{columns},version")
+                .eq("id", uid)
+                .limit(1)
+                .execute()
+            )
+            if not res.data:
+                await get_player(user_id)  # creates the row from defaults
+                continue
+
+            row = res.data[0]
+            changes = mutate(dict(row))
+            if not changes:
+                return row
+
+            version = row.get("version") or 0
+            self.attempts[label] += 1
+            written = await write_db("players", lambda: supabase
+                .table("players")
+                .update({**changes, "version": version + 1})
+                .eq("id", uid)
+                .eq("version", version)
+                .execute()
+            )
+            if written.data:
+                return {**row, **changes, "version": version + 1}
 
+            # ⚠️ Someone else wrote first — re-read and try again
+            self.conflicts[label] += 1
+            self.hot_players[uid] += 1
+            await asyncio.sleep(random.uniform(0, PLAYER_CAS_BACKOFF * 2 ** attempt))
+
+        self.exhausted[label] += 1
+        print(f"[CAS] ❌ {label} for {uid} lost {self.retries} times in a row")
+        raise PlayerWriteConflict(f"{label} for player {uid}")
+
+    def conflict_rate(self, label=None):
+        attempts = self.attempts[label] if label else sum(self.attempts.values())
+        conflicts = self.conflicts[label] if label else sum(self.conflicts.values())
+        return conflicts / attempts if attempts else 0.0
+
+
+player_writer = PlayerWriter()
+
+
+class KeyedLocks:
+    """
+    One asyncio.Lock per key, created on demand and dropped once nobody holds or waits on it.
+    hold() takes several keys in sorted order so overlapping multi-key holders can't deadlock.
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self.locks = {}  # key -> [lock, holders + waiters]
+        self.acquired = 0
+        self.contended = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    @contextlib.asynccontextmanager
+    async def hold(self, *keys):
+        ordered = sorted({str(k) for k in keys})
+        taken = []
+        start = time.monotonic()
+        try:
+            for key in ordered:
+                entry = self.locks.setdefault(key, [asyncio.Lock(), 0])
+                entry[1] += 1
+                if entry[0].locked():
+                    self.contended += 1
+                try:
+                    await entry[0].acquire()
+                except BaseException:
+                    self._release_ref(key)
+                    raise
+                taken.append(key)
+
+            waited = time.monotonic() - start
+            self.acquired += 1
+            self.total_wait += waited
+            self.max_wait = max(self.max_wait, waited)
+            yield
+        finally:
+            for key in reversed(taken):
+                self.locks[key][0].release()
+                self._release_ref(key)
+
+    def _release_ref(self, key):
+        entry = self.locks[key]
+        entry[1] -= 1
+        if entry[1] == 0:
+            del self.locks[key]  # ✅ idle — don't keep a lock per player forever
+
+    def stats(self):
+        return {
+            "acquired": self.acquired,
+            "contended": self.contended,
+            "avg_wait_ms": (self.total_wait / self.acquired * 1000) if self.acquired else 0.0,
+            "max_wait_ms": self.max_wait * 1000,
+            "live_keys": len(self.locks),
+        }
+
+
+# ✅ Player-scoped critical sections (ELO commit, credit reward, bets, admin edits)
+player_locks = KeyedLocks("players")
 
 async def handle_bet(interaction, user_id, choice, amount, odds, game_id):
     # ✅ Deduct credits first
@@ -1156,9 +2086,8 @@ async def get_complete_user_data(user_id):
     res = await run_db(lambda: supabase.table("players").select("*").eq("id", str(user_id)).single().execute())
 
     if getattr(res, "error", None) or res.data is None:
-        defaults = default_template.copy()
-        defaults["id"] = str(user_id)
-        await run_db(lambda: supabase.table("players").insert(defaults).execute())
+        defaults = PlayerRecord(user_id).to_row()
+        await write_db("players", lambda: supabase.table("players").insert(defaults).execute())
         return defaults
 
     return res.data
@@ -1166,44 +2095,168 @@ async def get_complete_user_data(user_id):
 
 
 async def update_user_stat(user_id, key, value, mode="set", game_type=None):
-    res = await run_db(lambda: supabase.table("players").select("*").eq("id", str(user_id)).single().execute())
+    if game_type:
+        # ✅ Per-mode stats are patched server-side — no read-modify-write of the stats blob
+        patch = StatPatch(user_id)
+        if mode == "add":
+            patch.inc(f"{game_type}.{key}", value)
+        else:
+            patch.set(f"{game_type}.{key}", value)
+        await patch.apply()  # creates a missing row from defaults first
+        return
 
-    if res.data is None:
-        data = default_template.copy()
-        data["id"] = str(user_id)
-    else:
-        data = res.data
+    if key == "credits" and mode == "add":
+        await add_credits_atomic(user_id, value)
+        return
 
-    if game_type:
-        stats_branch = data.setdefault("stats", {}).setdefault(game_type, {})
-        if mode == "set":
-            stats_branch[key] = value
-        elif mode == "add":
-            stats_branch[key] = stats_branch.get(key, 0) + value
-    else:
-        if mode == "set":
-            data[key] = value
-        elif mode == "add":
-            data[key] = data.get(key, 0) + value
+    # ✅ Top-level column: version-checked write of just that column
+    def mutate(row):
+        return {key: row.get(key, 0) + value if mode == "add" else value}
+
+    await player_writer.modify(user_id, key, mutate, label="update_user_stat")
+
+
+
+class PlayerRepository:
+    """Projection-aware reads of the players table — callers only pay for the columns they use."""
+
+    @staticmethod
+    def game_column(game_type, field=None):
+        """PostgREST JSON-path projection, e.g. `singles:stats->singles` or `rank:stats->singles->rank`."""
+        if game_type not in PLAYER_GAME_TYPES:
+            raise ValueError(f"Unknown game type: {game_type}")
+        path = f"stats->{game_type}" + (f"->{field}" if field else "")
+        return f"{field or game_type}:{path}"
+
+    async def _one(self, user_id, columns):
+        res = await single_flight.run(("player_columns", str(user_id), columns), lambda: run_db(lambda: supabase
+            .table("players")
+            .select(columns)
+            .eq("id", str(user_id))
+            .limit(1)
+            .execute()
+        ))
+        return res.data[0] if res.data else None
+
+    async def credits(self, user_id, local=False) -> int:
+        """local=True: read-only callers may be served by the local replica."""
+        row = replica.player(user_id) if local and replica.ready else await self._one(user_id, "credits")
+        return int(row["credits"]) if row and row.get("credits") is not None else DEFAULT_CREDITS
+
+    async def profile(self, user_id, local=False) -> dict:
+        """Credits plus every game type's stats (no other columns)."""
+        if local and replica.ready:
+            return replica.player(user_id) or {}
+        return await self._one(user_id, "credits, stats") or {}
+
+    async def game_stats(self, user_id, game_type) -> dict:
+        row = await self._one(user_id, self.game_column(game_type))
+        return GameStats.from_dict((row or {}).get(game_type)).to_dict()
+
+    async def ranks(self, user_ids, game_type) -> list:
+        """One game type's rank for each id (same order), in a single query."""
+        if not user_ids:
+            return []
+        ids = [str(uid) for uid in user_ids]
+        res = await single_flight.run(("ranks", game_type, tuple(sorted(ids))), lambda: run_db(lambda: supabase
+            .table("players")
+            .select(f"id, {self.game_column(game_type, 'rank')}")
+            .in_("id", ids)
+            .execute()
+        ))
+        by_id = {row["id"]: row.get("rank") for row in res.data or []}
+        return [int(by_id.get(uid) or DEFAULT_RANK) for uid in ids]
+
+    async def leaderboard_rows(self, game_type):
+        """Stream `{id, credits, stats: {game_type: {...}}}` — just what a leaderboard renders."""
+        if replica.ready:
+            for row in replica.players():
+                yield {"id": row["id"], "credits": row.get("credits", 0), "stats": {game_type: row["stats"].get(game_type) or {}}}
+            return
+        async for row in scan_table("players", f"id, credits, {self.game_column(game_type)}"):
+            yield {"id": row["id"], "credits": row.get("credits", 0), "stats": {game_type: row.get(game_type) or {}}}
 
-    await save_player(user_id, data)
 
+player_repo = PlayerRepository()
 
 
 # Load ALL players as a dict
 # ✅ Safe get_player: always upsert if not exists
-async def get_player(user_id: int) -> dict:
-    # Safely select
-    res = await run_db(lambda: supabase.table("players").select("*").eq("id", str(user_id)).execute())
+async def get_player(user_id: int) -> PlayerRecord:
+    # ✅ Concurrent lookups of one id share a query (and never race to insert the same row);
+    #    lookups of different ids in the same tick are batched by player_loader
+    row = await single_flight.run(("player", str(user_id)), partial(player_loader.load, user_id))
+    return PlayerRecord.from_row(row)
+
+
+async def get_players(user_ids) -> list:
+    """PlayerRecords for several players (same order) — one round trip however many there are."""
+    return list(await asyncio.gather(*(get_player(uid) for uid in user_ids)))
 
-    if not res.data:  # If no player is found, return a default template
-        # No row found → create one
-        new_data = default_template.copy()
-        new_data["id"] = str(user_id)
-        await run_db(lambda: supabase.table("players").insert(new_data).execute())
-        return new_data
 
-    return res.data[0]  # Return the first player record found
+async def _create_players(user_ids) -> dict:
+    # No rows found → create them all from defaults in one write (skipping any created meanwhile)
+    new_rows = {str(uid): PlayerRecord(uid).to_row() for uid in user_ids}
+    await write_db("players", lambda: supabase
+        .table("players")
+        .upsert(list(new_rows.values()), on_conflict="id", ignore_duplicates=True)
+        .execute()
+    )
+    return new_rows
+
+
+class PlayerLoader:
+    """
+    DataLoader-style batching: every load() issued during one event-loop tick
+    is answered by a single `in_("id", [...])` query.
+    """
+
+    def __init__(self):
+        self.pending = {}  # id -> future waiting for the next batch
+        self.tasks = set()  # in-flight batches, referenced so they can't be garbage-collected
+        self.batches = 0
+        self.loaded = 0
+
+    def load(self, user_id):
+        uid = str(user_id)
+        future = self.pending.get(uid)
+        if future is None:
+            loop = asyncio.get_running_loop()
+            if not self.pending:
+                loop.call_soon(self._dispatch)  # runs once the current tick's callers have queued up
+            future = self.pending[uid] = loop.create_future()
+        return future
+
+    def _dispatch(self):
+        batch, self.pending = self.pending, {}
+        if batch:
+            task = asyncio.create_task(self._fetch(batch))
+            self.tasks.add(task)
+            task.add_done_callback(self.tasks.discard)
+
+    async def _fetch(self, batch):
+        self.batches += 1
+        self.loaded += len(batch)
+        try:
+            res = await run_db(lambda: supabase.table("players").select("*").in_("id", list(batch)).execute())
+            rows = {row["id"]: row for row in res.data or []}
+            missing = [uid for uid in batch if uid not in rows]
+            if missing:
+                rows.update(await _create_players(missing))
+            for uid, future in batch.items():
+                if not future.done():
+                    future.set_result(rows[uid])
+        except Exception as e:
+            print(f"[PlayerLoader] ❌ Batch of {len(batch)} failed: {e}")
+            for future in batch.values():
+                if not future.done():
+                    future.set_exception(e)
+
+    def avg_batch(self):
+        return self.loaded / self.batches if self.batches else 0.0
+
+
+player_loader = PlayerLoader()
 
 
 def calculate_elo(elo1, elo2, result):
@@ -1215,10 +2268,11 @@ def player_display(user_id, data):
     return f"<@{user_id}> | Rank: {player['rank']} | Trophies: {player['trophies']}"
 
 async def start_new_game_button(channel, game_type, max_players=None):
-    key = (channel.id, game_type)
+    # ✅ Remember the channel so lifecycle events keep its button alive
+    start_button_manager.homes.setdefault((channel.id, game_type), max_players)
 
     # ✅ 1) Clean up old button message
-    old = start_buttons.get(key)
+    old = registry.pop_button(channel.id, game_type)
     if old:
         try:
             await old.delete()
@@ -1238,13 +2292,65 @@ async def start_new_game_button(channel, game_type, max_players=None):
         msg = await channel.send(f"🎮 Start a new {game_type} game:", view=view)
 
     # ✅ 4) Store only the message — not the view itself
-    start_buttons[key] = msg
+    registry.add_button(channel.id, game_type, msg)
 
     print(f"✅ New start button posted for {game_type} in #{channel.name}")
 
     return msg
 
 
+class StartButtonManager:
+    """Keeps one start button per (channel, game type) in step with lobby lifecycle events."""
+
+    def __init__(self, channel_game_map):
+        # (channel_id, game_type) -> max_players for every channel that hosts a start button
+        self.homes = {(cid, gt): size for cid, (gt, size) in channel_game_map.items()}
+        self.locks = defaultdict(asyncio.Lock)
+
+    def wants_button(self, channel_id, game_type):
+        if game_type == "tournament":
+            manager = registry.tournament(channel_id)
+            return manager is None or manager.started
+        return len(registry.lobbies(game_type, channel_id)) < MAX_LOBBIES_PER_CHANNEL
+
+    def is_in_sync(self, channel_id, game_type):
+        return self.wants_button(channel_id, game_type) == bool(registry.button(channel_id, game_type))
+
+    async def sync(self, channel, game_type):
+        """Post or remove the channel's start button so it matches the current lobby state."""
+        key = (channel.id, game_type)
+        if key not in self.homes:
+            return  # e.g. the hourly channel — never hosts a start button
+
+        async with self.locks[key]:
+            if self.is_in_sync(channel.id, game_type):
+                return
+            if self.wants_button(channel.id, game_type):
+                await start_new_game_button(channel, game_type, self.homes[key])
+            else:
+                old = registry.pop_button(channel.id, game_type)
+                try:
+                    await old.delete()
+                except Exception:
+                    pass
+                print(f"[StartButtons] ⏸️ Removed {game_type} button in #{channel.name} — lobby cap reached.")
+
+    async def on_message_deleted(self, channel_id, message_id):
+        entry_key = registry.by_message.get(message_id)
+        if not entry_key or entry_key[0] != "button":
+            return
+        game_type = entry_key[2]
+        registry.pop_button(channel_id, game_type)
+        print(f"[StartButtons] 🗑️ {game_type} button deleted in {channel_id} — restoring.")
+
+        channel = bot.get_channel(channel_id)
+        if channel:
+            await self.sync(channel, game_type)
+
+
+start_button_manager = StartButtonManager(CHANNEL_GAME_MAP)
+
+
 def fixed_width_name(name: str, width: int = 20) -> str:
     """Truncate or pad name to exactly `width` characters."""
     name = name.strip()
@@ -1253,9 +2359,13 @@ def fixed_width_name(name: str, width: int = 20) -> str:
     return name.ljust(width)
 
 
+ACTIVATION_BATCH_WINDOW = 0.25  # seconds of join burst collapsed into one active_players upsert
+
+
 class PlayerManager:
     def __init__(self):
-        pass
+        self._pending_activations = {}  # player_id -> thread_id
+        self._activation_flush = None
 
     async def is_active(self, user_id: str | int) -> bool:
         user_id = str(user_id)
@@ -1288,6 +2398,29 @@ class PlayerManager:
         except Exception as e:
             print(f"[PlayerManager.activate] Failed to activate {user_id}: {e}")
 
+    async def activate_batched(self, user_id: str | int, thread_id: str | int = None):
+        """Queue an activation; everything queued within the batch window is written in one upsert."""
+        self._pending_activations[str(user_id)] = str(thread_id) if thread_id else None
+        if self._activation_flush is None:
+            self._activation_flush = asyncio.create_task(self._flush_activations())
+        await asyncio.shield(self._activation_flush)
+
+    async def _flush_activations(self):
+        await asyncio.sleep(ACTIVATION_BATCH_WINDOW)
+        batch, self._pending_activations = self._pending_activations, {}
+        self._activation_flush = None
+
+        rows = [{"player_id": pid, "thread_id": tid} for pid, tid in batch.items()]
+        try:
+            await run_db(lambda: supabase
+                .table("active_players")
+                .upsert(rows)
+                .execute()
+            )
+            print(f"[PlayerManager.activate_batched] Activated {len(rows)} players in one write")
+        except Exception as e:
+            print(f"[PlayerManager.activate_batched] Failed to activate {list(batch)}: {e}")
+
     async def deactivate(self, user_id: str | int):
         user_id = str(user_id)
         try:
@@ -1301,6 +2434,18 @@ class PlayerManager:
         except Exception as e:
             print(f"[PlayerManager.deactivate] Failed to deactivate {user_id}: {e}")
 
+    async def assign_thread(self, user_ids, thread_id: str | int):
+        """Point players' active rows at their room thread (one upsert), so deactivate_by_thread finds them."""
+        rows = [{"player_id": str(uid), "thread_id": str(thread_id)} for uid in user_ids]
+        try:
+            await run_db(lambda: supabase
+                .table("active_players")
+                .upsert(rows)
+                .execute()
+            )
+        except Exception as e:
+            print(f"[PlayerManager] ❌ Failed to assign {len(rows)} players to thread {thread_id}: {e}")
+
     async def deactivate_by_thread(self, thread_id: str | int):
         thread_id = str(thread_id)
         try:
@@ -1381,6 +2526,112 @@ class RoomNameGenerator:
 room_name_generator = RoomNameGenerator()
 
 
+THREAD_POOL_SIZE = int(os.getenv("THREAD_POOL_SIZE", "0"))  # standby threads per lobby channel, 0 = off
+THREAD_POOL_QUIET_SECONDS = 90  # only replenish when no thread was handed out for this long
+STANDBY_THREAD_PREFIX = "standby-"
+
+
+class MatchThreadPool:
+    """Pre-created, archived private threads per lobby channel.
+
+    Creating a private thread is the slowest and most rate-limited call in a
+    match start. acquire() renames and unarchives a standby thread instead and
+    only falls back to create_thread when the pool is empty or disabled.
+    """
+
+    def __init__(self, size=THREAD_POOL_SIZE):
+        self.size = size
+        self.pools = defaultdict(list)  # channel_id -> [discord.Thread]
+        self.channel_ids = set(CHANNEL_GAME_MAP)
+        self.adopted = set()
+        self.last_acquire = 0.0
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def enabled(self):
+        return self.size > 0
+
+    async def acquire(self, channel, name):
+        self.last_acquire = time.monotonic()
+        self.channel_ids.add(channel.id)
+
+        pool = self.pools.get(channel.id) or []
+        while self.enabled and pool:
+            standby = pool.pop()
+            try:
+                thread = await standby.edit(name=name, archived=False, locked=False)
+                self.hits += 1
+                print(f"[ThreadPool] ✅ Reused standby thread for {name} in #{channel.name} ({len(pool)} left)")
+                return thread
+            except discord.NotFound:
+                print(f"[ThreadPool] ⚠️ Standby thread {standby.id} is gone — trying next.")
+            except discord.HTTPException as e:
+                print(f"[ThreadPool] ⚠️ Failed to reuse standby thread {standby.id}: {e}")
+
+        if self.enabled:
+            self.misses += 1
+            print(f"[ThreadPool] ⏳ Pool empty in #{channel.name} — creating thread {name}")
+
+        async with outbound.slot(PRIORITY_GAME):
+            return await channel.create_thread(
+                name=name,
+                type=discord.ChannelType.private_thread,
+                invitable=False
+            )
+
+    async def adopt(self, channel):
+        """Reclaim standby threads left behind by a previous run."""
+        if channel.id in self.adopted:
+            return
+        self.adopted.add(channel.id)
+
+        pool = self.pools[channel.id]
+        known = {t.id for t in pool}
+        try:
+            async for thread in channel.archived_threads(private=True, joined=True, limit=None):
+                if len(pool) >= self.size:
+                    break
+                if thread.name.startswith(STANDBY_THREAD_PREFIX) and thread.id not in known:
+                    pool.append(thread)
+        except discord.HTTPException as e:
+            print(f"[ThreadPool] ⚠️ Could not list archived threads in #{channel.name}: {e}")
+
+    async def replenish(self, channel):
+        pool = self.pools[channel.id]
+        while len(pool) < self.size:
+            # ✅ Back off while matches are starting — the pool refills during quiet periods
+            if time.monotonic() - self.last_acquire < THREAD_POOL_QUIET_SECONDS:
+                return
+
+            async with outbound.slot(PRIORITY_COSMETIC):
+                thread = await channel.create_thread(
+                    name=f"{STANDBY_THREAD_PREFIX}{uuid.uuid4().hex[:8]}",
+                    type=discord.ChannelType.private_thread,
+                    invitable=False
+                )
+                thread = await thread.edit(archived=True)
+            pool.append(thread)
+            print(f"[ThreadPool] ➕ Standby thread ready in #{channel.name} ({len(pool)}/{self.size})")
+
+    async def replenish_all(self, bot):
+        if not self.enabled:
+            return
+
+        for channel_id in list(self.channel_ids):
+            channel = bot.get_channel(channel_id)
+            if not isinstance(channel, discord.TextChannel):
+                continue
+            try:
+                await self.adopt(channel)
+                await self.replenish(channel)
+            except discord.HTTPException as e:
+                print(f"[ThreadPool] ❌ Failed to replenish #{channel.name}: {e}")
+
+
+thread_pool = MatchThreadPool()
+
+
 class GameJoinView(discord.ui.View):
     def __init__(self, game_type, max_players, scheduled_note=None, scheduled_time=None, is_hourly=False):
         super().__init__(timeout=None)
@@ -1401,16 +2652,16 @@ class GameJoinView(discord.ui.View):
     async def start_game(self, interaction: discord.Interaction):
         await interaction.response.defer(ephemeral=True)
 
-        # ✅ Block duplicate games of same type
-        if pending_games.get((self.game_type, interaction.channel.id)):
+        # ✅ Cheap early refusal; the cap is enforced again right where the slot is claimed
+        if len(registry.lobbies(self.game_type, interaction.channel.id)) >= MAX_LOBBIES_PER_CHANNEL:
             await interaction.followup.send(
-                "⚠️ A game of this type is already pending.",
+                f"⚠️ This channel already has {MAX_LOBBIES_PER_CHANNEL} open {self.game_type} lobbies — join one of those.",
                 ephemeral=True
             )
             return
 
         # ✅ Block ANY other active game (cross-lobby)
-        if await player_manager.is_active(interaction.user.id):
+        if registry.for_player(interaction.user.id) or await player_manager.is_active(interaction.user.id):
             await interaction.followup.send(
                 "🚫 You are already in another game or must finish voting first.",
                 ephemeral=True
@@ -1418,6 +2669,7 @@ class GameJoinView(discord.ui.View):
             return
 
         # ✅ Delete old start button
+        registry.pop_button(interaction.channel.id, self.game_type)
         try:
             await interaction.message.delete()
         except:
@@ -1432,6 +2684,14 @@ class GameJoinView(discord.ui.View):
             scheduled_note=self.scheduled_note,
             scheduled_time = self.scheduled_time 
         )
+        # ✅ Re-check and claim with no await in between — the awaits above let other starts in
+        if len(registry.lobbies(self.game_type, interaction.channel.id)) >= MAX_LOBBIES_PER_CHANNEL:
+            await interaction.followup.send(
+                f"⚠️ This channel already has {MAX_LOBBIES_PER_CHANNEL} open {self.game_type} lobbies — join one of those.",
+                ephemeral=True
+            )
+            return
+        registry.add_lobby(view)
 
         await player_manager.activate(interaction.user.id, interaction.channel.id)
 
@@ -1449,14 +2709,18 @@ class GameJoinView(discord.ui.View):
         image_embed.set_image(url="https://cdn.discordapp.com/attachments/1378860910310854666/1399365960195903639/new_game_logo.png")
 
         view.message = await interaction.channel.send(embeds=[image_embed, embed], view=view)
-        #channel_id = self.channel.id if self.channel else self.message.channel.id
-        channel_id = view.channel.id if view.channel else view.message.channel.id
-        pending_games.pop((self.game_type, channel_id), None)
+        registry.refresh(view)
 
         # ✅ If full immediately → auto start
         if len(view.players) == view.max_players:
             await view.game_full(interaction)
         else:
+            # ✅ Each lobby expires on its own timer
+            view.abandon_task = asyncio.create_task(view.auto_abandon_after(LOBBY_ABANDON_SECONDS))
+
+            # ✅ Keep a start button under the lobbies while there's room for another
+            await start_button_manager.sync(interaction.channel, self.game_type)
+
             await send_global_notification(
                 self.game_type,
                 view.message.jump_url,
@@ -1531,6 +2795,7 @@ class LeaveGameButton(discord.ui.Button):
                 self.game_view.manager.players.remove(uid)
         except ValueError:
             pass  # Already removed
+        registry.refresh(getattr(self.game_view, "manager", self.game_view))
 
         await player_manager.deactivate(uid)
 
@@ -1638,27 +2903,35 @@ class BetModal(discord.ui.Modal, title="Place Your Bet"):
             odds = await odds_provider.get_odds(choice)
             payout = max(1, int(amount / odds)) if odds > 0 else amount
 
-            # ✅ Deduct credits
-            success = await deduct_credits_atomic(user_id, amount)
-            if not success:
-                await interaction.response.send_message("❌ Not enough credits to place this bet.", ephemeral=True)
-                return
-
-            # ✅ Insert into database
-            await run_db(lambda: supabase
-                .table("bets")
-                .insert({
-                    "player_id": str(user_id),
-                    "game_id": self.game_view.message.id,
-                    "choice": choice,
-                    "amount": amount,
-                    "payout": payout,
-                    "won": None
-                }).execute()
-            )
+            # ✅ Deduct + record under the bettor's lock (released before add_bet, which waits on the game actor)
+            async with player_locks.hold(user_id):
+                success = await deduct_credits_atomic(user_id, amount)
+                if not success:
+                    await interaction.response.send_message("❌ Not enough credits to place this bet.", ephemeral=True)
+                    return
+
+                inserted = await run_db(lambda: supabase
+                    .table("bets")
+                    .insert({
+                        "player_id": str(user_id),
+                        "game_id": self.game_view.message.id,
+                        "choice": choice,
+                        "amount": amount,
+                        "payout": payout,
+                        "won": None
+                    }).execute()
+                )
 
-            # ✅ Register live bet in memory
-            await self.game_view.add_bet(user_id, interaction.user.display_name, amount, choice, interaction)
+            # ✅ Register live bet in memory; add_bet has already told the user if it was refused
+            accepted = await self.game_view.add_bet(user_id, interaction.user.display_name, amount, choice, interaction)
+            if not accepted:
+                async with player_locks.hold(user_id):
+                    await add_credits_atomic(user_id, amount)  # refund
+                    bet_ids = [row["id"] for row in inserted.data or []]
+                    if bet_ids:
+                        await run_db(lambda: supabase.table("bets").delete().in_("id", bet_ids).execute())
+                print(f"[BET] ↩️ Bet by {user_id} refused — refunded {amount}")
+                return
 
             # ✅ Attempt to resolve choice to a display name
             guild = self.game_view.message.guild if self.game_view.message else None
@@ -1714,8 +2987,7 @@ class BetDropdown(discord.ui.Select):
         options = []
 
         if game_type == "singles" and len(players) >= 2:
-            ranks = [await get_player(p) for p in players]
-            e1, e2 = [p.get("rank", 1000) for p in ranks]
+            e1, e2 = await player_repo.ranks(players[:2], game_type)
             p1_odds = 1 / (1 + 10 ** ((e2 - e1) / 400))
             p2_odds = 1 - p1_odds
 
@@ -1728,9 +3000,9 @@ class BetDropdown(discord.ui.Select):
                 ))
 
         elif game_type == "doubles" and len(players) >= 4:
-            ranks = [await get_player(p) for p in players]
-            team1 = sum([p.get("rank", 1000) for p in ranks[:2]]) / 2
-            team2 = sum([p.get("rank", 1000) for p in ranks[2:]]) / 2
+            ranks = await player_repo.ranks(players, game_type)
+            team1 = sum(ranks[:2]) / 2
+            team2 = sum(ranks[2:]) / 2
             a_odds = 1 / (1 + 10 ** ((team2 - team1) / 400))
             b_odds = 1 - a_odds
 
@@ -1740,8 +3012,8 @@ class BetDropdown(discord.ui.Select):
             ])
 
         elif game_type == "triples" and len(players) >= 3:
-            ranks = [await get_player(p) for p in players]
-            exp = [10 ** (p.get("rank", 1000) / 400) for p in ranks]
+            ranks = await player_repo.ranks(players, game_type)
+            exp = [10 ** (r / 400) for r in ranks]
             total = sum(exp)
             odds = [v / total for v in exp]
 
@@ -1753,12 +3025,23 @@ class BetDropdown(discord.ui.Select):
                     label=f"{name} ({o * 100:.1f}%)", value=str(i)
                 ))
         elif game_type == "tournament":
+            tournament = getattr(self.game_view, "manager", None)
+            champion_odds = tournament.champion_odds if tournament else {}
+
             for i, player_id in enumerate(players, start=1):
                 member = guild.get_member(player_id) if guild else None
                 name = member.display_name if member else f"Player {i}"
                 name = fixed_width_name(name)
+
+                label = name
+                if champion_odds:
+                    odds = champion_odds.get(player_id, 0.0)
+                    if odds <= 0:
+                        continue  # ✅ eliminated
+                    label = f"{name} ({odds * 100:.1f}%)"
+
                 options.append(discord.SelectOption(
-                    label=name,
+                    label=label,
                     value=str(player_id)  # ✅ use raw ID as the value!
                 ))
 
@@ -1791,6 +3074,196 @@ class BetDropdown(discord.ui.Select):
 
 
 
+async def apply_game_ratings(game_id, game_type, players, winner, is_tournament=False, channel=None):
+    """
+    ELO, stats and the play-credit counter for one finished game, written by one
+    apply_game_patches call: all players or none, and never twice for the same game_id.
+    Callers hold player_locks and have recorded the game_results row.
+    """
+    await get_players(players)  # ✅ make sure every row exists; the RPC refuses missing players
+
+    if winner == "draw":
+        patches = [
+            StatPatch(p)
+                .inc(f"{game_type}.draws")
+                .inc(f"{game_type}.games_played")
+                .set(f"{game_type}.current_streak", 0)
+            for p in players
+        ]
+    elif is_tournament:
+        patches = await elo_series_patches(
+            players[0],
+            players[1],
+            results=[1 if players[0] == winner else 2],
+            game_type="tournament"
+        )
+    elif game_type == "singles":
+        patches = await elo_pair_patches(
+            players[0],
+            players[1],
+            winner=1 if players[0] == winner else 2
+        )
+    elif game_type == "doubles":
+        patches = await elo_doubles_patches(players[:2], players[2:], winner=normalize_team(winner))
+    elif game_type == "triples":
+        patches = await elo_triples_patches(players, winner)
+    else:
+        patches = [StatPatch(p) for p in players]
+
+    res = await run_db(lambda: supabase.rpc("apply_game_patches", {
+        "p_game_id": game_id,
+        "p_patches": [{"player_id": patch.player_id, "ops": patch.ops} for patch in patches],
+        "p_every": GAMES_PER_CREDIT_REWARD,
+        "p_credits": CREDIT_REWARD,
+    }).execute())
+
+    if not res.data["applied"]:
+        print(f"[ELO] ⏭️ Ratings for game {game_id} were already applied")
+        return
+
+    # ✅ Handle credit reward for playing 10 games (global counter)
+    for player in res.data["players"]:
+        replica.set_stats(player["player_id"], player["stats"])
+        if player["paid"]:
+            replica.apply("players", [{"id": player["player_id"], "credits": player["credits"]}])
+            if channel:
+                broadcaster.post(channel, content=f"💸 <@{player['player_id']}> played {GAMES_PER_CREDIT_REWARD} games and earned **+{CREDIT_REWARD} credits!**")
+
+
+# ✅ game_results: the durable record of a finished game until its ratings and bets are done
+
+async def record_game_result(game_id, game_type, players, winner, is_tournament, payouts):
+    await run_db(lambda: supabase.table("game_results").upsert({
+        "game_id": game_id,
+        "game_type": game_type,
+        "players": [int(p) for p in players],
+        "winner": winner,
+        "is_tournament": bool(is_tournament),
+        "payouts": payouts,
+    }).execute())
+
+
+async def update_game_result(game_id, **fields):
+    await run_db(lambda: supabase.table("game_results").update(fields).eq("game_id", game_id).execute())
+
+
+async def settle_payouts(game_id, payouts):
+    """
+    Pay out (or refund) each planned bet once. settle_bet marks the bets row settled and
+    credits the player in one transaction, and only on the unsettled → settled transition,
+    so running this again after any failure never pays a bet twice.
+    """
+    for bet in payouts:
+        res = await run_db(lambda: supabase.rpc("settle_bet", {
+            "p_game_id": str(game_id),
+            "p_player_id": str(bet["player_id"]),
+            "p_choice": str(bet["choice"]),
+            "p_amount": int(bet["amount"]),
+            "p_won": bet["won"],
+            "p_credit": int(bet["payout"]),
+        }).execute())
+
+        if res.data is None:
+            continue  # ✅ already settled by an earlier attempt
+        if bet["payout"]:
+            replica.apply("players", [{"id": bet["player_id"], "credits": res.data}])
+
+        if bet["won"] is None:
+            print(f"↩️ Refunded {bet['amount']} to {bet['uname']} (DRAW)")
+        elif bet["won"]:
+            print(f"⭐ {bet['uname']} won! Payout: {bet['payout']}")
+        else:
+            print(f"❌ {bet['uname']} lost {bet['amount']}")
+
+
+async def finish_game_result(row, channel=None):
+    """Run whatever a game_results row still owes: ratings first, then bets, then mark it done."""
+    game_id = row["game_id"]
+    players = [int(p) for p in row["players"]]
+    if not row["ratings_applied"]:
+        async with player_locks.hold(*players):
+            await apply_game_ratings(game_id, row["game_type"], players, row["winner"], row["is_tournament"], channel)
+    await settle_payouts(game_id, row["payouts"])
+    await update_game_result(game_id, completed=True)
+
+
+async def resume_game_results():
+    """Pick up games whose finalize was interrupted by a crash, restart or failed rating write."""
+    rows = [
+        row async for row in scan_table(
+            "game_results", key="game_id", where=lambda q: q.eq("completed", False)
+        )
+    ]
+    for row in rows:
+        try:
+            await finish_game_result(row)
+            print(f"[Results] ✅ Resumed finalize for game {row['game_id']}")
+        except Exception as e:
+            print(f"[Results] ❌ Could not resume game {row['game_id']}: {e}")
+
+
+# ✅ Post-game follow-up runs in the background once the result is committed
+FINALIZE_STAGE_RETRIES = 3
+FINALIZE_STAGE_BACKOFF = 2  # seconds, doubled per attempt
+FINALIZE_TIMING_SAMPLES = 100
+
+
+class PostGamePipeline:
+    """
+    Ordered, retryable stages run after a game's result is committed.
+    A stage that succeeded is never run again, so the pipeline can be restarted safely;
+    a stage that keeps failing is logged and skipped without holding up the rest.
+    """
+
+    timings = defaultdict(lambda: deque(maxlen=FINALIZE_TIMING_SAMPLES))  # stage -> recent ms
+    failures = Counter()
+
+    def __init__(self, name, stages):
+        self.name = name
+        self.stages = stages  # [(stage_name, async callable)]
+        self.done = set()
+        self.task = None
+
+    def start(self):
+        if not self.task or self.task.done():
+            self.task = asyncio.create_task(self.run())
+        return self.task
+
+    async def run(self):
+        for stage, fn in self.stages:
+            if stage in self.done:
+                continue
+            for attempt in range(FINALIZE_STAGE_RETRIES):
+                started = time.perf_counter()
+                try:
+                    await fn()
+                except Exception as e:
+                    self.failures[stage] += 1
+                    print(f"[Pipeline] ⚠️ {self.name}/{stage} attempt {attempt + 1} failed: {e}")
+                    await asyncio.sleep(FINALIZE_STAGE_BACKOFF * 2 ** attempt)
+                    continue
+                elapsed_ms = (time.perf_counter() - started) * 1000
+                self.timings[stage].append(elapsed_ms)
+                self.done.add(stage)
+                print(f"[Pipeline] ✅ {self.name}/{stage} in {elapsed_ms:.0f}ms")
+                break
+            else:
+                print(f"[Pipeline] ❌ {self.name}/{stage} gave up after {FINALIZE_STAGE_RETRIES} attempts")
+        return self.done
+
+    @classmethod
+    def stats(cls):
+        return {
+            stage: {
+                "runs": len(samples),
+                "avg_ms": sum(samples) / len(samples),
+                "max_ms": max(samples),
+                "failures": cls.failures[stage],
+            }
+            for stage, samples in cls.timings.items() if samples
+        }
+
+
 class RoomView(discord.ui.View):
     def __init__(self, bot, guild, players, game_type, room_name, channel=None, lobby_message=None, lobby_embed=None, game_view=None, course_name=None, course_id=None, max_players=2, is_hourly=False, is_tournament=False):
         super().__init__(timeout=None)
@@ -1805,11 +3278,14 @@ class RoomView(discord.ui.View):
         #self.channel = self.message.channel if self.message else None
         self.lobby_embed = lobby_embed
         self.game_view = game_view
+        # ✅ A room shares its lobby's actor so join/bet/vote/finalize for one game never interleave
+        self.actor = getattr(game_view, "actor", None) or GameActor(f"room-{room_name}")
         self.max_players = max_players  # ✅ store it!
         self.betting_task = None
         self.betting_closed = False
         self.is_hourly = is_hourly
         self.is_tournament=is_tournament
+        self.stats_type = "tournament" if is_tournament else game_type  # where ELO records this match
         self.original_players = list(self.players)
         # ✅ Store course_name robustly:
         self.course_name = course_name or getattr(game_view, "course_name", None)
@@ -1821,6 +3297,12 @@ class RoomView(discord.ui.View):
         self.voting_closed = False
         self.add_item(GameEndedButton(self))
         self.on_tournament_complete = None
+        self.result_id = None
+        self.payouts = []  # planned bet settlements, persisted in game_results
+        self.bets_settled = False
+        self.result_recorded = False
+        self.ratings_applied = False
+        self.post_game = None
 
 
     async def update_message(self, status=None):
@@ -1829,7 +3311,8 @@ class RoomView(discord.ui.View):
             return
 
         embed = await self.build_room_embed(status=status)
-        await self.message.edit(embed=embed, view=self)
+        async with outbound.slot(PRIORITY_GAME):
+            await self.message.edit(embed=embed, view=self)
 
     def cancel_abandon_task(self):
         if hasattr(self, "abandon_task") and self.abandon_task:
@@ -1857,10 +3340,8 @@ class RoomView(discord.ui.View):
         # ✅ 2️⃣ Build detailed player lines
         player_lines = []
 
-        ranks = []
-        for p in self.players:
-            pdata = await get_player(p)
-            ranks.append(pdata.get("rank", 1000))
+        player_rows = await get_players(self.players)  # one fetch for odds and the player lines
+        ranks = [record.stats(self.stats_type).rank for record in player_rows]
 
         # --- Compute odds ---
         odds = []
@@ -1899,9 +3380,8 @@ class RoomView(discord.ui.View):
                 raw_name = member.display_name if member else f"Player {idx + 1}"
                 name = f"**{fixed_width_name(raw_name, 20)}**"
 
-                # ✅ Fetch player stats for wins
-                pdata = await get_player(user_id)
-                wins = pdata.get("wins", 0)
+                # ✅ Player stats for wins (batched above)
+                wins = player_rows[idx].stats(self.stats_type).wins
 
                 hcp_txt = ""
                 if hasattr(self, "course_id") and self.course_id:
@@ -1960,10 +3440,9 @@ class RoomView(discord.ui.View):
         )
 
         lines = []
+        player_rows = await get_players(self.players)
         for idx, p in enumerate(self.players):
-            pdata = await get_player(p)
-            rank = pdata.get('rank', 1000)
-            trophies = pdata.get('trophies', 0)
+            stats = player_rows[idx].stats(self.stats_type)
 
             # ✅ Fully safe handicap lookup:
             hcp_txt = ""
@@ -1974,8 +3453,7 @@ class RoomView(discord.ui.View):
                 except Exception as e:
                     print(f"[RoomView] ⚠️ Handicap fetch failed for {p}: {e}")
 
-            wins = pdata.get("wins", 0)
-            lines.append(f"● Player {idx + 1}: <@{p}> 🏆 ({wins}) • {hcp_txt}")
+            lines.append(f"● Player {idx + 1}: <@{p}> 🏆 ({stats.wins}) • {hcp_txt}")
 
 
         if winner == "draw":
@@ -1986,8 +3464,7 @@ class RoomView(discord.ui.View):
             name = fixed_width_name(name)
 
             # ✅ Get wins from stats
-            pdata = await get_player(winner)
-            wins = pdata.get("wins", 0)
+            wins = (await get_player(winner)).stats(self.stats_type).wins
 
             embed.add_field(name="🏁 Winner", value=f"🎉 {name} ({wins} wins)", inline=False)
         elif winner in ("Team A", "Team B"):
@@ -2013,8 +3490,6 @@ class RoomView(discord.ui.View):
         if not self.game_has_ended:
             return
 
-        pending_games.pop((self.game_type, self.channel.id), None)
-
         self.clear_items()
         options = self.get_vote_options()
 
@@ -2077,6 +3552,10 @@ class RoomView(discord.ui.View):
             print(f"[safe_edit_message] ⚠️ Failed to edit message: {e}")
 
     async def finalize_game(self, winner=None):
+        # ✅ Timers and votes both land here; block rather than drop the result
+        await self.actor.call(self._finalize_game, winner, block=True)
+
+    async def _finalize_game(self, winner=None):
         if getattr(self, "has_finalized", False):
             print("[Voting] ⏭️ Already finalized. Skipping.")
             return
@@ -2092,6 +3571,8 @@ class RoomView(discord.ui.View):
 
         self.game_has_ended = True
         self.voting_closed = True
+        if self.channel:
+            registry.remove_room(self.channel.id)
 
         # ✅ TEST MODE: force winner if passed
         if IS_TEST_MODE and winner is not None:
@@ -2123,244 +3604,211 @@ class RoomView(discord.ui.View):
             print(f"[Voting] ⚠️ Invalid winner value: {winner} — forcing draw.")
             winner = "draw"
 
-        # ✅ Draw flow
-        if winner == "draw":
-            for p in self.players:
-                pdata = await get_player(p)
-                pdata["draws"] += 1
-                pdata["games_played"] += 1
-                pdata["current_streak"] = 0
-
-                # 🎁 CREDIT REWARD LOGIC
-                stats = pdata.get("stats", {})
-                stats["games_since_credit"] = stats.get("games_since_credit", 0) + 1
-                if stats["games_since_credit"] >= 10:
-                    stats["games_since_credit"] = 0
-                    pdata["credits"] = pdata.get("credits", 0) + 100
-                    await self.channel.send(f"💸 <@{p}> played 10 games and earned **+100 credits!**")
-                pdata["stats"] = stats
-
-                await save_player(p, pdata)
-
-            if self.game_view:
-                for uid, uname, amount, choice in self.game_view.bets:
-                    await add_credits_atomic(uid, amount)
-                    await run_db(lambda: supabase
-                        .table("bets")
-                        .update({"won": None})
-                        .eq("player_id", uid)
-                        .eq("game_id", self.game_view.message.id)
-                        .eq("choice", choice)
-                        .execute()
-                    )
-                    print(f"↩️ Refunded {amount} to {uname} (DRAW)")
+        # ✅ Critical path: ratings + result. Everything else is follow-up work.
+        commit_started = time.perf_counter()
+        normalized_winner = normalize_team(winner) if self.game_type == "doubles" else winner
+        self.result_id = self.bets_game_id()
+        self.payouts = await self.plan_payouts(winner, normalized_winner)
 
-            try:
-                embed = await self.build_lobby_end_embed(winner)
-                await safe_edit_message(self.message, embed=embed, view=None)
-            except Exception as e:
-                print(f"[finalize_game] ❌ Failed to edit main message: {e}")
-
-
-            if self.lobby_message and self.game_view:
-                lobby_embed = await self.game_view.build_embed(
-                    self.lobby_message.guild, winner=winner, no_image=True
-                )
-                embeds = [lobby_embed]
-                if getattr(self.game_view, "image_embed", None):
-                    embeds.insert(0, self.game_view.image_embed)
-
-                await self.lobby_message.edit(embeds=embeds, view=None)
-
-            await self.channel.send("🤝 Voting ended in a **draw** — all bets refunded.")
-            try:
-                await self.channel.edit(archived=True)
-            except Exception as e:
-                print(f"[finalize_game] ⚠️ Failed to archive thread: {e}")
-
-            pending_games.pop((self.game_type, self.channel.id), None)
+        # ✅ Result row first (the ratings RPC is keyed on it), then ratings + credit reward,
+        #    all players locked in id order. A failure here is retried by the "ratings" stage.
+        self.ratings_applied = False
+        print("[DEBUG] is_tournament:", getattr(self, "is_tournament", False))
+        try:
+            await self.apply_ratings(winner)
+        except Exception as e:
+            # ✅ The game still ends; the ratings stage (or the next restart) retries it
+            print(f"[finalize_game] ❌ Failed ELO update: {e}")
+
+        # ✅ The game is over for good — don't restore it after a restart
+        await self.clear_active_game()
+        print(f"[FINALIZE] ✅ Result committed in {(time.perf_counter() - commit_started) * 1000:.0f}ms")
+
+        # ✅ Normalize winner for embed/footer/tournament
+        voted_winner = winner
+        if isinstance(winner, str) and winner.isdigit():
+            idx = int(winner) - 1
+            if 0 <= idx < len(self.players):
+                winner = self.players[idx]
+
+        stages = []
+        if not self.ratings_applied:
+            stages.append(("ratings", partial(self.apply_ratings, voted_winner)))
+        stages.append(("settle_bets", self.settle_bets))
+        if winner == "draw":
+            stages += [
+                ("end_embeds", partial(self.post_end_embeds, winner)),
+                ("announce", partial(self.announce, "🤝 Voting ended in a **draw** — all bets refunded.")),
+                ("archive", partial(self.archive_thread, 0)),
+            ]
         else:
-            # ✅ Normalize for ELO/bets
-            normalized_winner = normalize_team(winner) if self.game_type == "doubles" else winner
-            print("[DEBUG] is_tournament:", getattr(self, "is_tournament", False))
+            stages += [
+                ("end_embeds", partial(self.post_end_embeds, winner)),
+                ("announce", partial(self.announce, f"🏁 Voting ended. Winner: **{self.winner_name(winner)}**")),
+                ("archive", partial(self.archive_thread, 3)),
+            ]
+            if self.is_hourly:
+                stages.append(("hourly_bonus", partial(self.award_hourly_bonus, winner)))
+            stages.append(("leaderboard", partial(update_leaderboard, self.bot, self.game_type)))
+        stages.append(("forget_players", self.forget_players))
+        stages.append(("complete", self.complete_result))
 
-            try:
-                if getattr(self, "is_tournament", False):
-                    await update_elo_series_and_save(
-                        self.players[0],
-                        self.players[1],
-                        results=[1 if self.players[0] == winner else 2],
-                        game_type="tournament"
-                    )
-                elif self.game_type == "singles":
-                    await update_elo_pair_and_save(
-                        self.players[0],
-                        self.players[1],
-                        winner=1 if self.players[0] == winner else 2
-                    )
-                elif self.game_type == "doubles":
-                    await update_elo_doubles_and_save(
-                        self.players[:2], self.players[2:], winner=normalized_winner
-                    )
-                elif self.game_type == "triples":
-                    await update_elo_triples_and_save(self.players, winner)
-            except Exception as e:
-                print(f"[finalize_game] ❌ Failed ELO update: {e}")
-                return
+        self.post_game = PostGamePipeline(f"room-{self.room_name}", stages)
+        self.post_game.start()
 
+        # ✅ Release: only waits on the commit, not on the post-game pipeline
+        if hasattr(self, "vote_timeout") and self.vote_timeout:
+            self.vote_timeout.cancel()
+            self.vote_timeout = None
 
-            # ✅ Handle credit reward for playing 10 games (global counter)
-            for p in self.players:
-                pdata = await get_player(p)
-                stats = pdata.get("stats", {})
+        print("[FINALIZE] 🔻 Deactivating all players")
+        try:
+            await player_manager.deactivate_by_thread(self.channel.id)
+            print(f"[FINALIZE] ✅ Deactivated players in thread {self.channel.id}")
+        except Exception as e:
+            print(f"[FINALIZE] ❌ Failed to deactivate for thread {self.channel.id}")
 
-                stats["games_since_credit"] = stats.get("games_since_credit", 0) + 1
-                if stats["games_since_credit"] >= 10:
-                    stats["games_since_credit"] = 0
-                    pdata["credits"] = pdata.get("credits", 0) + 100
-                    await self.channel.send(f"💸 <@{p}> played 10 games and earned **+100 credits!**")
+        # ✅ Report winner to tournament manager if set
+        if self.on_tournament_complete and winner != "draw":
+            print(f"[TOURNAMENT] Reporting winner: {winner} (type: {type(winner)})")
 
-                pdata["stats"] = stats
-                await save_player(p, pdata)
+            if isinstance(winner, int):
+                await self.on_tournament_complete(winner)
+            elif isinstance(winner, str) and winner.isdigit():
+                await self.on_tournament_complete(int(winner))  # extra fallback
+            else:
+                print(f"[Tournament] ⚠️ Invalid winner — randomly picking from: {self.players}")
+                fallback = random.choice(self.players)
+                await self.on_tournament_complete(fallback)
 
-            # ✅ Process bets
-            if self.game_view:
-                for uid, uname, amount, choice in self.game_view.bets:
-                    won = False
-                    if self.game_type == "singles":
-                        won = (
-                            (choice == "1" and winner == self.players[0]) or
-                            (choice == "2" and winner == self.players[1])
-                        )
-                    elif self.game_type == "doubles":
-                        won = normalize_team(choice) == normalized_winner
-                    elif self.game_type == "triples":
-                        try:
-                            idx = int(choice) - 1
-                            won = self.players[idx] == winner
-                        except:
-                            won = False
-
-                    await run_db(lambda: supabase
-                        .table("bets")
-                        .update({"won": won})
-                        .eq("player_id", uid)
-                        .eq("game_id", self.game_view.message.id)
-                        .eq("choice", choice)
-                        .execute()
-                    )
+        print(f"[DEBUG] Finalized winner = {winner}")
 
-                    payout = 0
-                    if won:
-                        odds = await self.game_view.get_odds(choice)
-                        payout = int(amount * (1 / odds)) if odds > 0 else amount
-                        await add_credits_atomic(uid, payout)
-                        print(f"\u2B50 {uname} won! Payout: {payout}")
-                    else:
-                        print(f"❌ {uname} lost {amount}")
-
-                    await run_db(lambda: supabase
-                        .table("bets")
-                        .update({"payout": payout})
-                        .eq("player_id", uid)
-                        .eq("game_id", self.game_view.message.id)
-                        .eq("choice", choice)
-                        .execute()
-                    )
+    # ✅ Post-game stages — each safe to run again after a partial failure
 
-            # ✅ Normalize winner for embed/footer
-            if isinstance(winner, str) and winner.isdigit():
-                idx = int(winner) - 1
-                if 0 <= idx < len(self.players):
-                    winner = self.players[idx]
+    def winner_name(self, winner):
+        if isinstance(winner, int):
+            member = self.message.guild.get_member(winner)
+            return member.display_name if member else f"User {winner}"
+        return winner
+
+    def target_game_id(self):
+        return (
+            str(self.lobby_message.id) if getattr(self, "lobby_message", None) else
+            str(self.game_view.message.id) if getattr(self, "game_view", None) and self.game_view.message else
+            str(self.message.id) if getattr(self, "message", None) else None
+        )
 
-            # ✅ Final embeds
-            winner_name = winner
-            if isinstance(winner, int):
-                member = self.message.guild.get_member(winner)
-                winner_name = member.display_name if member else f"User {winner}"
+    async def clear_active_game(self):
+        target_game_id = self.target_game_id()
+        if not target_game_id:
+            print("[finalize_game] ⚠️ No valid game_id found to delete active_game row.")
+            return
 
-            embed = await self.build_lobby_end_embed(winner)
-            await self.message.edit(embed=embed, view=None)
+        await run_db(lambda: supabase
+            .table("active_games")
+            .delete()
+            .eq("game_id", target_game_id)
+            .execute()
+        )
+        print(f"[finalize_game] ✅ Deleted active_game for {target_game_id}")
+
+    def bets_game_id(self):
+        # ✅ Bets are keyed by the lobby message the bettors clicked
+        if self.game_view and self.game_view.message:
+            return str(self.game_view.message.id)
+        return self.target_game_id()
+
+    async def plan_payouts(self, winner, normalized_winner):
+        """What each bet pays, decided once at commit time so settlement can be resumed as-is."""
+        if not self.game_view:
+            return []
+        payouts = []
+        for uid, uname, amount, choice in self.game_view.bets:
+            bet = {"player_id": int(uid), "uname": str(uname), "choice": str(choice), "amount": int(amount)}
+            if winner == "draw":
+                payouts.append({**bet, "won": None, "payout": int(amount)})
+                continue
 
-            target_message = self.lobby_message or (self.game_view.message if self.game_view else None)
-            if target_message and self.game_view:
-                lobby_embed = await self.game_view.build_embed(
-                    target_message.guild, winner=winner, no_image=True
+            won = False
+            if self.game_type == "singles":
+                won = (
+                    (choice == "1" and winner == self.players[0]) or
+                    (choice == "2" and winner == self.players[1])
                 )
-                for item in list(self.game_view.children):
-                    if isinstance(item, BettingButton) or getattr(item, "label", "") == "Place Bet":
-                        self.game_view.remove_item(item)
-                #await target_message.edit(embed=lobby_embed, view=self.game_view)
-                embeds = [lobby_embed]
-                if getattr(self.game_view, "image_embed", None):
-                    embeds.insert(0, self.game_view.image_embed)
-                await target_message.edit(embeds=embeds, view=self.game_view)
-
-            await self.channel.send(f"🏁 Voting ended. Winner: **{winner_name}**")
-            await asyncio.sleep(3)
-            await self.channel.edit(archived=True)
-            pending_games.pop((self.game_type, self.channel.id), None)
-
-            if self.is_hourly and winner != "draw":
-                await add_credits_atomic(winner, 50)
-                print(f"[\u2B50] Hourly game: awarded 50 credits to {winner}")
-
-            target_game_id = (
-                str(self.lobby_message.id) if getattr(self, "lobby_message", None) else
-                str(self.game_view.message.id) if getattr(self, "game_view", None) and self.game_view.message else
-                str(self.message.id) if getattr(self, "message", None) else None
+            elif self.game_type == "doubles":
+                won = normalize_team(choice) == normalized_winner
+            elif self.game_type == "triples":
+                try:
+                    idx = int(choice) - 1
+                    won = self.players[idx] == winner
+                except:
+                    won = False
+
+            payout = 0
+            if won:
+                odds = await self.game_view.get_odds(choice)
+                payout = int(amount * (1 / odds)) if odds > 0 else amount
+            payouts.append({**bet, "won": won, "payout": payout})
+        return payouts
+
+    async def settle_bets(self):
+        await settle_payouts(self.result_id, self.payouts)
+        self.bets_settled = True
+
+    async def apply_ratings(self, winner):
+        # ✅ Safe to call again after any failure: apply_game_patches runs at most once per game
+        if not self.result_recorded:
+            await record_game_result(
+                self.result_id, self.game_type, self.players, winner,
+                getattr(self, "is_tournament", False), self.payouts
+            )
+            self.result_recorded = True
+        async with player_locks.hold(*self.players):
+            await apply_game_ratings(
+                self.result_id, self.game_type, self.players, winner,
+                getattr(self, "is_tournament", False), self.channel
             )
+        self.ratings_applied = True
 
-            print(f"[DEBUG] Resolved target_game_id: {target_game_id}")
+    async def complete_result(self):
+        if not self.ratings_applied or not self.bets_settled:
+            print(f"[finalize_game] ⚠️ {self.result_id} left pending — resumed on next restart")
+            return
+        await update_game_result(self.result_id, completed=True)
 
-            if target_game_id:
-                res = await run_db(lambda: supabase
-                    .table("active_games")
-                    .select("*")
-                    .eq("game_id", target_game_id)
-                    .execute()
-                )
-                print(f"[DEBUG] Rows found before delete: {res.data}")
+    async def announce(self, content):
+        # ✅ broadcaster.post reports a failed delivery as False; raise so the stage retries
+        if not await broadcaster.post(self.channel, content=content):
+            raise RuntimeError("announcement was not delivered")
 
-                await run_db(lambda: supabase
-                    .table("active_games")
-                    .delete()
-                    .eq("game_id", target_game_id)
-                    .execute()
-                )
-                print(f"[finalize_game] ✅ Deleted active_game for {target_game_id}")
-            else:
-                print("[finalize_game] ⚠️ No valid game_id found to delete active_game row.")
+    async def post_end_embeds(self, winner):
+        embed = await self.build_lobby_end_embed(winner)
+        await self.message.edit(embed=embed, view=None)
 
-            # ✅ Report winner to tournament manager if set
-            if self.on_tournament_complete:
-                print(f"[TOURNAMENT] Reporting winner: {winner} (type: {type(winner)})")
+        target_message = self.lobby_message or (self.game_view.message if self.game_view else None)
+        if target_message and self.game_view:
+            lobby_embed = await self.game_view.build_embed(
+                target_message.guild, winner=winner, no_image=True
+            )
+            for item in list(self.game_view.children):
+                if isinstance(item, BettingButton) or getattr(item, "label", "") == "Place Bet":
+                    self.game_view.remove_item(item)
+            embeds = [lobby_embed]
+            if getattr(self.game_view, "image_embed", None):
+                embeds.insert(0, self.game_view.image_embed)
+            await target_message.edit(embeds=embeds, view=None if winner == "draw" else self.game_view)
 
-                if isinstance(winner, int):
-                    await self.on_tournament_complete(winner)
-                elif isinstance(winner, str) and winner.isdigit():
-                    await self.on_tournament_complete(int(winner))  # extra fallback
-                else:
-                    print(f"[Tournament] ⚠️ Invalid winner — randomly picking from: {self.players}")
-                    fallback = random.choice(self.players)
-                    await self.on_tournament_complete(fallback)
-
-            await update_leaderboard(self.bot, self.game_type)
-            print(f"[DEBUG] Finalized winner = {winner}")
-            # ✅ At the very end of finalize_game()
-            if hasattr(self, "vote_timeout") and self.vote_timeout:
-                self.vote_timeout.cancel()
-                self.vote_timeout = None
-
-            print("[FINALIZE] 🔻 Deactivating all players")
-            try:
-                await player_manager.deactivate_by_thread(self.channel.id)
-                print(f"[FINALIZE] ✅ Deactivated players in thread {self.channel.id}")
-            except Exception as e:
-                print(f"[FINALIZE] ❌ Failed to deactivate for thread {self.channel.id}")
+    async def archive_thread(self, delay):
+        # ✅ Give players a moment to read the result before the thread closes
+        await asyncio.sleep(delay)
+        await self.channel.edit(archived=True)
 
-            self.players = []
+    async def award_hourly_bonus(self, winner):
+        await add_credits_atomic(winner, 50)
+        print(f"[⭐] Hourly game: awarded 50 credits to {winner}")
+
+    async def forget_players(self):
+        self.players = []
 
 
 class GameEndedButton(discord.ui.Button):
@@ -2438,12 +3886,19 @@ class VoteButton(discord.ui.Button):
         self.view_obj = view
 
     async def callback(self, interaction: discord.Interaction):
+        await interaction.response.defer(ephemeral=True)
+        try:
+            await self.view_obj.actor.call(self._apply_vote, interaction)
+        except ActorBusy:
+            await interaction.followup.send(GAME_BUSY_MESSAGE, ephemeral=True)
+
+    async def _apply_vote(self, interaction: discord.Interaction):
         if self.view_obj.voting_closed:
-            await interaction.response.send_message("❌ Voting has ended.", ephemeral=True)
+            await interaction.followup.send("❌ Voting has ended.", ephemeral=True)
             return
 
         if not IS_TEST_MODE and interaction.user.id not in self.view_obj.players:
-            await interaction.response.send_message(
+            await interaction.followup.send(
                 "🚫 You are not a player in this match — you cannot vote.",
                 ephemeral=True
             )
@@ -2465,16 +3920,10 @@ class VoteButton(discord.ui.Button):
 
         print(f"[VOTE BUTTON] {interaction.user.id} voted for {self.value}")
 
-        try:
-            await interaction.response.send_message(
-                f"✅ {voter.display_name} voted for **{voted_name}**.",
-                ephemeral=True
-            )
-        except discord.InteractionResponded:
-            await interaction.followup.send(
-                f"✅ {voter.display_name} voted for **{voted_name}**.",
-                ephemeral=True
-            )
+        await interaction.followup.send(
+            f"✅ {voter.display_name} voted for **{voted_name}**.",
+            ephemeral=True
+        )
 
         await player_manager.deactivate(interaction.user.id)
 
@@ -2520,7 +3969,7 @@ async def _void_if_not_started(self):
         print("[HOURLY] ❌ Game voided after 30 min inactivity.")
 
         # Remove from pending
-        pending_games.pop((self.game_type, self.channel.id), None)
+        registry.remove_lobby(self)
 
         if self.thread:
             try:
@@ -2548,16 +3997,13 @@ class TournamentStartButtonView(discord.ui.View):
 
     @discord.ui.button(label="Start Tournament", style=discord.ButtonStyle.primary)
     async def start_tournament(self, interaction: discord.Interaction, button: discord.ui.Button):
-        key = (interaction.channel.id, "tournament")
-
         # ✅ 1. Delete the old start button
-        old = start_buttons.get(key)
+        old = registry.pop_button(interaction.channel.id, "tournament")
         if old:
             try:
                 await old.delete()
             except Exception:
                 pass
-            start_buttons.pop(key, None)  # ✅ Remove from registry
 
         # ✅ 2. Create the modal with a flag
         modal = PlayerCountModal(
@@ -2577,7 +4023,7 @@ class TournamentStartButtonView(discord.ui.View):
                 print("[MODAL] Player canceled modal — reposting Start Tournament button.")
                 view = TournamentStartButtonView()
                 msg = await interaction.channel.send("🏆 Click to start a **Tournament**:", view=view)
-                start_buttons[key] = msg
+                registry.add_button(interaction.channel.id, "tournament", msg)
 
         asyncio.create_task(restore_button_if_canceled())
 
@@ -2609,10 +4055,16 @@ class GameView(discord.ui.View):
         self.hourly_start_task = None
         self.hourly_void_task = None
         self.bot=bot
+        self.matchmade = False  # ✅ filled by the matchmaking queue, not a start button
 
 
         # ✅ Unique ID per game for safe countdown
         self.instance_id = uuid.uuid4().hex
+        self.lobby_id = self.instance_id[:8]
+        self.abandon_task = None
+        self.actor = GameActor(f"{game_type}-{self.lobby_id}")
+        self.reserved = set()     # players holding a slot while their join is checked/persisted
+        self.update_task = None   # pending debounced lobby edit
 
         self.add_item(LeaveGameButton(self))
 
@@ -2628,7 +4080,8 @@ class GameView(discord.ui.View):
         print(f"[AUTO ABANDON] Checking player count: {len(self.players)} / {self.max_players}")
         if len(self.players) < self.max_players:
             print("[AUTO ABANDON] Lobby still incomplete. Abandoning.")
-            await self.abandon_game("⏱️ Hourly match expired (no full lobby).")
+            reason = "⏱️ Hourly match expired (no full lobby)." if self.is_hourly else "⏱️ Lobby expired (no full lobby)."
+            await self.abandon_game(reason)
         else:
             print("[AUTO ABANDON] Game already started or lobby full. Skip abandon.")
 
@@ -2654,7 +4107,7 @@ class GameView(discord.ui.View):
                 await self.message.edit(embed=embed, view=None)
 
             print("[HOURLY] Game voided after 30 min.")
-            pending_games.pop((self.game_type, self.channel.id), None)
+            registry.remove_lobby(self)
             self.message = None
 
             self.cancel_abandon_task()
@@ -2679,7 +4132,7 @@ class GameView(discord.ui.View):
     async def abandon_game(self, reason):
         self.cancel_abandon_task()
         self.cancel_betting_task()
-        pending_games.pop((self.game_type, self.channel.id), None)
+        registry.remove_lobby(self)
 
         for p in self.players:
             await player_manager.deactivate(p)
@@ -2705,12 +4158,8 @@ class GameView(discord.ui.View):
 
         self.message = None
 
-        # ✅ Only post start button if NOT an hourly game
-        if not getattr(self, "is_hourly", False):
-            await start_new_game_button(self.channel, self.game_type, self.max_players)
-            print(f"[abandon_game] New start posted for {self.game_type} in #{self.channel.name}")
-        else:
-            print(f"[abandon_game] Hourly game abandoned — no new start posted.")
+        # ✅ A freed lobby slot may bring the start button back (hourly channels have none)
+        await start_button_manager.sync(self.channel, self.game_type)
 
 
     async def _betting_countdown(self, instance_id):
@@ -2771,16 +4220,19 @@ class GameView(discord.ui.View):
 
     async def game_full(self, interaction=None):
         print(f"[DEBUG] game_full triggered — players: {self.players}, max: {self.max_players}")
-        global pending_games
 
         self.cancel_abandon_task()
         self.cancel_betting_task()
         self.has_started = True
 
-        pending_games.pop((self.game_type, self.channel.id), None)
+        registry.remove_lobby(self)
+
+        if not self.channel:
+            self.channel = interaction.channel
+        guild = interaction.guild if interaction else self.channel.guild
 
         # 🔁 Rebuild embed early (no image) and update buttons BEFORE thread creation
-        lobby_embed = await self.build_embed(interaction.guild, no_image=True)
+        lobby_embed = await self.build_embed(guild, no_image=True)
         lobby_embed.title = f"{self.game_type.title()} Game Lobby"
         lobby_embed.color = discord.Color.orange()
 
@@ -2792,9 +4244,6 @@ class GameView(discord.ui.View):
         self.betting_button = BettingButtonDropdown(self)
         self.add_item(self.betting_button)
 
-        if not self.channel:
-            self.channel = interaction.channel
-
         if self.message:
             try:
                 await self.message.edit(embeds=[image_embed, lobby_embed], view=self)  # ✅ Edit early with new buttons
@@ -2804,32 +4253,31 @@ class GameView(discord.ui.View):
             self.message = await self.channel.send(embeds=[image_embed, lobby_embed], view=self)
 
         # 📦 Continue with DB and thread logic after UI feedback is done
-        res = await run_db(lambda: supabase.table("courses").select("id", "name", "image_url").execute())
-        chosen = random.choice(res.data or [{}])
+        chosen = random.choice(await load_courses("id, name, image_url") or [{}])
         self.course_id = chosen.get("id")
         self.course_name = chosen.get("name", "Unknown")
         self.course_image = chosen.get("image_url", "")
 
         room_name = await room_name_generator.get_unique_word()
-        thread = await interaction.channel.create_thread(
-            name=room_name,
-            type=discord.ChannelType.private_thread,
-            invitable=False
-        )
+        thread = await thread_pool.acquire(self.channel, room_name)
         self.thread = thread
 
+        # ✅ Lobby and matchmade players were activated without this thread — register them
+        #    against it so the room's deactivate_by_thread releases everyone
+        await player_manager.assign_thread(self.players, thread.id)
+
         for pid in self.players:
-            member = interaction.guild.get_member(pid)
+            member = guild.get_member(pid)
             if member:
                 await thread.add_user(member)
 
-        thread_embed = await self.build_embed(interaction.guild, no_image=False)
+        thread_embed = await self.build_embed(guild, no_image=False)
         thread_embed.title = f"Game Room: {room_name}"
         thread_embed.description = f"Course: {self.course_name}"
 
         room_view = RoomView(
             bot=bot,
-            guild=interaction.guild,
+            guild=guild,
             players=self.players,
             game_type=self.game_type,
             room_name=room_name,
@@ -2849,48 +4297,79 @@ class GameView(discord.ui.View):
         thread_msg = await thread.send(content=f"{mentions}\nMatch started!", embed=thread_embed, view=room_view)
         room_view.message = thread_msg
         room_view.channel = thread
+        registry.add_room(room_view)
 
         await save_game_state(self, self, room_view)
 
-        if not self.scheduled_note:
-            await start_new_game_button(self.channel, self.game_type, self.max_players)
+        await start_button_manager.sync(self.channel, self.game_type)
 
         if self.is_hourly:
-            countdown_view = HourlyCountdownView(bot, interaction.guild, self.channel, seconds_until_start=120)
+            countdown_view = HourlyCountdownView(bot, guild, self.channel, seconds_until_start=120)
             countdown_view.message = await self.channel.send("⏳ Golden Hour Game starts soon...", view=countdown_view)
 
         await self.show_betting_phase()
 
 
     async def _handle_join(self, interaction: discord.Interaction, button: discord.ui.Button):
-        if not interaction.response.is_done():
-            await interaction.response.defer(ephemeral=True)
+        uid = interaction.user.id
 
-        if interaction.user.id in self.players:
+        # ✅ Reserve the slot before any awaits — losers of a burst get their answer immediately
+        if uid in self.players or uid in self.reserved:
             await self.safe_send(interaction, "✅ You have already joined this game.", ephemeral=True)
             return
 
-        if len(self.players) >= self.max_players:
-            await self.safe_send(interaction, "🚫 This game is already full.", ephemeral=True)
+        if self.has_started or len(self.players) + len(self.reserved) >= self.max_players:
+            await self.safe_send(interaction, "🚫 Lobby full.", ephemeral=True)
             return
 
-        if await player_manager.is_active(interaction.user.id):
-            await self.safe_send(interaction, "🚫 You are already in another active game or must finish voting first.", ephemeral=True)
-            return
+        self.reserved.add(uid)
+        try:
+            if not interaction.response.is_done():
+                await interaction.response.defer(ephemeral=True)
 
-        await player_manager.activate(interaction.user.id, interaction.channel.id)
-        self.players.append(interaction.user.id)
+            # ✅ Seated in a live game answers from the registry; the active_players row covers queues and voting
+            if registry.for_player(uid) or await player_manager.is_active(uid):
+                await self.safe_send(interaction, "🚫 You are already in another active game or must finish voting first.", ephemeral=True)
+                return
+
+            await player_manager.activate_batched(uid, interaction.channel.id)
+
+            try:
+                await self.actor.call(self._apply_join, interaction, uid)
+            except ActorBusy:
+                await player_manager.deactivate(uid)
+                await self.safe_send(interaction, GAME_BUSY_MESSAGE, ephemeral=True)
+        finally:
+            self.reserved.discard(uid)
+
+    async def _apply_join(self, interaction: discord.Interaction, uid):
+        # ✅ Reservation becomes a seat in one step
+        self.reserved.discard(uid)
+        self.players.append(uid)
+        registry.refresh(self)
 
         if not self.channel:
             self.channel = interaction.channel
 
-        await self.update_message()
-
         if len(self.players) == self.max_players:
             if self.has_started:
                 print("[Join] Game already started, skipping game_full()")
                 return
             await self.game_full(interaction)
+        else:
+            self.schedule_update()
+
+    def schedule_update(self):
+        """Coalesce a burst of lobby changes into a single embed edit."""
+        if self.update_task is None:
+            self.update_task = asyncio.create_task(self._debounced_update())
+
+    async def _debounced_update(self):
+        await asyncio.sleep(LOBBY_EDIT_DEBOUNCE)
+        self.update_task = None  # ✅ changes from here on schedule a fresh edit
+        if self.has_started:
+            return  # game_full already redrew the lobby
+        await self.update_message()
 
     async def update_message(self, status=None):
         if not self.message:
@@ -2918,7 +4397,8 @@ class GameView(discord.ui.View):
         if hasattr(self, "image_embed") and self.image_embed:
             embeds.insert(0, self.image_embed)  # ✅ put image_embed first
 
-        await self.message.edit(embeds=embeds, view=self)
+        async with outbound.slot(PRIORITY_GAME):
+            await self.message.edit(embeds=embeds, view=self)
 
 
 
@@ -2980,11 +4460,10 @@ class GameView(discord.ui.View):
             embed.set_image(url=self.course_image)
 
         ranks, wins = [], []
-        for p in self.players:
-            pdata = await get_player(p)
-            game_stats = pdata.get("stats", {}).get(self.game_type, {})
-            ranks.append(game_stats.get("rank", 1000))
-            wins.append(game_stats.get("wins", 0))
+        for record in await get_players(self.players):
+            game_stats = record.stats(self.game_type)
+            ranks.append(game_stats.rank)
+            wins.append(game_stats.wins)
 
 
         game_full = len(self.players) == self.max_players
@@ -3086,7 +4565,7 @@ class GameView(discord.ui.View):
 
 
     async def get_odds(self, choice):
-        ranks = [ (await get_player(p)).get("rank", 1000) for p in self.players ]
+        ranks = await player_repo.ranks(self.players, self.game_type)
 
         if self.game_type == "singles" and len(ranks) >= 2:
             e1, e2 = ranks
@@ -3109,12 +4588,24 @@ class GameView(discord.ui.View):
             return 1 / len(ranks)
 
         elif self.game_type == "tournament":
-            # Assume equal odds for now
+            tournament = getattr(self, "tournament", None)
+            if tournament and tournament.champion_odds:
+                try:
+                    return tournament.champion_odds.get(int(choice), 0.0)
+                except ValueError:
+                    return 0.0
             return 1 / len(ranks) if ranks else 0.5
 
         return 0.5
 
     async def add_bet(self, uid, uname, amount, choice, interaction):
+        try:
+            return await self.actor.call(self._apply_bet, uid, uname, amount, choice, interaction)
+        except ActorBusy:
+            await self.safe_send(interaction, GAME_BUSY_MESSAGE, ephemeral=True)
+            return False
+
+    async def _apply_bet(self, uid, uname, amount, choice, interaction):
         if uid in self.players:
             if self.game_type == "doubles":
                 # Allow only if user is betting on their own team
@@ -3210,10 +4701,11 @@ class GameView(discord.ui.View):
         kwargs = dict(content=content, embed=embed, **kwargs)
         if view is not None:
             kwargs["view"] = view
-        if interaction.response.is_done():
-            await interaction.followup.send(**kwargs)
-        else:
-            await interaction.response.send_message(**kwargs)
+        async with outbound.slot(PRIORITY_INTERACTION):
+            if interaction.response.is_done():
+                await interaction.followup.send(**kwargs)
+            else:
+                await interaction.response.send_message(**kwargs)
 
 
 class BetAmountModal(discord.ui.Modal, title="Enter Bet Amount"):
@@ -3247,16 +4739,18 @@ class BetAmountModal(discord.ui.Modal, title="Enter Bet Amount"):
             odds = await odds_provider.get_odds(self.choice)
             payout = int(amount * (1 / odds)) if odds > 0 else amount
 
-            # ✅ Deduct credits
-            success = await deduct_credits_atomic(user_id, amount)
+            # ✅ Deduct credits under the bettor's lock
+            async with player_locks.hold(user_id):
+                success = await deduct_credits_atomic(user_id, amount)
             if not success:
                 await self.safe_send(interaction, "❌ Not enough credits.", ephemeral=True)
                 return
 
-            # ✅ Check if bet is allowed (via game_view.add_bet)
+            # ✅ Check if bet is allowed (via game_view.add_bet) — not under the lock, the game actor may be finalizing
             accepted = await self.game_view.add_bet(user_id, interaction.user.display_name, amount, self.choice, interaction)
             if not accepted:
-                await add_credits_atomic(user_id, amount)  # refund
+                async with player_locks.hold(user_id):
+                    await add_credits_atomic(user_id, amount)  # refund
                 return
 
             # ✅ Insert into Supabase DB
@@ -3271,11 +4765,13 @@ class BetAmountModal(discord.ui.Modal, title="Enter Bet Amount"):
             }
             print("[DEBUG] Inserting bet:", bet_data)
 
-            res = await run_db(lambda: supabase.table("bets").insert(bet_data).execute())
+            async with player_locks.hold(user_id):
+                res = await run_db(lambda: supabase.table("bets").insert(bet_data).execute())
+                if getattr(res, "error", None):
+                    await add_credits_atomic(user_id, amount)  # refund
 
             if getattr(res, "error", None):
                 print(f"[BET] ❌ Failed to insert bet for {user_id}: {res.error}")
-                await add_credits_atomic(user_id, amount)  # refund
                 await self.safe_send(interaction, "❌ Failed to log your bet. You have been refunded.", ephemeral=True)
                 return
 
@@ -3319,10 +4815,11 @@ class BetAmountModal(discord.ui.Modal, title="Enter Bet Amount"):
 
     async def safe_send(self, interaction: discord.Interaction, content: str, **kwargs):
         """Send safely: first response OR followup."""
-        if interaction.response.is_done():
-            await interaction.followup.send(content, **kwargs)
-        else:
-            await interaction.response.send_message(content, **kwargs)
+        async with outbound.slot(PRIORITY_INTERACTION):
+            if interaction.response.is_done():
+                await interaction.followup.send(content, **kwargs)
+            else:
+                await interaction.response.send_message(content, **kwargs)
 
 
 
@@ -3341,11 +4838,10 @@ async def update_leaderboard(bot, game_type="singles"):
     except:
         return
 
-    res = await run_db(lambda: supabase.table("players").select("*").execute())
-    players = res.data or []
-    players.sort(
-        key=lambda p: int(p.get("stats", {}).get(game_type, {}).get("wins", 0)),
-        reverse=True
+    # ✅ Only the columns the leaderboard renders, streamed page by page
+    players = await top_n(
+        player_repo.leaderboard_rows(game_type), LEADERBOARD_TOP_N,
+        key=lambda p: int(GameStats.from_dict((p.get("stats") or {}).get(game_type)).wins)
     )
 
     entries = [(p["id"], p) for p in players]
@@ -3357,7 +4853,8 @@ async def update_leaderboard(bot, game_type="singles"):
         description=view.format_page(chan.guild),
         color=discord.Color.gold()
     )
-    await msg.edit(embed=embed, view=view)
+    async with outbound.slot(PRIORITY_COSMETIC):
+        await msg.edit(embed=embed, view=view)
 
 
 class LeaderboardView(discord.ui.View):
@@ -3392,10 +4889,11 @@ class LeaderboardView(discord.ui.View):
             member = guild.get_member(int(uid))
             display = member.display_name if member else f"User {uid}"
             name = display[:24]  # truncate if needed
-            wins = stats.get("stats", {}).get(self.game_type, {}).get("wins", 0)
-            #trophies = stats.get("stats", {}).get(self.game_type, {}).get("trophies", 0)
-            credits = stats.get("credits", 0)
-            rank = stats.get("stats", {}).get(self.game_type, {}).get("rank", 1000)
+            record = PlayerRecord.from_row(stats)
+            wins = record.stats(self.game_type).wins
+            #trophies = record.stats(self.game_type).trophies
+            credits = record.credits
+            rank = record.stats(self.game_type).rank
 
             name_with_wins = f"{name}"
             line = f"{i:<3} {name_with_wins:<26} {wins:<7} {rank:<8} {credits:<9}"
@@ -3575,7 +5073,7 @@ class SubmitScoreModal(discord.ui.Modal, title="Submit Best Score"):
             return
 
         # 1️⃣ Insert raw score
-        await run_db(lambda: supabase
+        await write_db("handicaps", lambda: supabase
             .table("handicaps")
             .upsert({
                 "player_id": str(interaction.user.id),
@@ -3592,7 +5090,7 @@ class SubmitScoreModal(discord.ui.Modal, title="Submit Best Score"):
         handicap = score - new_avg
 
         # 4️⃣ Update the same row
-        await run_db(lambda: supabase
+        await write_db("handicaps", lambda: supabase
             .table("handicaps")
             .update({"handicap": handicap})
             .eq("player_id", str(interaction.user.id))
@@ -3724,7 +5222,7 @@ class AddCourseModal(discord.ui.Modal, title="Add New Course (Easy & Hard)"):
         records.append(hard)
 
         # Insert both at once
-        res = await run_db(lambda: supabase.table("courses").insert(records).execute())
+        res = await write_db("courses", lambda: supabase.table("courses").insert(records).execute())
 
         if hasattr(res, "status_code") and res.status_code not in (200, 201):
             await interaction.response.send_message(
@@ -3768,7 +5266,7 @@ class SetCourseRatingModal(discord.ui.Modal, title="Set Course Par"):
         )
             return
 
-        await run_db(lambda: supabase
+        await write_db("courses", lambda: supabase
             .table("courses")
             .update({"course_par": course_par, "avg_par": avg_par})
             .eq("id", self.course["id"])
@@ -3787,19 +5285,166 @@ class SetCourseRatingModal(discord.ui.Modal, title="Set Course Par"):
 # ✅ FINAL TOURNAMENT MODULE
 ######################################
 
+ROUND_SETUP_CONCURRENCY = 4  # match rooms set up in parallel per tournament round
+
+
+class BracketMatch:
+    """One slot pair in the bracket. A None opponent in round 1 is a bye."""
+
+    def __init__(self, round_no, index, players=None, winner=None, thread_id=None, message_id=None):
+        self.round_no = round_no
+        self.index = index
+        self.players = players or [None, None]
+        self.winner = winner
+        self.thread_id = thread_id
+        self.message_id = message_id
+
+    @property
+    def key(self):
+        return (self.round_no, self.index)
+
+    @property
+    def is_ready(self):
+        return all(p is not None for p in self.players)
+
+    @property
+    def is_bye(self):
+        return self.round_no == 1 and sum(p is not None for p in self.players) == 1
+
+    def opponent_of(self, player_id):
+        return next((p for p in self.players if p is not None and p != player_id), None)
+
+    def to_dict(self):
+        return {
+            "players": self.players,
+            "winner": self.winner,
+            "thread_id": str(self.thread_id) if self.thread_id else None,
+            "message_id": str(self.message_id) if self.message_id else None,
+        }
+
+    @classmethod
+    def from_dict(cls, round_no, index, data):
+        return cls(
+            round_no,
+            index,
+            players=[int(p) if p is not None else None for p in data.get("players", [None, None])],
+            winner=int(data["winner"]) if data.get("winner") is not None else None,
+            thread_id=int(data["thread_id"]) if data.get("thread_id") else None,
+            message_id=int(data["message_id"]) if data.get("message_id") else None,
+        )
+
+
+class TournamentBracket:
+    """Single-elimination bracket padded to a power of two.
+
+    The winner of match k in round r plays in match k // 2 of round r + 1, so
+    the bracket shape is fixed once seeded. `index` maps every player still in
+    the tournament to their current match for O(1) result lookup.
+    """
+
+    def __init__(self, rounds, current_round=1):
+        self.rounds = rounds  # rounds[r - 1] -> [BracketMatch]
+        self.current_round = current_round
+        self.index = {}
+        self.rebuild_index()
+
+    @classmethod
+    def seed(cls, players):
+        size = 1
+        while size < max(2, len(players)):
+            size *= 2
+
+        byes = size - len(players)
+        first_round = []
+        it = iter(players)
+        for k in range(size // 2):
+            # ✅ Byes go to the first matches so no match is bye vs bye
+            pair = [next(it), None] if k < byes else [next(it), next(it)]
+            first_round.append(BracketMatch(1, k, pair))
+
+        rounds = [first_round]
+        while len(rounds[-1]) > 1:
+            r = len(rounds) + 1
+            rounds.append([BracketMatch(r, k) for k in range(len(rounds[-1]) // 2)])
+
+        bracket = cls(rounds)
+        for match in first_round:
+            if match.is_bye:
+                bracket.record_result(match.opponent_of(None))
+        return bracket
+
+    def rebuild_index(self):
+        self.index = {}
+        eliminated = set()
+        for matches in self.rounds:
+            for match in matches:
+                for p in match.players:
+                    if p is None:
+                        continue
+                    if match.winner is not None and match.winner != p:
+                        eliminated.add(p)
+                    self.index[p] = match
+        for p in eliminated:
+            self.index.pop(p, None)
+
+    def match_for(self, player_id):
+        return self.index.get(player_id)
+
+    def record_result(self, winner_id):
+        """Record a win and advance the winner. Returns the loser (None for a bye)."""
+        match = self.index[winner_id]
+        match.winner = winner_id
+        loser_id = match.opponent_of(winner_id)
+        self.index.pop(loser_id, None)
+
+        if match.round_no < len(self.rounds):
+            next_match = self.rounds[match.round_no][match.index // 2]
+            next_match.players[match.index % 2] = winner_id
+            self.index[winner_id] = next_match
+
+        if self.round_complete(self.current_round) and self.current_round < len(self.rounds):
+            self.current_round += 1
+        return loser_id
+
+    def round_complete(self, round_no):
+        return all(m.winner is not None for m in self.rounds[round_no - 1])
+
+    def open_matches(self):
+        return [m for m in self.rounds[self.current_round - 1] if m.winner is None and m.is_ready]
+
+    @property
+    def champion(self):
+        return self.rounds[-1][0].winner
+
+    def to_dict(self):
+        return {
+            "current_round": self.current_round,
+            "rounds": [[m.to_dict() for m in matches] for matches in self.rounds],
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        rounds = [
+            [BracketMatch.from_dict(r, k, m) for k, m in enumerate(matches)]
+            for r, matches in enumerate(data["rounds"], start=1)
+        ]
+        return cls(rounds, current_round=data.get("current_round", 1))
+
+
 class TournamentManager:
     def __init__(self, bot, creator, max_players=16):
         self.bot = bot
         self.creator = creator
         self.players = [creator.id if hasattr(creator, "id") else creator]
         self.max_players = max_players
-        self.matches_completed_this_round = 0
         self.message = None           # the main lobby message in parent channel
         self.parent_channel = None    # the parent text channel
-        self.current_matches = []
-        self.winners = []
-        self.round_players = []
-        self.next_round_players = []
+        self.bracket = None
+        self.course = None            # course for the current round
+        self.rooms = {}               # (round, index) -> RoomView
+        self.champion_odds = {}       # player_id -> P(wins the tournament)
+        self.bet_odds = {}            # bettor uid -> champion odds when the bet was placed
+        self.advanced_rounds = set()  # rounds whose completion already started the next one
         self.started = False  
 
         self.bets = []  # ✅ NEW: store live bets (uid, uname, amount, choice)
@@ -3811,6 +5456,7 @@ class TournamentManager:
         if uid in self.players or len(self.players) >= self.max_players:
             return False
         self.players.append(uid)
+        registry.refresh(self)
         await player_manager.activate(uid)
         return True
 
@@ -3828,7 +5474,20 @@ class TournamentManager:
             for p in self.players:
                 await player_manager.deactivate(p)
 
-            await start_new_game_button(self.parent_channel, "tournament")
+            registry.remove_tournament(self.parent_channel.id)
+            await start_button_manager.sync(self.parent_channel, "tournament")
+
+    async def refresh_odds(self):
+        if not self.bracket:
+            return
+
+        entrants = list(self.bracket.index)
+        ratings = dict(zip(entrants, await player_repo.ranks(entrants, "tournament")))
+
+        started_at = time.perf_counter()
+        self.champion_odds = tournament_champion_odds(self.bracket, ratings)
+        elapsed_ms = (time.perf_counter() - started_at) * 1000
+        print(f"[TOURNAMENT] 📊 Champion odds for {len(ratings)} entrants computed in {elapsed_ms:.1f}ms")
 
     async def start_bracket(self, interaction):
         guild = interaction.guild
@@ -3837,129 +5496,152 @@ class TournamentManager:
         # ✅ Ensure players are trimmed and valid
         self.players = self.players[:self.max_players]
         self.players = [p for p in self.players if await player_manager.is_active(p)]
+        registry.refresh(self)
 
-        self.round_players = self.players.copy()
-        random.shuffle(self.round_players)
-        self.round = 1
+        seeded = self.players.copy()
+        random.shuffle(seeded)
+        self.bracket = TournamentBracket.seed(seeded)
+        await self.refresh_odds()
 
         print(f"[ROUND DEBUG] Players: {self.players}")
-        print(f"[ROUND DEBUG] Round players: {self.round_players}")
+        print(f"[ROUND DEBUG] Bracket: {len(self.bracket.rounds)} rounds, {len(self.bracket.rounds[0])} first-round matches")
         await self.run_round(guild)  # ✅ Only call once with correct player list
 
     async def run_round(self, guild):
-        print(f"[TOURNAMENT] Running round with {len(self.round_players)} players")
-        players = self.round_players.copy()
-        random.shuffle(players)
-
-        self.current_matches = []
-        self.winners = []
-        self.next_round_players = []
+        round_no = self.bracket.current_round
+        matches = [m for m in self.bracket.open_matches() if m.key not in self.rooms]
+        print(f"[TOURNAMENT] Running round {round_no} with {len(matches)} match(es)")
+        started_at = time.perf_counter()
+
+        if not self.course or self.course.get("round") != round_no:
+            chosen = random.choice(await load_courses() or [{}])
+            self.course = {
+                "round": round_no,
+                "id": chosen.get("id"),
+                "name": chosen.get("name", "Unknown"),
+                "image_url": chosen.get("image_url", "")
+            }
 
-        res = await run_db(lambda: supabase.table("courses").select("*").execute())
-        chosen = random.choice(res.data or [{}])
-        course_id = chosen.get("id")
-        course_name = chosen.get("name", "Unknown")
-        course_image = chosen.get("image_url", "")
+        # ✅ Set up all rooms in parallel, bounded so thread creation stays within rate limits
+        semaphore = asyncio.Semaphore(ROUND_SETUP_CONCURRENCY)
+        rooms = await asyncio.gather(*(
+            self.setup_match(guild, match, self.course, semaphore) for match in matches
+        ))
+        ready = [room for room in rooms if room]
 
-        for i in range(0, len(players), 2):
-            if i + 1 < len(players):
-                p1 = players[i]
-                p2 = players[i + 1]
-                print(f"[PAIR] Attempting to create room for: {p1} vs {p2}")
+        await save_tournament_state(self)
 
-                room_name = await room_name_generator.get_unique_word()
+        # ✅ One lobby edit for the whole round instead of one per pair
+        if getattr(self, "view", None):
+            try:
+                await self.view.update_message(
+                    status=f"⚔️ Round {round_no}: {len(self.bracket.open_matches())} match(es) in progress — place your bets!"
+                )
+            except Exception as e:
+                print(f"[TOURNAMENT] ⚠️ Failed to update tournament lobby: {e}")
 
-                try:
-                    match_thread = await self.parent_channel.create_thread(
-                        name=f"Match-{room_name}",
-                        type=discord.ChannelType.private_thread,
-                        invitable=False
-                    )
-                    print(f"[THREAD] ✅ Created thread {match_thread.name}")
-                except discord.Forbidden:
-                    print(f"❌ Missing permission to create thread in #{self.parent_channel}")
-                    continue
-                except discord.HTTPException as e:
-                    print(f"❌ Failed to create thread: {e}")
-                    continue
+        elapsed = time.perf_counter() - started_at
+        print(f"[TOURNAMENT] ⏱️ Round {round_no} setup: {len(ready)}/{len(matches)} rooms in {elapsed:.2f}s")
 
-                for pid in [p1, p2]:
-                    try:
-                        member = guild.get_member(pid) or await guild.fetch_member(pid)
-                        await match_thread.add_user(member)
-                        print(f"[THREAD] ✅ Added user {pid} to thread {match_thread.name}")
-                    except discord.NotFound:
-                        print(f"[THREAD] ⚠️ Could not find user {pid}")
-                    except discord.Forbidden:
-                        print(f"[THREAD] ❌ Forbidden to add user {pid}")
-                    except Exception as e:
-                        print(f"[THREAD] ⚠️ Failed to add user {pid}: {e}")
+    def build_room_view(self, guild, match, course, thread, room_name):
+        p1, p2 = match.players
+        room_view = RoomView(
+            bot=self.bot,
+            guild=guild,
+            players=[p1, p2],
+            game_type="singles",
+            room_name=room_name,
+            course_name=course["name"],
+            channel=thread,
+            course_id=course["id"],
+            max_players=2,
+            is_tournament=True
+        )
+        room_view.course_image = course["image_url"]
+        room_view.guild = guild
+        room_view.channel = thread
+        room_view.on_tournament_complete = partial(self.match_complete, match_key=match.key)
+        self.rooms[match.key] = room_view
+        registry.add_room(room_view)
+        return room_view
 
-                mentions = f"<@{p1}> <@{p2}>"
+    async def setup_match(self, guild, match, course, semaphore):
+        p1, p2 = match.players
+        async with semaphore:
+            print(f"[PAIR] Attempting to create room for: {p1} vs {p2}")
 
-                # ✅ Instantiate RoomView here
-                room_view = RoomView(
-                    bot=self.bot,
-                    guild=guild,
-                    players=[p1, p2],
-                    game_type="singles",
-                    room_name=room_name,
-                    course_name=course_name,
-                    channel=match_thread,
-                    course_id=course_id,
-                    max_players=2,
-                    is_tournament=True
-                )
-                room_view.course_image = course_image
-                room_view.guild = guild
-                room_view.channel = match_thread
-                room_view.on_tournament_complete = self.match_complete
+            room_name = await room_name_generator.get_unique_word()
 
+            try:
+                match_thread = await thread_pool.acquire(self.parent_channel, f"Match-{room_name}")
+                print(f"[THREAD] ✅ Created thread {match_thread.name}")
+            except discord.Forbidden:
+                print(f"❌ Missing permission to create thread in #{self.parent_channel}")
+                return None
+            except discord.HTTPException as e:
+                print(f"❌ Failed to create thread: {e}")
+                return None
+
+            for pid in [p1, p2]:
                 try:
-                    embed = await room_view.build_room_embed()
-
-                    embeds = [embed]
-                    if getattr(self, "image_embed", None):
-                        embeds.insert(0, self.image_embed)
+                    member = guild.get_member(pid) or await guild.fetch_member(pid)
+                    await match_thread.add_user(member)
+                    print(f"[THREAD] ✅ Added user {pid} to thread {match_thread.name}")
+                except discord.NotFound:
+                    print(f"[THREAD] ⚠️ Could not find user {pid}")
+                except discord.Forbidden:
+                    print(f"[THREAD] ❌ Forbidden to add user {pid}")
+                except Exception as e:
+                    print(f"[THREAD] ⚠️ Failed to add user {pid}: {e}")
 
-                    await self.message.edit(embeds=embeds, view=self)
+            mentions = f"<@{p1}> <@{p2}>"
 
-                    msg = await match_thread.send(
-                        content=f"{mentions}\n🏆 This match is part of the tournament!",
-                        embeds=embeds,
-                        view=room_view
-                    )
+            # ✅ Instantiate RoomView here
+            room_view = self.build_room_view(guild, match, course, match_thread, room_name)
 
-                    room_view.message = msg
-                    room_view.lobby_embed = embed  # ✅ store the embed AFTER it's used
+            try:
+                embed = await room_view.build_room_embed()
 
-                    # Let update_message ensure layout is consistent
-                    await room_view.update_message()
-                    self.current_matches.append(room_view)
+                embeds = [embed]
+                if getattr(self, "image_embed", None):
+                    embeds.insert(0, self.image_embed)
 
-                    print(f"[ROOM] ✅ Match ready: {p1} vs {p2} in thread {match_thread.name}")
-                except Exception as e:
-                    print(f"❌ Failed to post initial message in match thread: {e}")
-                    continue
-            else:
-                print(f"[ROUND] ➕ {players[i]} added to next_round_players (odd count)")
-                self.next_round_players.append(players[i])
+                msg = await match_thread.send(
+                    content=f"{mentions}\n🏆 This match is part of the tournament!",
+                    embeds=embeds,
+                    view=room_view
+                )
 
+                room_view.message = msg
+                room_view.lobby_embed = embed  # ✅ store the embed AFTER it's used
+                match.thread_id = match_thread.id
+                match.message_id = msg.id
+                registry.refresh(room_view)
 
+                print(f"[ROOM] ✅ Match ready: {p1} vs {p2} in thread {match_thread.name}")
+                return room_view
+            except Exception as e:
+                self.rooms.pop(match.key, None)
+                registry.remove_room(match_thread.id)
+                print(f"❌ Failed to post initial message in match thread: {e}")
+                return None
+
+    async def match_complete(self, winner_id, match_key=None):
+        match = self.bracket.match_for(winner_id) if self.bracket else None
+        if not match or match.winner is not None or not match.is_ready or (match_key and match.key != match_key):
+            print(f"[TOURNAMENT] ⚠️ No open match for winner {winner_id} — ignoring duplicate result.")
+            return
 
-    async def match_complete(self, winner_id):
-        self.matches_completed_this_round += 1
-        self.winners.append(winner_id)
-        self.next_round_players.append(winner_id)
+        loser_id = self.bracket.record_result(winner_id)
+        self.rooms.pop(match.key, None)
 
-        pending_games.pop((self.game_type, self.channel.id), None)
+        # ✅ Decided before any await: the last two results of a round can't both advance it
+        advance = self.bracket.round_complete(match.round_no) and match.round_no not in self.advanced_rounds
+        if advance:
+            self.advanced_rounds.add(match.round_no)
 
-        # ✅ Find the loser in the current match pair
-        loser_id = None
-        for match in self.current_matches:
-            if winner_id in match.players:
-                loser_id = next((p for p in match.players if p != winner_id), None)
-                break
+        # ✅ Checkpoint every result so a restart resumes from here
+        await save_tournament_state(self)
 
         if loser_id:
             await player_manager.deactivate(loser_id)
@@ -3967,56 +5649,47 @@ class TournamentManager:
         await update_leaderboard(self.bot, "tournament")
 
         print(f"[TOURNAMENT] ✅ Match complete. Winner: {winner_id}")
-        print(f"🏁 Matches completed this round: {self.matches_completed_this_round} / {len(self.current_matches)}")
-        print(f"📥 Next round players: {self.next_round_players}")
+        print(f"🏁 Round {match.round_no}: {sum(m.winner is not None for m in self.bracket.rounds[match.round_no - 1])} / {len(self.bracket.rounds[match.round_no - 1])} matches done")
 
-        if self.matches_completed_this_round >= len(self.current_matches):
-            if len(self.next_round_players) == 1:
-                champ = self.next_round_players[0]
-                await player_manager.deactivate(champ)
+        champ = self.bracket.champion
+        if champ is not None:
+            await player_manager.deactivate(champ)
 
-                # \u2B50 Handle bet payouts
-                for uid, uname, amount, choice in self.bets:
-                    try:
-                        won = int(choice) == champ
-                    except:
-                        won = False
-
-                    await run_db(lambda: supabase
-                        .table("bets")
-                        .update({"won": won})
-                        .eq("player_id", uid)
-                        .eq("game_id", self.message.id)
-                        .eq("choice", choice)
-                        .execute()
-                    )
+            # \u2B50 Handle bet payouts (each bet is settled and credited at most once)
+            payouts = []
+            for uid, uname, amount, choice in self.bets:
+                try:
+                    won = int(choice) == champ
+                except:
+                    won = False
 
-                    if won:
-                        odds = 0.5
-                        payout = int(amount / odds)
-                        await add_credits_atomic(uid, payout)
-                        print(f"\u2B50 {uname} won! Payout: {payout}")
-                    else:
-                        print(f"❌ {uname} lost {amount}")
-    
-                final_embed = discord.Embed(
-                    title="🏆 Tournament Results",
-                    description=f"**Champion:** <@{champ}>",
-                    color=discord.Color.gold()
-                )
-                final_embed.set_footer(text="Thanks for playing!")
+                payout = 0
+                if won:
+                    odds = self.bet_odds.get(uid) or 0.5
+                    payout = int(amount / odds)
+                payouts.append({"player_id": int(uid), "uname": str(uname), "choice": str(choice),
+                                "amount": int(amount), "won": won, "payout": payout})
+            await settle_payouts(self.message.id, payouts)
+
+            final_embed = discord.Embed(
+                title="🏆 Tournament Results",
+                description=f"**Champion:** <@{champ}>",
+                color=discord.Color.gold()
+            )
+            final_embed.set_footer(text="Thanks for playing!")
 
-                if self.message:
-                    await self.message.edit(embed=final_embed, view=None)
+            if self.message:
+                await self.message.edit(embed=final_embed, view=None)
 
-                print(f"🏆 Tournament completed. Champion: {champ}")
+            await save_tournament_state(self, status="completed")
+            if self.parent_channel:
+                registry.remove_tournament(self.parent_channel.id)
+            print(f"🏆 Tournament completed. Champion: {champ}")
 
-            else:
-                print(f"[TOURNAMENT] 🔁 Advancing to next round with players: {self.next_round_players}")
-                self.round_players = self.next_round_players.copy()
-                self.next_round_players = []
-                self.matches_completed_this_round = 0
-                await self.run_round(self.parent_channel.guild)
+        elif advance:
+            print(f"[TOURNAMENT] 🔁 Advancing to round {self.bracket.current_round}")
+            await self.refresh_odds()
+            await self.run_round(self.parent_channel.guild)
         else:
             print(f"[TOURNAMENT] ⏳ Waiting for remaining matches to complete.")
 
@@ -4058,6 +5731,7 @@ class TournamentLobbyView(discord.ui.View):
         )
         self._embed_helper.players = self.players
         self._embed_helper.bets = self.bets
+        self._embed_helper.tournament = manager
 
     def cancel_betting_task(self):
         if self.betting_task:
@@ -4073,7 +5747,7 @@ class TournamentLobbyView(discord.ui.View):
         self.cancel_abandon_task()
         self.cancel_betting_task()
 
-        pending_games.pop((self.game_type, self.parent_channel.id), None)
+        registry.remove_tournament(self.parent_channel.id)
 
         for p in self.players:
             await player_manager.deactivate(p)
@@ -4092,10 +5766,9 @@ class TournamentLobbyView(discord.ui.View):
 
         self.message = None
 
-        # ✅ Call the same flow as /init_...
-        await start_new_game_button(self.parent_channel, "tournament")
+        await start_button_manager.sync(self.parent_channel, "tournament")
 
-        print(f"[abandon_game] New start posted for {self.game_type} in #{self.parent_channel.name}")
+        print(f"[abandon_game] Start button synced for {self.game_type} in #{self.parent_channel.name}")
 
     async def join_button_callback(self, interaction: discord.Interaction):
         uid = interaction.user.id
@@ -4108,13 +5781,14 @@ class TournamentLobbyView(discord.ui.View):
             await interaction.response.send_message("🚫 Tournament is full.", ephemeral=True)
             return
 
-        if await player_manager.is_active(uid):
+        if registry.for_player(uid) or await player_manager.is_active(uid):
             await interaction.response.send_message("🚫 You are already in another active match.", ephemeral=True)
             return
 
         # ✅ Append to both
         self.players.append(uid)
         self.manager.players.append(uid)
+        registry.refresh(self.manager)
         await player_manager.activate(uid)
 
         await self.update_message()
@@ -4127,7 +5801,6 @@ class TournamentLobbyView(discord.ui.View):
             # ✅ Sync the manager player list before tournament starts
             self.manager.players = self.players.copy()
             self.manager.started = True
-            pending_games.pop((self.game_type, self.parent_channel.id), None)
 
             self.clear_items()
             if not any(isinstance(item, BettingButtonDropdown) for item in self.children):
@@ -4142,7 +5815,7 @@ class TournamentLobbyView(discord.ui.View):
             await self.manager.start_bracket(interaction)
 
             # ✅ Immediately post a new tournament button
-            await start_new_game_button(self.parent_channel, "tournament")
+            await start_button_manager.sync(self.parent_channel, "tournament")
 
 
     async def abandon_if_not_filled(self):
@@ -4176,7 +5849,8 @@ class TournamentLobbyView(discord.ui.View):
     async def update_message(self, status=None):
         if self.message:
             embed = await self.build_embed(self.message.guild, status=status)
-            await self.message.edit(embed=embed, view=self)
+            async with outbound.slot(PRIORITY_GAME):
+                await self.message.edit(embed=embed, view=self)
 
     async def add_bet(self, uid, uname, amount, choice, interaction):
         # ✅ Block players from betting on others in their own tournament
@@ -4195,6 +5869,11 @@ class TournamentLobbyView(discord.ui.View):
         # ✅ Deduplicate in tournament bets
         self.manager.bets = [b for b in self.manager.bets if b[0] != uid]
         self.manager.bets.append((uid, uname, amount, choice))
+        try:
+            self.manager.bet_odds[uid] = self.manager.champion_odds.get(int(choice))
+        except ValueError:
+            self.manager.bet_odds.pop(uid, None)
+        await save_tournament_state(self.manager)
 
         # ✅ Re-render updated embed
         if self.message:
@@ -4235,7 +5914,7 @@ class PlayerCountModal(discord.ui.Modal, title="Select Tournament Size"):
             )
             return
 
-        if await player_manager.is_active(self.creator.id):
+        if registry.for_player(self.creator.id) or await player_manager.is_active(self.creator.id):
             await interaction.response.send_message(
                 "🚫 You are already in a game or tournament. Finish it first.",
                 ephemeral=True
@@ -4248,7 +5927,7 @@ class PlayerCountModal(discord.ui.Modal, title="Select Tournament Size"):
         # ✅ Create manager and inject test players immediately
         manager = TournamentManager(bot=bot, creator=self.creator.id, max_players=count)
         manager.parent_channel = self.parent_channel
-        interaction.client.tournaments[self.parent_channel.id] = manager
+        registry.add_tournament(manager)
 
         print(f"[DEBUG] IS_TEST_MODE = {IS_TEST_MODE}")
         if IS_TEST_MODE:
@@ -4258,45 +5937,294 @@ class PlayerCountModal(discord.ui.Modal, title="Select Tournament Size"):
                     manager.players.append(pid)
                     await player_manager.activate(pid)  # 
 
-        # ✅ Sync manager and view
-        view = TournamentLobbyView(
-            manager,
-            creator=self.creator,
-            max_players=count,
-            parent_channel=self.parent_channel
-        )
-        manager.view = view
-        view.players = manager.players.copy()
+        # ✅ Sync manager and view
+        view = TournamentLobbyView(
+            manager,
+            creator=self.creator,
+            max_players=count,
+            parent_channel=self.parent_channel
+        )
+        manager.view = view
+        view.players = manager.players.copy()
+
+        if IS_TEST_MODE:
+            view.status = "✅ Tournament full! Matches running — place your bets!"
+
+        try:
+            embed = await view.build_embed(interaction.guild, no_image=True)
+            manager.message = await interaction.channel.send(embed=embed, view=view)
+            view.message = manager.message
+            registry.refresh(manager)
+            print("[✅] Tournament lobby message posted.")
+        except Exception as e:
+            print(f"[❌] Failed to send tournament lobby message: {e}")
+            await interaction.followup.send("❌ Failed to create tournament lobby.", ephemeral=True)
+            return
+
+        if len(view.players) == view.max_players:
+            view.clear_items()
+            view.add_item(BettingButtonDropdown(view))
+            await view.update_message()
+
+            if manager.abandon_task:
+                manager.abandon_task.cancel()
+
+            manager.started = True
+            print("[✅] Starting tournament bracket...")
+            await manager.start_bracket(interaction)
+
+        await interaction.followup.send(
+            f"✅ Tournament created for **{count} players!**",
+            ephemeral=True
+        )
+
+
+######################################
+# ✅ MATCHMAKING QUEUE
+######################################
+
+MATCHMAKING_GAME_TYPES = {gt: size for gt, size in CHANNEL_GAME_MAP.values() if gt != "tournament"}
+MATCHMAKING_BASE_WINDOW = 50       # rating window right after queueing
+MATCHMAKING_WINDOW_GROWTH = 5      # window widens by this many rating points per second waited
+MATCHMAKING_MAX_WINDOW = 800
+MATCHMAKING_TIMEOUT = 15 * 60      # seconds before a ticket is dropped
+
+
+class QueueTicket:
+    def __init__(self, player_id, rating, channel_id, seq):
+        self.player_id = player_id
+        self.rating = rating
+        self.channel_id = channel_id
+        self.seq = seq
+        self.enqueued_at = time.monotonic()
+
+    @property
+    def sort_key(self):
+        return (self.rating, self.seq, self.player_id)
+
+    def window(self, now):
+        waited = now - self.enqueued_at
+        return min(MATCHMAKING_MAX_WINDOW, MATCHMAKING_BASE_WINDOW + MATCHMAKING_WINDOW_GROWTH * waited)
+
+
+class MatchmakingQueue:
+    """Waiting players for one game type, kept sorted by rating.
+
+    find_match() bisects to the anchor's rating window and walks outward to
+    the nearest-rated players, so a match attempt is O(log n + group size).
+    """
+
+    def __init__(self, game_type, group_size):
+        self.game_type = game_type
+        self.group_size = group_size
+        self.entries = []   # sorted QueueTicket.sort_key tuples
+        self.tickets = {}   # player_id -> QueueTicket
+        self.seq = itertools.count()
+
+    def __len__(self):
+        return len(self.tickets)
+
+    def __contains__(self, player_id):
+        return player_id in self.tickets
+
+    def add(self, player_id, rating, channel_id):
+        ticket = QueueTicket(player_id, rating, channel_id, next(self.seq))
+        bisect.insort(self.entries, ticket.sort_key)
+        self.tickets[player_id] = ticket
+        return ticket
+
+    def remove(self, player_id):
+        ticket = self.tickets.pop(player_id, None)
+        if ticket:
+            i = bisect.bisect_left(self.entries, ticket.sort_key)
+            if i < len(self.entries) and self.entries[i] == ticket.sort_key:
+                del self.entries[i]
+        return ticket
+
+    def find_match(self, player_id, now):
+        anchor = self.tickets.get(player_id)
+        if not anchor:
+            return None
+
+        window = anchor.window(now)
+        lo = bisect.bisect_left(self.entries, (anchor.rating - window,))
+        hi = bisect.bisect_right(self.entries, (anchor.rating + window, float("inf")))
+        if hi - lo < self.group_size:
+            return None
+
+        # ✅ Walk outward from the anchor, always taking the closer-rated neighbour
+        pos = bisect.bisect_left(self.entries, anchor.sort_key)
+        left, right = pos - 1, pos + 1
+        group = [anchor.player_id]
+        while len(group) < self.group_size:
+            take_left = left >= lo and (
+                right >= hi or anchor.rating - self.entries[left][0] <= self.entries[right][0] - anchor.rating
+            )
+            if take_left:
+                group.append(self.entries[left][2])
+                left -= 1
+            else:
+                group.append(self.entries[right][2])
+                right += 1
+        return group
+
+    def oldest_first(self):
+        return sorted(self.tickets.values(), key=lambda t: t.enqueued_at)
+
+
+class Matchmaker:
+    def __init__(self):
+        self.queues = {gt: MatchmakingQueue(gt, size) for gt, size in MATCHMAKING_GAME_TYPES.items()}
+        self.joining = set()  # players between the queue check and queue.add
+        self.matches_made = 0
+
+    def queue_of(self, player_id):
+        return next((q for q in self.queues.values() if player_id in q), None)
+
+    async def enqueue(self, player_id, game_type, channel_id):
+        queue = self.queues.get(game_type)
+        if not queue:
+            return f"❌ Matchmaking is not available for **{game_type}**."
+
+        if player_id in self.joining or self.queue_of(player_id):
+            return "✅ You are already in a matchmaking queue."
+
+        # ✅ Reserved before the first await so a double click can't queue the player twice
+        self.joining.add(player_id)
+        try:
+            if registry.for_player(player_id) or await player_manager.is_active(player_id):
+                return "🚫 You are already in another active game or must finish voting first."
+
+            rating = (await player_repo.ranks([player_id], game_type))[0]
+
+            # ✅ No thread id: a queued player isn't in any room thread yet
+            await player_manager.activate(player_id)
+            queue.add(player_id, rating, channel_id)
+        finally:
+            self.joining.discard(player_id)
+        print(f"[Matchmaking] ➕ {player_id} queued for {game_type} at {rating} ({len(queue)} waiting)")
+
+        await self.try_match(queue, player_id)
+        if player_id in queue:
+            return f"🔎 Searching for a **{game_type}** match (rating {rating}). You'll be pulled into a room when one is found."
+        return f"✅ Match found for **{game_type}** — check your new game room!"
+
+    async def dequeue(self, player_id):
+        queue = self.queue_of(player_id)
+        if not queue:
+            return False
+        queue.remove(player_id)
+        await player_manager.deactivate(player_id)
+        print(f"[Matchmaking] ➖ {player_id} left the {queue.game_type} queue")
+        return True
+
+    async def try_match(self, queue, player_id):
+        group = queue.find_match(player_id, time.monotonic())
+        if not group:
+            return False
+
+        channel_id = queue.tickets[player_id].channel_id
+        tickets = [queue.remove(pid) for pid in group]
+
+        # ✅ Balance doubles teams: best + worst vs the middle two
+        if queue.group_size == 4:
+            ranked = sorted(tickets, key=lambda t: t.rating, reverse=True)
+            tickets = [ranked[0], ranked[3], ranked[1], ranked[2]]
+
+        try:
+            await self.start_match(queue.game_type, [t.player_id for t in tickets], channel_id)
+            self.matches_made += 1
+        except Exception as e:
+            print(f"[Matchmaking] ❌ Failed to start {queue.game_type} match for {group}: {e}")
+            for t in tickets:
+                await player_manager.deactivate(t.player_id)
+        return True
+
+    async def start_match(self, game_type, players, channel_id):
+        channel = bot.get_channel(channel_id)
+        print(f"[Matchmaking] 🎯 {game_type} match: {players} in #{channel.name}")
+
+        view = GameView(game_type, players[0], MATCHMAKING_GAME_TYPES[game_type], channel)
+        view.players = list(players)
+        view.matchmade = True
+
+        embed = await view.build_embed(channel.guild, no_image=True)
+        view.message = await channel.send(embed=embed, view=view)
+
+        # ✅ Hand straight into the normal full-lobby → RoomView flow
+        await view.game_full()
+
+    async def tick(self):
+        now = time.monotonic()
+        for queue in self.queues.values():
+            for ticket in queue.oldest_first():
+                if ticket.player_id not in queue:
+                    continue  # already matched this tick
+                if now - ticket.enqueued_at > MATCHMAKING_TIMEOUT:
+                    queue.remove(ticket.player_id)
+                    await player_manager.deactivate(ticket.player_id)
+                    print(f"[Matchmaking] ⏱️ Ticket for {ticket.player_id} expired in {queue.game_type} queue")
+                    continue
+                await self.try_match(queue, ticket.player_id)
+
+
+matchmaker = Matchmaker()
+
+
+class MatchmakingView(discord.ui.View):
+    def __init__(self, game_type):
+        super().__init__(timeout=None)
+        self.game_type = game_type
+
+        find_button = discord.ui.Button(label=f"🔎 Find {game_type} match", style=discord.ButtonStyle.success)
+        find_button.callback = self.find_match
+        self.add_item(find_button)
+
+        leave_button = discord.ui.Button(label="Leave queue", style=discord.ButtonStyle.secondary)
+        leave_button.callback = self.leave_queue
+        self.add_item(leave_button)
 
-        if IS_TEST_MODE:
-            view.status = "✅ Tournament full! Matches running — place your bets!"
+    async def find_match(self, interaction: discord.Interaction):
+        await interaction.response.defer(ephemeral=True)
+        msg = await matchmaker.enqueue(interaction.user.id, self.game_type, interaction.channel.id)
+        await interaction.followup.send(msg, ephemeral=True)
 
-        try:
-            embed = await view.build_embed(interaction.guild, no_image=True)
-            manager.message = await interaction.channel.send(embed=embed, view=view)
-            view.message = manager.message
-            print("[✅] Tournament lobby message posted.")
-        except Exception as e:
-            print(f"[❌] Failed to send tournament lobby message: {e}")
-            await interaction.followup.send("❌ Failed to create tournament lobby.", ephemeral=True)
-            return
+    async def leave_queue(self, interaction: discord.Interaction):
+        if await matchmaker.dequeue(interaction.user.id):
+            await interaction.response.send_message("✅ You left the matchmaking queue.", ephemeral=True)
+        else:
+            await interaction.response.send_message("❌ You are not in a matchmaking queue.", ephemeral=True)
 
-        if len(view.players) == view.max_players:
-            view.clear_items()
-            view.add_item(BettingButtonDropdown(view))
-            await view.update_message()
 
-            if manager.abandon_task:
-                manager.abandon_task.cancel()
+@tree.command(name="queue", description="Join the matchmaking queue for a game type.")
+@app_commands.describe(game_type="Which game type to queue for (singles, doubles, triples)")
+async def queue_command(interaction: discord.Interaction, game_type: str):
+    await interaction.response.defer(ephemeral=True)
+    msg = await matchmaker.enqueue(interaction.user.id, game_type.lower(), interaction.channel.id)
+    await interaction.followup.send(msg, ephemeral=True)
 
-            manager.started = True
-            print("[✅] Starting tournament bracket...")
-            await manager.start_bracket(interaction)
 
-        await interaction.followup.send(
-            f"✅ Tournament created for **{count} players!**",
+@tree.command(name="leave_queue", description="Leave the matchmaking queue.")
+async def leave_queue_command(interaction: discord.Interaction):
+    if await matchmaker.dequeue(interaction.user.id):
+        await interaction.response.send_message("✅ You left the matchmaking queue.", ephemeral=True)
+    else:
+        await interaction.response.send_message("❌ You are not in a matchmaking queue.", ephemeral=True)
+
+
+@tree.command(name="init_queue", description="Post a matchmaking queue button for a game type")
+@app_commands.check(is_admin)
+async def init_queue(interaction: discord.Interaction, game_type: str):
+    game_type = game_type.lower()
+    if game_type not in MATCHMAKING_GAME_TYPES:
+        await interaction.response.send_message(
+            f"❌ Invalid game type. Use: {', '.join(MATCHMAKING_GAME_TYPES)}",
             ephemeral=True
         )
+        return
+
+    await interaction.channel.send(f"🎯 Queue up for a rated **{game_type}** match:", view=MatchmakingView(game_type))
+    await interaction.response.send_message("✅ Matchmaking button posted.", ephemeral=True)
 
 
 @tree.command(name="init_tournament")
@@ -4307,7 +6235,7 @@ async def init_tournament(interaction: discord.Interaction):
     await interaction.response.defer(ephemeral=True)
 
     print("[init_tournament] Checking for existing game or button...")
-    if pending_games.get(("tournament", interaction.channel.id)) or ("tournament", interaction.channel.id) in start_buttons:
+    if registry.tournament(interaction.channel.id) or registry.button(interaction.channel.id, "tournament"):
         print("[init_tournament] Found existing game/button, sending followup...")
         await interaction.followup.send(
             "⚠️ A tournament game is already pending or a button is active here.",
@@ -4370,7 +6298,7 @@ async def set_user_score(
     handicap = float(avg_par) - float(score)
 
     try:
-        await run_db(lambda: supabase
+        await write_db("handicaps", lambda: supabase
             .table("handicaps")
             .upsert({
                 "player_id": str(user.id),
@@ -4417,9 +6345,9 @@ async def init_singles(interaction: discord.Interaction):
     """Creates a singles game lobby with the start button"""
     await interaction.response.defer(ephemeral=True)
 
-    if pending_games.get(("singles", interaction.channel.id)) or ("singles", interaction.channel.id) in start_buttons:
+    if len(registry.lobbies("singles", interaction.channel.id)) >= MAX_LOBBIES_PER_CHANNEL or registry.button(interaction.channel.id, "singles"):
         await interaction.followup.send(
-            "⚠️ A singles game is already pending or a button is active here.",
+            "⚠️ This channel is at its singles lobby cap or a button is already active here.",
             ephemeral=True
         )
         return
@@ -4437,9 +6365,9 @@ async def init_doubles(interaction: discord.Interaction):
     """Creates a doubles game lobby with the start button"""
     await interaction.response.defer(ephemeral=True)
 
-    if pending_games.get(("doubles", interaction.channel.id)) or ("doubles", interaction.channel.id) in start_buttons:
+    if len(registry.lobbies("doubles", interaction.channel.id)) >= MAX_LOBBIES_PER_CHANNEL or registry.button(interaction.channel.id, "doubles"):
         await interaction.followup.send(
-            "⚠️ A doubles game is already pending or a button is active here.",
+            "⚠️ This channel is at its doubles lobby cap or a button is already active here.",
             ephemeral=True
         )
         return
@@ -4457,9 +6385,9 @@ async def init_triples(interaction: discord.Interaction):
     """Creates a triples game lobby with the start button"""
     await interaction.response.defer(ephemeral=True)
 
-    if pending_games.get(("triples", interaction.channel.id)) or ("triples", interaction.channel.id) in start_buttons:
+    if len(registry.lobbies("triples", interaction.channel.id)) >= MAX_LOBBIES_PER_CHANNEL or registry.button(interaction.channel.id, "triples"):
         await interaction.followup.send(
-            "⚠️ A triples game is already pending or a button is active here.",
+            "⚠️ This channel is at its triples lobby cap or a button is already active here.",
             ephemeral=True
         )
         return
@@ -4494,14 +6422,10 @@ async def admin_leaderboard(
 
     await interaction.response.defer()  # ✅ public defer
 
-    # ✅ Fetch all players
-    res = await run_db(lambda: supabase.table("players").select("*").execute())
-    players = res.data or []
-
-    # ✅ Sort numerically by selected game type rank
-    players.sort(
-        key=lambda p: int(p.get("stats", {}).get(game_type, {}).get("wins", 0)),
-        reverse=True
+    # ✅ Stream all players (paged), keeping only the top entries by wins
+    players = await top_n(
+        player_repo.leaderboard_rows(game_type), LEADERBOARD_TOP_N,
+        key=lambda p: int(GameStats.from_dict((p.get("stats") or {}).get(game_type)).wins)
     )
 
     if not players:
@@ -4555,15 +6479,12 @@ async def stats_reset(interaction: discord.Interaction, user: discord.User):
     await interaction.response.defer(ephemeral=True)
 
     try:
-        new_stats = copy.deepcopy(default_template)
-        new_stats["id"] = str(user.id)
+        fresh = PlayerRecord(user.id).to_row()
+        fresh.pop("id")
 
-        # ✅ Exception will be raised on failure
-        res = await run_db(lambda: supabase
-            .table("players")
-            .upsert(new_stats)
-            .execute()
-        )
+        # ✅ Version-checked like every other players write; raises on failure
+        async with player_locks.hold(user.id):
+            await player_writer.modify(user.id, "credits,stats", lambda row: fresh, label="stats_reset")
 
         await interaction.followup.send(
             f"✅ Stats for **{user.display_name}** have been reset (bet history untouched).",
@@ -4585,37 +6506,26 @@ async def stats(interaction: discord.Interaction, user: discord.User = None, dm:
 
     target_user = user or interaction.user
 
-    # ✅ Fetch player row
-    res = await run_db(
-        lambda: supabase.table("players").select("*").eq("id", str(target_user.id)).single().execute()
-    )
-    player = res.data or {}
+    # ✅ Fetch credits + stats only
+    player = await player_repo.profile(target_user.id, local=True)
 
-    credits = player.get("credits", 1000)
-    stats_data = player.get("stats", {})
+    record = PlayerRecord.from_row({"id": target_user.id, **player})
+    credits = record.credits
 
     # ✅ Build sections for each game type
     blocks = []
-    for game_type in ("singles", "doubles", "triples", "tournament"):
-        stats = stats_data.get(game_type, {})
-        rank = stats.get("rank", 1000)
-        trophies = stats.get("trophies", 0)
-        games = stats.get("games_played", 0)
-        wins = stats.get("wins", 0)
-        losses = stats.get("losses", 0)
-        draws = stats.get("draws", 0)
-        streak = stats.get("current_streak", 0)
-        best_streak = stats.get("best_streak", 0)
+    for game_type in PLAYER_GAME_TYPES:
+        stats = record.stats(game_type)
 
         block = [
-            f"{'📈 Rank':<20}: {rank}",
-            f"{'🏆 Trophies':<20}: {trophies}",
-            f"{'🎮 Games Played':<20}: {games}",
-            f"{'✅ Wins':<20}: {wins}",
-            f"{'❌ Losses':<20}: {losses}",
-            f"{'➖ Draws':<20}: {draws}",
-            f"{'🔥 Current Streak':<20}: {streak}",
-            f"{'🏅 Best Streak':<20}: {best_streak}"
+            f"{'📈 Rank':<20}: {stats.rank}",
+            f"{'🏆 Trophies':<20}: {stats.trophies}",
+            f"{'🎮 Games Played':<20}: {stats.games_played}",
+            f"{'✅ Wins':<20}: {stats.wins}",
+            f"{'❌ Losses':<20}: {stats.losses}",
+            f"{'➖ Draws':<20}: {stats.draws}",
+            f"{'🔥 Current Streak':<20}: {stats.current_streak}",
+            f"{'🏅 Best Streak':<20}: {stats.best_streak}"
         ]
         blocks.append(f"**{game_type.title()} Stats**\n```" + "\n".join(block) + "```")
 
@@ -4729,10 +6639,11 @@ async def clear_active(interaction: discord.Interaction, user: discord.User = No
 @app_commands.describe(
     user="User to edit",
     field="Field to change (rank, trophies, credits)",
-    value="New value"
+    value="New value",
+    game_type="Game type for rank/trophies (singles, doubles, triples, tournament)"
 )
 @app_commands.check(is_admin)  # ✅ only admins can run
-async def stats_edit(interaction: discord.Interaction, user: discord.User, field: str, value: int):
+async def stats_edit(interaction: discord.Interaction, user: discord.User, field: str, value: int, game_type: str = "singles"):
     # ✅ Check admin permissions
     if not interaction.user.guild_permissions.administrator:
         await interaction.response.send_message(
@@ -4750,19 +6661,29 @@ async def stats_edit(interaction: discord.Interaction, user: discord.User, field
         )
         return
 
-    # ✅ Upsert in Supabase
-    update = {"id": str(user.id), field: value}
-    res = await run_db(lambda: supabase.table("players").upsert(update).execute())
-
-    if res.status_code != 201 and res.status_code != 200:
+    game_type = game_type.lower()
+    if field != "credits" and game_type not in PLAYER_GAME_TYPES:
         await interaction.response.send_message(
-            f"❌ Error updating stats. Status code: {res.status_code}",
+            f"⚠️ Invalid game type. Choose from: {', '.join(PLAYER_GAME_TYPES)}",
             ephemeral=True
         )
         return
 
+    # ✅ credits is a column (version-checked write); rank and trophies live in the stats JSON
+    try:
+        async with player_locks.hold(user.id):
+            if field == "credits":
+                await player_writer.modify(user.id, "credits", lambda row: {"credits": value}, label="stats_edit")
+            else:
+                await StatPatch(user.id).set(f"{game_type}.{field}", value).apply()
+    except Exception as e:
+        print(f"[DB ERROR] stats_edit failed: {e}")
+        await interaction.response.send_message(f"❌ Error updating stats: {e}", ephemeral=True)
+        return
+
+    target = "credits" if field == "credits" else f"{game_type} {field}"
     await interaction.response.send_message(
-        f"✅ Updated **{field}** for {user.display_name} to **{value}**.",
+        f"✅ Updated **{target}** for {user.display_name} to **{value}**.",
         ephemeral=True
     )
 
@@ -4793,9 +6714,8 @@ async def clear_chat(interaction: discord.Interaction):
         deleted = await channel.purge(limit=1000, check=not_pinned, bulk=True)
 
         # ✅ Remove stale start buttons in this channel
-        for key in list(start_buttons.keys()):
-            if key[0] == channel.id:
-                del start_buttons[key]
+        for game_type in registry.buttons_in(channel.id):
+            registry.pop_button(channel.id, game_type)
 
         await interaction.followup.send(f"🧹 Cleared {len(deleted)} messages.", ephemeral=True)
 
@@ -4824,8 +6744,10 @@ async def clear_pending(interaction: discord.Interaction):
         )
         return
 
-    # 1️⃣ Clear local `pending_games` state
-    pending_games.clear()
+    # 1️⃣ Clear local lobby state (and stop each lobby's abandon timer)
+    for entry in [e for e in registry.entries.values() if e.kind == "lobby"]:
+        entry.obj.cancel_abandon_task()
+    registry.clear("lobby")
 
     # 2️⃣ Clear Supabase `pending_games` table
     await run_db(lambda: supabase
@@ -4836,14 +6758,14 @@ async def clear_pending(interaction: discord.Interaction):
     )
 
     # 3️⃣ Delete start buttons from Discord
-    for msg in list(start_buttons.values()):
+    for msg in registry.all_buttons():
         try:
             await msg.delete()
         except Exception:
             pass
 
-    # 4️⃣ Clear local start_buttons cache
-    start_buttons.clear()
+    # 4️⃣ Clear local start button entries
+    registry.clear("button")
 
     await interaction.response.send_message(
         "✅ All pending games and start buttons have been cleared.",
@@ -4851,6 +6773,90 @@ async def clear_pending(interaction: discord.Interaction):
     )
 
 
+@tree.command(
+    name="admin_status",
+    description="Admin: Show live game counts and bot health"
+)
+@app_commands.check(is_admin)
+async def admin_status(interaction: discord.Interaction):
+    counts = registry.counts()
+
+    embed = discord.Embed(title="📊 Bot Status", color=discord.Color.blurple())
+    embed.add_field(
+        name="🎮 Live Games",
+        value=(
+            f"Lobbies: **{counts['lobby']}**\n"
+            f"Rooms: **{counts['room']}**\n"
+            f"Tournaments: **{counts['tournament']}**\n"
+            f"Start buttons: **{counts['button']}**\n"
+            f"Players tracked: **{counts['players']}**\n"
+            f"Evicted (stale): **{counts['evicted']}**\n"
+            f"Busy rejections: **{GameActor.rejected_total}**"
+        ),
+        inline=False
+    )
+
+    outbound_lines = [
+        f"`{name:<12}` queued **{s['depth']}** · running **{s['in_flight']}** · avg {s['avg_wait_ms']:.0f} ms · max {s['max_wait_ms']:.0f} ms"
+        for name, s in outbound.stats().items()
+    ]
+    outbound_lines.append(f"In flight: **{outbound.in_flight}/{outbound.concurrency}** · tracked buckets: **{len(outbound.buckets)}**")
+    for bucket, seconds in outbound.bucket_waits.most_common(3):
+        outbound_lines.append(f"🚦 Bucket `{bucket[:16]}` waited **{seconds:.1f}s**")
+    embed.add_field(name="📤 Outbound Discord Queue", value="\n".join(outbound_lines), inline=False)
+
+    embed.add_field(
+        name="📣 Broadcasts",
+        value=(
+            f"Sent: **{broadcaster.sent}** · queued: **{broadcaster.queue.qsize()}**\n"
+            f"Alerts folded into digests: **{broadcaster.collapsed}** · webhooks cached: **{len(broadcaster.webhooks)}**"
+        ),
+        inline=False
+    )
+
+    pipeline_lines = [
+        f"`{stage:<14}` ×{st['runs']} · avg {st['avg_ms']:.0f} ms · max {st['max_ms']:.0f} ms · failed {st['failures']}"
+        for stage, st in PostGamePipeline.stats().items()
+    ]
+    embed.add_field(name="🏁 Post-game Pipeline", value="\n".join(pipeline_lines) or "No games finished yet.", inline=False)
+
+    read_lines = [
+        f"`{ns:<14}` {single_flight.calls[ns]} reads · {single_flight.dedup_ratio(ns):.0%} shared"
+        for ns in single_flight.calls
+    ]
+    read_lines.append(f"Overall dedup: **{single_flight.dedup_ratio():.1%}** · in flight: **{len(single_flight.inflight)}**")
+    read_lines.append(f"Player batches: **{player_loader.batches}** · avg ids per query: **{player_loader.avg_batch():.1f}**")
+    if replica.path:
+        replica_state = "ready" if replica.ready else "bootstrapping" if replica.bootstrapping else "offline"
+        read_lines.append(f"Local replica: **{replica_state}** · reads served: **{replica.local_reads}**")
+    embed.add_field(name="🧲 Coalesced Reads", value="\n".join(read_lines), inline=False)
+
+    lock_stats = player_locks.stats()
+    embed.add_field(
+        name="🔒 Player Locks",
+        value=(
+            f"Acquired: **{lock_stats['acquired']}** · contended: **{lock_stats['contended']}** · "
+            f"live keys: **{lock_stats['live_keys']}**\n"
+            f"Wait avg {lock_stats['avg_wait_ms']:.0f} ms · max {lock_stats['max_wait_ms']:.0f} ms"
+        ),
+        inline=False
+    )
+
+    hot = ", ".join(f"<@{pid}> ×{n}" for pid, n in player_writer.hot_players.most_common(3)) or "none"
+    embed.add_field(
+        name="🔁 Player Writes",
+        value=(
+            f"Attempts: **{sum(player_writer.attempts.values())}** · "
+            f"conflict rate: **{player_writer.conflict_rate():.1%}** · "
+            f"gave up: **{sum(player_writer.exhausted.values())}**\n"
+            f"Hot players: {hot}"
+        ),
+        inline=False
+    )
+
+    await interaction.response.send_message(embed=embed, ephemeral=True)
+
+
 @tree.command(
     name="admin_add_credits",
     description="Admin command to add credits to a user"
@@ -4868,10 +6874,20 @@ async def add_credits(interaction: discord.Interaction, user: discord.User, amou
         )
         return
 
-    player = await get_player(user.id)
-    new_credits = player.get("credits", 0) + amount
-
-    await run_db(lambda: supabase.table("players").update({"credits": new_credits}).eq("id", str(user.id)).execute())
+    try:
+        async with player_locks.hold(user.id):
+            row = await player_writer.modify(
+                user.id, "credits",
+                lambda row: {"credits": (row.get("credits") or 0) + amount},
+                label="admin_add_credits"
+            )
+    except PlayerWriteConflict:
+        await interaction.response.send_message(
+            "⚠️ That player's balance is changing too fast right now — try again.",
+            ephemeral=True
+        )
+        return
+    new_credits = row["credits"]
 
     await interaction.response.send_message(
         f"✅ Added {amount} credits to {user.display_name}. New total: {new_credits}.",
@@ -4896,7 +6912,8 @@ async def clear_bet_history(interaction: discord.Interaction, user: discord.User
             .table("bets")
             .delete()
             .eq("player_id", str(user.id))
-            .execute()
+            .execute(),
+            delete=True
         )
 
         # ✅ Robust error check
@@ -4930,14 +6947,18 @@ async def handicap_index(interaction: discord.Interaction, user: discord.User =
 
     target = user or interaction.user
 
-    res = await run_db(lambda: supabase
-        .table("handicaps")
-        .select("handicap")
-        .eq("player_id", str(target.id))
-        .execute()
-    )
+    if replica.ready:
+        rows = replica.handicaps(target.id)
+    else:
+        res = await run_db(lambda: supabase
+            .table("handicaps")
+            .select("handicap")
+            .eq("player_id", str(target.id))
+            .execute()
+        )
+        rows = res.data or []
 
-    differentials = sorted([row["handicap"] for row in res.data or []])
+    differentials = sorted([row["handicap"] for row in rows if row["handicap"] is not None])
     count = min(len(differentials), 8)
 
     if count == 0:
@@ -4964,35 +6985,37 @@ async def handicap_index(interaction: discord.Interaction, user: discord.User =
 async def handicap_leaderboard(interaction: discord.Interaction):
     await interaction.response.defer(ephemeral=True)
 
-    # 1️⃣ Fetch ALL differentials for ALL players
-    res = await run_db(lambda: supabase
-        .table("handicaps")
-        .select("player_id, handicap")
-        .execute()
-    )
-
-    if not res.data:
-        await interaction.followup.send("❌ No handicap data found.", ephemeral=True)
-        return    
+    # 1️⃣ Stream ALL differentials, keeping only each player's best 8 (max-heap of negatives)
+    async def all_handicaps():
+        if replica.ready:
+            for row in replica.handicaps():
+                yield row
+        else:
+            async for row in scan_table("handicaps", "player_id, handicap", key=("player_id", "course_id")):
+                yield row
 
     grouped = defaultdict(list)
-    for row in res.data:
+    async for row in all_handicaps():
         try:
             hcp = float(row["handicap"])
-            grouped[row["player_id"]].append(hcp)
         except (TypeError, ValueError):
             continue  # skip invalid
+        best = grouped[row["player_id"]]
+        if len(best) < 8:
+            heapq.heappush(best, -hcp)
+        elif -best[0] > hcp:
+            heapq.heapreplace(best, -hcp)
 
-    leaderboard = []
-    for pid, diffs in grouped.items():
-        diffs = sorted(diffs)
-        count = min(len(diffs), 8)
-        if count > 0:
-            index = round(sum(diffs[:count]) / count, 1)
-            leaderboard.append((pid, index))
+    if not grouped:
+        await interaction.followup.send("❌ No handicap data found.", ephemeral=True)
+        return
 
-    # 3️⃣ Sort by index ascending (lower is better)
-    leaderboard.sort(key=lambda x: x[1])
+    # 3️⃣ Best indexes first (lower is better), only as many as the embed shows
+    leaderboard = heapq.nsmallest(
+        LEADERBOARD_TOP_N,
+        ((pid, round(-sum(best) / len(best), 1)) for pid, best in grouped.items()),
+        key=lambda x: x[1]
+    )
 
     # 4️⃣ Build embed
     embed = discord.Embed(
@@ -5096,7 +7119,7 @@ async def update_course_average_par(course_id: str):
     new_avg = round(sum(scores) / len(scores), 1)
 
     # 2) Update the course row
-    await run_db(lambda: supabase
+    await write_db("courses", lambda: supabase
         .table("courses")
         .update({"avg_par": new_avg})
         .eq("id", course_id)
@@ -5131,7 +7154,7 @@ class AdminSubmitScoreModal(discord.ui.Modal, title="Admin: Set Best Score"):
             return
 
         # 1️⃣ Insert raw score for the target_user
-        await run_db(lambda: supabase
+        await write_db("handicaps", lambda: supabase
             .table("handicaps")
             .upsert({
                 "player_id": str(self.target_user.id),
@@ -5147,7 +7170,7 @@ class AdminSubmitScoreModal(discord.ui.Modal, title="Admin: Set Best Score"):
         # 3️⃣ Compute & update the handicap for the same user
         handicap = score - new_avg
 
-        await run_db(lambda: supabase
+        await write_db("handicaps", lambda: supabase
             .table("handicaps")
             .update({"handicap": handicap})
             .eq("player_id", str(self.target_user.id))
@@ -5164,6 +7187,100 @@ class AdminSubmitScoreModal(discord.ui.Modal, title="Admin: Set Best Score"):
         )
 
 
+# ✅ Bulk role assignment
+DEFAULT_MEMBER_ROLES = ["singles", "doubles", "triples", "quick-tournament"]
+ROLE_WORKERS = 4             # concurrent add_roles calls (each still waits on the guild bucket)
+ROLE_CHECKPOINT_EVERY = 50   # members between resume checkpoints
+ROLE_PROGRESS_SECONDS = 5    # seconds between live progress edits
+
+
+class RoleEngine:
+    """Resolves roles once (cached by id) and assigns them only to members who lack them."""
+
+    def __init__(self):
+        self.role_ids = {}  # (guild_id, role name) -> role id
+
+    def resolve(self, guild, names):
+        """Return (roles, missing_names) for the given role names."""
+        roles, missing = [], []
+        for name in names:
+            role_id = self.role_ids.get((guild.id, name))
+            role = guild.get_role(role_id) if role_id else None
+            if role is None:
+                role = discord.utils.get(guild.roles, name=name)
+                if role:
+                    self.role_ids[(guild.id, name)] = role.id
+            if role:
+                roles.append(role)
+            else:
+                missing.append(name)
+        return roles, missing
+
+    async def assign(self, member, roles, reason=None):
+        """Add whichever of `roles` the member lacks; returns True if a call was made."""
+        lacking = [r for r in roles if r not in member.roles]
+        if not lacking:
+            return False
+        async with outbound.slot(PRIORITY_COSMETIC):
+            await member.add_roles(*lacking, reason=reason)
+        return True
+
+    async def bulk_assign(self, guild, roles, reason=None, on_progress=None):
+        """Assign `roles` across the guild with a bounded worker pool, resuming from the last checkpoint."""
+        job_key = f"role_job_{guild.id}_{'_'.join(str(r.id) for r in sorted(roles, key=lambda r: r.id))}"
+        resume_after = int(await get_parameter(job_key) or 0)
+
+        members = sorted((m for m in guild.members if not m.bot), key=lambda m: m.id)
+        todo = [m for m in members if m.id > resume_after and any(r not in m.roles for r in roles)]
+        progress = {"total": len(todo), "done": 0, "failed": 0, "skipped": len(members) - len(todo)}
+        print(f"[Roles] ▶️ {len(todo)} members need roles in {guild.name} "
+              f"({progress['skipped']} skipped, resuming after {resume_after})")
+
+        queue = asyncio.Queue()
+        for member in todo:
+            queue.put_nowait(member)
+
+        finished = set()
+        watermark = 0  # todo[:watermark] are all finished — safe to checkpoint
+
+        async def worker():
+            nonlocal watermark
+            while not queue.empty():
+                member = queue.get_nowait()
+                try:
+                    await self.assign(member, roles, reason=reason)
+                except Exception as e:
+                    progress["failed"] += 1
+                    print(f"[Roles] ⚠️ Error adding roles to {member}: {e}")
+                progress["done"] += 1
+                finished.add(member.id)
+
+                while watermark < len(todo) and todo[watermark].id in finished:
+                    watermark += 1
+                if progress["done"] % ROLE_CHECKPOINT_EVERY == 0 and watermark:
+                    await set_parameter(job_key, str(todo[watermark - 1].id))
+
+        async def report():
+            while True:
+                await asyncio.sleep(ROLE_PROGRESS_SECONDS)
+                await on_progress(progress)
+
+        reporter = asyncio.create_task(report()) if on_progress else None
+        started = time.perf_counter()
+        try:
+            await asyncio.gather(*(worker() for _ in range(ROLE_WORKERS)))
+        finally:
+            if reporter:
+                reporter.cancel()
+
+        await set_parameter(job_key, "0")  # ✅ finished — next run starts from the top (and skips by diff)
+        print(f"[Roles] ✅ {progress['done'] - progress['failed']} members updated in {time.perf_counter() - started:.1f}s")
+        return progress
+
+
+role_engine = RoleEngine()
+
+
 # ✅ Register directly on your bot instance (no separate Cog needed)
 @app_commands.command(
     name="admin_update_roles",
@@ -5179,35 +7296,38 @@ async def update_roles(interaction: discord.Interaction, role_names: str):
     # Parse role names
     names = [r.strip() for r in role_names.split(",")]
 
-    # Find roles
-    roles_to_add = []
-    for name in names:
-        role = discord.utils.get(guild.roles, name=name)
-        if not role:
-            await interaction.response.send_message(
-                f"❌ Role `{name}` not found.",
-                ephemeral=True
-            )
-            return
-        roles_to_add.append(role)
+    # Find roles (cached by id after the first lookup)
+    roles_to_add, missing = role_engine.resolve(guild, names)
+    if missing:
+        await interaction.response.send_message(
+            f"❌ Role `{missing[0]}` not found.",
+            ephemeral=True
+        )
+        return
 
+    label = ", ".join(r.name for r in roles_to_add)
     await interaction.response.send_message(
-        f"⏳ Assigning roles `{', '.join([r.name for r in roles_to_add])}` to all existing members...",
+        f"⏳ Assigning roles `{label}` to all existing members...",
         ephemeral=True
     )
 
-    count = 0
-    for member in guild.members:
-        if member.bot:
-            continue  # Optional: skip bots
+    async def show_progress(progress):
         try:
-            await member.add_roles(*roles_to_add, reason="Bulk role update via slash command")
-            count += 1
+            async with outbound.slot(PRIORITY_COSMETIC):
+                await interaction.edit_original_response(
+                    content=f"⏳ Assigning `{label}` — **{progress['done']}/{progress['total']}** done "
+                            f"({progress['skipped']} already had them, {progress['failed']} failed)"
+                )
         except Exception as e:
-            print(f"Error adding roles to {member}: {e}")
+            print(f"[Roles] ⚠️ Progress update failed: {e}")
+
+    progress = await role_engine.bulk_assign(
+        guild, roles_to_add, reason="Bulk role update via slash command", on_progress=show_progress
+    )
 
     await interaction.followup.send(
-        f"✅ Done! Updated roles for **{count}** existing members.",
+        f"✅ Done! Updated roles for **{progress['done'] - progress['failed']}** members "
+        f"({progress['skipped']} already had them).",
         ephemeral=True
     )
 
@@ -5217,17 +7337,15 @@ bot.tree.add_command(update_roles)
 
 @bot.event
 async def on_member_join(member):
-    # List of role names you want to auto-assign
-    role_names = ["singles", "doubles", "triples, quick-tournament"]
-
-    roles = []
-    for name in role_names:
-        role = discord.utils.get(member.guild.roles, name=name)
-        if role:
-            roles.append(role)
+    roles, missing = role_engine.resolve(member.guild, DEFAULT_MEMBER_ROLES)
+    if missing:
+        print(f"[Roles] ⚠️ Auto-roles not found in {member.guild.name}: {missing}")
 
     if roles:
-        await member.add_roles(*roles)
+        await role_engine.assign(member, roles, reason="Auto roles on join")
+
+    if not member.bot:
+        await sync_member_players([member])
 
 async def save_game_state(manager, view, room_view):
     """Store the current active game in Supabase for resilience."""
@@ -5262,11 +7380,108 @@ async def save_game_state(manager, view, room_view):
     await run_db(write_state)
 
 
+async def save_tournament_state(manager, status="running"):
+    """Checkpoint a tournament's bracket so it can resume after a restart."""
+    if not manager.message or not manager.bracket:
+        return
+
+    data = {
+        "tournament_id": str(manager.message.id),
+        "parent_channel_id": str(manager.parent_channel.id),
+        "creator_id": str(manager.creator.id if hasattr(manager.creator, "id") else manager.creator),
+        "max_players": int(manager.max_players),
+        "players": [int(p) for p in manager.players],
+        "bets": [
+            {"uid": int(uid), "uname": str(uname), "amount": int(amount), "choice": str(choice), "odds": manager.bet_odds.get(uid)}
+            for (uid, uname, amount, choice) in manager.bets
+        ],
+        "course": manager.course,
+        "bracket": manager.bracket.to_dict(),
+        "status": status,
+    }
+
+    try:
+        await run_db(lambda: supabase.table("tournaments").upsert(data).execute())
+    except Exception as e:
+        print(f"[save_tournament_state] ❌ Failed to checkpoint tournament {data['tournament_id']}: {e}")
+
+
+async def restore_tournaments(bot):
+    """Rebuild running tournaments (manager, lobby and open match rooms) from their checkpoints."""
+    rows = [
+        row async for row in scan_table(
+            "tournaments", key="tournament_id", where=lambda q: q.eq("status", "running")
+        )
+    ]
+
+    if not rows:
+        print("[restore] No running tournaments to restore.")
+        return
+
+    for row in rows:
+        try:
+            parent_channel = bot.get_channel(int(row["parent_channel_id"]))
+            if not parent_channel or registry.tournament(int(row["parent_channel_id"])):
+                continue
+            guild = parent_channel.guild
+
+            manager = TournamentManager(bot=bot, creator=int(row["creator_id"]), max_players=row["max_players"])
+            manager.players = [int(p) for p in row["players"]]
+            manager.parent_channel = parent_channel
+            manager.started = True
+            manager.course = row.get("course")
+            manager.bets = [(int(b["uid"]), b["uname"], int(b["amount"]), str(b["choice"])) for b in row.get("bets") or []]
+            manager.bet_odds = {int(b["uid"]): b["odds"] for b in row.get("bets") or [] if b.get("odds")}
+            manager.bracket = TournamentBracket.from_dict(row["bracket"])
+            await manager.refresh_odds()
+            manager.message = await parent_channel.fetch_message(int(row["tournament_id"]))
+            manager.abandon_task.cancel()
+
+            lobby_view = TournamentLobbyView(
+                manager,
+                creator=manager.creator,
+                max_players=manager.max_players,
+                parent_channel=parent_channel
+            )
+            lobby_view.players = manager.players.copy()
+            lobby_view.bets = manager.bets
+            lobby_view.message = manager.message
+            lobby_view.clear_items()
+            lobby_view.add_item(BettingButtonDropdown(lobby_view))
+            manager.view = lobby_view
+
+            # ✅ Re-attach rooms for matches that already have a thread
+            for match in manager.bracket.open_matches():
+                if not match.thread_id or not match.message_id:
+                    continue
+                try:
+                    thread = await bot.fetch_channel(match.thread_id)
+                    msg = await thread.fetch_message(match.message_id)
+                except discord.HTTPException as e:
+                    print(f"[restore] ⚠️ Room for match {match.key} is gone ({e}) — recreating.")
+                    match.thread_id = match.message_id = None
+                    continue
+
+                room_view = manager.build_room_view(guild, match, manager.course, thread, thread.name)
+                room_view.message = msg
+                room_view.lobby_embed = await room_view.build_room_embed(guild)
+                await msg.edit(embed=room_view.lobby_embed, view=room_view)
+                registry.refresh(room_view)
+
+            registry.add_tournament(manager)
+
+            # ✅ Create rooms that were never set up before the restart
+            await manager.run_round(guild)
+            print(f"[restore] ✅ Restored tournament {row['tournament_id']} at round {manager.bracket.current_round}")
+
+        except Exception as e:
+            print(f"[restore] ❌ Error restoring tournament {row.get('tournament_id')}: {e}")
+
+
 async def restore_active_games(bot):
     """Load saved games from Supabase and rebuild Tournament managers + lobby + RoomViews."""
 
-    result = await run_db(lambda: supabase.table("active_games").select("*").execute())
-    active_games = result.data
+    active_games = [g async for g in scan_table("active_games", key="game_id")]
 
     if not active_games:
         print("[restore] No active games to restore.")
@@ -5284,7 +7499,9 @@ async def restore_active_games(bot):
                 print(f"[restore] ❌ Parent channel {g['parent_channel_id']} not found. Skipping.")
                 continue
 
-            # ✅ Room sub-thread
+            # ✅ Room sub-thread (already live in this process → nothing to restore)
+            if registry.room(int(g["thread_id"])):
+                continue
             room_thread = await bot.fetch_channel(int(g["thread_id"]))
             if not room_thread:
                 print(f"[restore] ❌ Room thread {g['thread_id']} not found. Skipping.")
@@ -5376,9 +7593,7 @@ async def restore_active_games(bot):
                 await room_message.edit(embed=room_embed, view=room_view)
 
                 # ✅ Track RoomView
-                if not hasattr(bot, "rooms"):
-                    bot.rooms = {}
-                bot.rooms[room_thread.id] = room_view
+                registry.add_room(room_view)
 
                 print(f"[restore] ✅ Restored RoomView in thread #{room_thread.name}")
 
@@ -5387,9 +7602,7 @@ async def restore_active_games(bot):
                 await lobby_view.start_betting_phase()
 
             # ✅ Track TournamentManager
-            if not hasattr(bot, "tournament"):
-                bot.tournaments = {}
-            bot.tournaments[parent_channel.id] = manager
+            registry.add_tournament(manager)
 
             print(f"[restore] ✅ Restored lobby + manager for parent channel #{parent_channel.name}")
 
@@ -5425,39 +7638,27 @@ async def show_stat(interaction: discord.Interaction):
 
     user = interaction.user
 
-    # ✅ Fetch player row
-    res = await run_db(
-        lambda: supabase.table("players").select("*").eq("id", str(user.id)).single().execute()
-    )
-    player = res.data or {}
+    # ✅ Fetch credits + stats only
+    player = await player_repo.profile(user.id, local=True)
 
-    credits = player.get("credits", 1000)
-    stats_data = player.get("stats", {})
-    games_since_credit = stats_data.get("games_since_credit", 0)
-    remaining_games = max(0, 10 - games_since_credit)
+    record = PlayerRecord.from_row({"id": user.id, **player})
+    credits = record.credits
+    remaining_games = max(0, GAMES_PER_CREDIT_REWARD - record.games_since_credit)
 
     # ✅ Build blocks per game type
     blocks = []
-    for game_type in ("singles", "doubles", "triples", "tournament"):
-        stats = stats_data.get(game_type, {})
-        rank = stats.get("rank", 1000)
-        trophies = stats.get("trophies", 0)
-        games = stats.get("games_played", 0)
-        wins = stats.get("wins", 0)
-        losses = stats.get("losses", 0)
-        draws = stats.get("draws", 0)
-        streak = stats.get("current_streak", 0)
-        best_streak = stats.get("best_streak", 0)
+    for game_type in PLAYER_GAME_TYPES:
+        stats = record.stats(game_type)
 
         block = [
-            f"{'📈 Rank':<20}: {rank}",
-            f"{'🏆 Trophies':<20}: {trophies}",
-            f"{'🎮 Games Played':<20}: {games}",
-            f"{'✅ Wins':<20}: {wins}",
-            f"{'❌ Losses':<20}: {losses}",
-            f"{'➖ Draws':<20}: {draws}",
-            f"{'🔥 Current Streak':<20}: {streak}",
-            f"{'🏅 Best Streak':<20}: {best_streak}"
+            f"{'📈 Rank':<20}: {stats.rank}",
+            f"{'🏆 Trophies':<20}: {stats.trophies}",
+            f"{'🎮 Games Played':<20}: {stats.games_played}",
+            f"{'✅ Wins':<20}: {stats.wins}",
+            f"{'❌ Losses':<20}: {stats.losses}",
+            f"{'➖ Draws':<20}: {stats.draws}",
+            f"{'🔥 Current Streak':<20}: {stats.current_streak}",
+            f"{'🏅 Best Streak':<20}: {stats.best_streak}"
         ]
         blocks.append(f"**{game_type.title()} Stats**\n```" + "\n".join(block) + "```")
 
@@ -5476,14 +7677,7 @@ async def show_stat(interaction: discord.Interaction):
 
 @tree.command(name="show_stars", description="See how many stars you have.")
 async def show_stars(interaction: discord.Interaction):
-    user_id = interaction.user.id
-    pdata = await get_player(user_id)
-
-    if not pdata:
-        await interaction.response.send_message("❌ Could not find your profile.", ephemeral=True)
-        return
-
-    credits = pdata.get("credits", 0)
+    credits = await player_repo.credits(interaction.user.id, local=True)
     await interaction.response.send_message(f"⭐ You have **{credits} stars**.", ephemeral=True)
 
 @tree.command(name="golden_hour")
@@ -5500,101 +7694,64 @@ async def golden_hour(interaction: discord.Interaction):
     view.message = msg
 
 
-default_template = {
-    "credits": 1000,
-    "stats": {
-        "singles": {
-            "rank": 1000,
-            "wins": 0,
-            "losses": 0,
-            "draws": 0,
-            "games_played": 0,
-            "current_streak": 0,
-            "best_streak": 0,
-            "trophies": 0
-        },
-        "doubles": {
-            "rank": 1000,
-            "wins": 0,
-            "losses": 0,
-            "draws": 0,
-            "games_played": 0,
-            "current_streak": 0,
-            "best_streak": 0,
-            "trophies": 0
-        },
-        "triples": {
-            "rank": 1000,
-            "wins": 0,
-            "losses": 0,
-            "draws": 0,
-            "games_played": 0,
-            "current_streak": 0,
-            "best_streak": 0,
-            "trophies": 0
-        },
-        "tournament": {
-            "rank": 1000,
-            "wins": 0,
-            "losses": 0,
-            "draws": 0,
-            "games_played": 0,
-            "current_streak": 0,
-            "best_streak": 0,
-            "trophies": 0
-        }
-    }
-}
-
-@tree.command(name="admin_sync_players", description="Sync all server members to the players table if not already present.")
-@app_commands.checks.has_permissions(administrator=True)
-async def sync_players(interaction: discord.Interaction):
-    await interaction.response.defer(ephemeral=True)
+PLAYER_SYNC_PAGE = 1000    # ids per page when loading existing players
+PLAYER_SYNC_CHUNK = 500    # rows per insert batch
+PLAYER_SYNC_DIRECT = 50    # below this many members, skip the id load and insert-or-ignore directly
 
-    guild = interaction.guild
-    if not guild:
-        await interaction.followup.send("❌ This command must be used inside a server.", ephemeral=True)
-        return
 
-    members = guild.members
-    guild_id = str(guild.id)
-    added, skipped = 0, 0
+async def load_player_ids():
+    """All existing player ids, loaded a page at a time."""
+    return {str(row["id"]) async for row in scan_table("players", "id", page_size=PLAYER_SYNC_PAGE)}
 
-    for member in members:
-        if member.bot:
-            continue
 
-        user_id = str(member.id)
+async def sync_member_players(members):
+    """Make sure every non-bot member has a players row. Returns (added, skipped, seconds)."""
+    started = time.perf_counter()
+    member_ids = sorted({str(m.id) for m in members if not m.bot})
 
+    if len(member_ids) <= PLAYER_SYNC_DIRECT:
+        missing = member_ids  # ✅ cheap path (e.g. on_member_join): let the conflict clause skip existing rows
+    else:
+        existing = await load_player_ids()
+        missing = [pid for pid in member_ids if pid not in existing]
+
+    added = 0
+    for i in range(0, len(missing), PLAYER_SYNC_CHUNK):
+        rows = [
+            PlayerRecord(pid).to_row()
+            for pid in missing[i:i + PLAYER_SYNC_CHUNK]
+        ]
         try:
-            exists = await run_db(lambda: supabase
+            res = await write_db("players", lambda: supabase
                 .table("players")
-                .select("id")
-                .eq("id", user_id)
-                .maybe_single()
+                .upsert(rows, on_conflict="id", ignore_duplicates=True)
                 .execute()
             )
+            added += len(res.data or [])  # ✅ only rows that were actually inserted come back
+        except Exception as e:
+            print(f"[sync_players] ❌ Failed to insert chunk at {i}: {e}")
 
-            if exists and exists.data:
-                skipped += 1
-                continue
+    elapsed = time.perf_counter() - started
+    skipped = len(member_ids) - added
+    if len(member_ids) > 1:
+        print(f"[sync_players] ✅ {len(member_ids)} members: {added} added, {skipped} existing in {elapsed:.2f}s")
+    return added, skipped, elapsed
 
-            await run_db(lambda: supabase
-                .table("players")
-                .insert({
-                    "id": user_id,
-                    "credits": default_template["credits"],
-                    "stats": default_template["stats"]
-                })
-                .execute()
-            )
-            added += 1
 
-        except Exception as e:
-            print(f"[sync_players] ❌ Failed to sync {user_id}: {e}")
+@tree.command(name="admin_sync_players", description="Sync all server members to the players table if not already present.")
+@app_commands.checks.has_permissions(administrator=True)
+async def sync_players(interaction: discord.Interaction):
+    await interaction.response.defer(ephemeral=True)
+
+    guild = interaction.guild
+    if not guild:
+        await interaction.followup.send("❌ This command must be used inside a server.", ephemeral=True)
+        return
+
+    added, skipped, elapsed = await sync_member_players(guild.members)
 
     await interaction.followup.send(
-        f"✅ Player sync complete:\n• Added: `{added}`\n• Skipped (already existed): `{skipped}`",
+        f"✅ Player sync complete in `{elapsed:.2f}s`:\n• Added: `{added}`\n• Skipped (already existed): `{skipped}`",
         ephemeral=True
     )
 
@@ -5607,18 +7764,21 @@ async def my_handicaps(interaction: discord.Interaction, user: discord.User = No
     player_id = str(target.id)
     display_name = target.display_name
 
-    try:
-        res = await run_db(lambda: supabase
-            .rpc("get_player_handicaps", {
-                "player_id_input": player_id
-            }).execute()
-        )
-    except Exception as e:
-        print(f"[my_handicaps] RPC call failed: {e}")
-        await interaction.followup.send("❌ Failed to fetch data from database.", ephemeral=True)
-        return
+    if replica.ready:
+        data = replica.handicap_summary(player_id)
+    else:
+        try:
+            res = await run_db(lambda: supabase
+                .rpc("get_player_handicaps", {
+                    "player_id_input": player_id
+                }).execute()
+            )
+        except Exception as e:
+            print(f"[my_handicaps] RPC call failed: {e}")
+            await interaction.followup.send("❌ Failed to fetch data from database.", ephemeral=True)
+            return
 
-    data = res.data if res and res.data else []
+        data = res.data if res and res.data else []
 
     if not data:
         await interaction.followup.send(
@@ -5641,7 +7801,16 @@ async def on_ready():
 
     # ✅ Optional: restore active games if needed
     # await restore_active_games(bot)
+    await restore_tournaments(bot)
+    asyncio.create_task(resume_game_results())
+    if replica.path:
+        asyncio.create_task(replica.bootstrap())
+    for guild in bot.guilds:
+        asyncio.create_task(sync_member_players(guild.members))
     auto_post_start_buttons.start()
+    run_matchmaking.start()
+    if thread_pool.enabled:
+        replenish_thread_pools.start()
 
     # ✅ Get your main guild and channel
     guild = bot.get_guild(1368622436454633633)
@@ -5658,10 +7827,29 @@ async def on_ready():
     bot.loop.create_task(periodic_cleanup())
 
 
+@bot.event
+async def on_raw_message_delete(payload: discord.RawMessageDeleteEvent):
+    # ✅ A start button deleted by hand (or by a mod) comes straight back
+    await start_button_manager.on_message_deleted(payload.channel_id, payload.message_id)
+
+
 @tasks.loop(minutes=1)
 async def auto_post_start_buttons():
+    evicted = registry.evict_stale()
+    if evicted:
+        print(f"[Registry] 🧹 Evicted {evicted} stale entries.")
     await ensure_start_buttons(bot)
 
+
+@tasks.loop(seconds=5)
+async def run_matchmaking():
+    await matchmaker.tick()
+
+
+@tasks.loop(minutes=2)
+async def replenish_thread_pools():
+    await thread_pool.replenish_all(bot)
+
 async def main():
     for attempt in range(5):
         try:
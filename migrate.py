@@ -0,0 +1,98 @@
+"""
+Apply the versioned SQL in migrations/ to a Postgres database.
+
+    python migrate.py            # apply everything that's pending
+    python migrate.py status     # list applied / pending versions
+
+Connects to DATABASE_URL (the Supabase project's direct connection string,
+or a local Postgres for benchmarking). Each file runs in its own transaction
+and is recorded in schema_migrations, so re-running is a no-op.
+"""
+import os
+import sys
+import time
+from pathlib import Path
+
+import psycopg
+from dotenv import load_dotenv
+
+load_dotenv()
+
+DATABASE_URL = os.getenv("DATABASE_URL")
+MIGRATIONS_DIR = Path(__file__).resolve().parent / "migrations"
+
+
+def discover():
+    """[(version, path)] sorted by version — files are named NNNN_description.sql."""
+    found = []
+    for path in sorted(MIGRATIONS_DIR.glob("*.sql")):
+        version = path.name.split("_", 1)[0]
+        if not version.isdigit():
+            print(f"[migrate] ⚠️ Skipping {path.name}: name must start with a version number")
+            continue
+        found.append((version, path))
+    return found
+
+
+def applied_versions(conn):
+    conn.execute("""
+        create table if not exists schema_migrations (
+            version    text primary key,
+            name       text not null,
+            applied_at timestamptz not null default now()
+        )
+    """)
+    return {row[0] for row in conn.execute("select version from schema_migrations")}
+
+
+def apply(conn, version, path):
+    started = time.perf_counter()
+    with conn.transaction():
+        conn.execute(path.read_text())
+        conn.execute(
+            "insert into schema_migrations (version, name) values (%s, %s)",
+            (version, path.name)
+        )
+    print(f"[migrate] ✅ {path.name} in {(time.perf_counter() - started) * 1000:.0f}ms")
+
+
+def main(argv):
+    if not DATABASE_URL:
+        print("[migrate] ❌ DATABASE_URL is not set")
+        return 1
+
+    command = argv[1] if len(argv) > 1 else "up"
+    migrations = discover()
+
+    # ✅ Autocommit so each migration's transaction() is a real transaction, not a savepoint
+    with psycopg.connect(DATABASE_URL, autocommit=True) as conn:
+        done = applied_versions(conn)
+        pending = [(v, p) for v, p in migrations if v not in done]
+
+        if command == "status":
+            for version, path in migrations:
+                print(f"{'✅' if version in done else '⏳'} {path.name}")
+            return 0
+        if command != "up":
+            print(f"[migrate] ❌ Unknown command: {command} (use 'up' or 'status')")
+            return 1
+
+        if not pending:
+            print("[migrate] ✅ Schema is up to date.")
+            return 0
+
+        for version, path in pending:
+            try:
+                apply(conn, version, path)
+            except psycopg.Error as e:
+                print(f"[migrate] ❌ {path.name} failed, rolled back: {e}")
+                return 1
+
+        # ✅ Let PostgREST (Supabase) pick up new tables and RPCs; harmless on plain Postgres
+        conn.execute("notify pgrst, 'reload schema'")
+        print(f"[migrate] ✅ Applied {len(pending)} migration(s).")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
@@ -0,0 +1,44 @@
+-- Core tables. `if not exists` so an existing Supabase project can adopt this as its baseline.
+
+create table if not exists players (
+    id          text primary key,              -- Discord user id
+    credits     integer not null default 1000,
+    stats       jsonb   not null default '{}'::jsonb,
+    version     integer not null default 0     -- bumped by every write; compare-and-swap guard
+);
+
+-- Projects created before versioned writes
+alter table players add column if not exists version integer not null default 0;
+
+create table if not exists courses (
+    id          bigint generated by default as identity primary key,
+    name        text not null unique,
+    image_url   text,
+    course_par  numeric,
+    avg_par     numeric
+);
+
+create table if not exists handicaps (
+    player_id   text   not null,
+    course_id   bigint not null references courses (id) on delete cascade,
+    score       numeric,
+    handicap    numeric,
+    primary key (player_id, course_id)         -- upserts resolve on this
+);
+
+create table if not exists bets (
+    id          bigint generated by default as identity primary key,
+    player_id   text    not null,
+    game_id     text    not null,              -- lobby message id
+    choice      text    not null,
+    amount      integer not null check (amount > 0),
+    payout      integer,
+    odds        numeric,
+    won         boolean,                       -- null until settled (and after a draw refund)
+    created_at  timestamptz not null default now()
+);
+
+create table if not exists parameters (
+    key         text primary key,
+    value       text
+);
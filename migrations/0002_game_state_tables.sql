@@ -0,0 +1,41 @@
+-- Live game state the bot checkpoints so it can recover after a restart.
+
+create table if not exists active_players (
+    player_id   text primary key,
+    thread_id   text,
+    created_at  timestamptz not null default now()
+);
+
+create table if not exists active_games (
+    game_id           text primary key,        -- lobby message id
+    game_type         text not null,
+    parent_channel_id text,
+    thread_id         text,
+    room_message_id   text,
+    players           jsonb not null default '[]'::jsonb,
+    bets              jsonb not null default '[]'::jsonb,
+    max_players       integer,
+    started           boolean not null default false,
+    created_at        timestamptz not null default now()
+);
+
+create table if not exists pending_games (
+    game_type   text not null,
+    channel_id  text not null,
+    players     jsonb not null default '[]'::jsonb,
+    max_players integer,
+    primary key (game_type, channel_id)        -- upsert on_conflict target
+);
+
+create table if not exists tournaments (
+    tournament_id     text primary key,        -- lobby message id
+    parent_channel_id text,
+    creator_id        text,
+    max_players       integer,
+    players           jsonb not null default '[]'::jsonb,
+    bets              jsonb not null default '[]'::jsonb,
+    course            jsonb,
+    bracket           jsonb,
+    status            text not null default 'running',
+    updated_at        timestamptz not null default now()
+);
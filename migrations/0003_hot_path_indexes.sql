@@ -0,0 +1,20 @@
+-- Indexes for the query shapes the bot issues on every game, bet and cleanup pass.
+
+-- Bet history / clear_bet_history: where player_id = ?
+create index if not exists bets_player_id_idx on bets (player_id);
+-- Settlement and refunds: where game_id = ? and player_id = ? and choice = ?
+create index if not exists bets_game_player_choice_idx on bets (game_id, player_id, choice);
+
+-- (player_id, course_id) lookups are served by the primary key.
+-- Course leaderboards and average par: where course_id = ? order by score
+create index if not exists handicaps_course_score_idx on handicaps (course_id, score);
+
+-- Stale cleanup: where created_at < now() - interval '2 hours'
+create index if not exists active_players_created_at_idx on active_players (created_at);
+-- Releasing a finished room: where thread_id = ?
+create index if not exists active_players_thread_id_idx on active_players (thread_id);
+
+-- active_games.game_id and pending_games (game_type, channel_id) are primary keys.
+
+-- Restart recovery: where status = 'running'
+create index if not exists tournaments_status_idx on tournaments (status);
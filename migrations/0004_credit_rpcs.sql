@@ -0,0 +1,32 @@
+-- Server-side credit changes. Both bump players.version so they serialize
+-- with the bot's compare-and-swap writes.
+
+create or replace function deduct_credits_atomic(user_id bigint, amount integer)
+returns boolean
+language plpgsql
+as $$
+begin
+    update players
+       set credits = credits - amount,
+           version = version + 1
+     where id = user_id::text
+       and credits >= amount;
+    return found;
+end;
+$$;
+
+create or replace function add_credits_atomic(user_id bigint, amount integer)
+returns integer
+language plpgsql
+as $$
+declare
+    new_credits integer;
+begin
+    update players
+       set credits = credits + amount,
+           version = version + 1
+     where id = user_id::text
+    returning credits into new_credits;
+    return new_credits;
+end;
+$$;
@@ -0,0 +1,75 @@
+-- Partial updates of players.stats and the handicap summary used by /my_handicaps.
+
+-- p_ops: [{"op": "inc", "path": ["singles", "rank"], "value": 12, "default": 1000},
+--         {"op": "set", "path": ["singles", "current_streak"], "value": 0},
+--         {"op": "max", "path": ["singles", "best_streak"], "from": ["singles", "current_streak"]}]
+-- Ops apply in order under a row lock; returns the stats after the patch (null if no such player).
+create or replace function patch_player_stats(p_player_id text, p_ops jsonb)
+returns jsonb
+language plpgsql
+as $$
+declare
+    s       jsonb;
+    op      jsonb;
+    path    text[];
+    current numeric;
+    other   numeric;
+    i       integer;
+begin
+    select stats into s from players where id = p_player_id for update;
+    if not found then
+        return null;
+    end if;
+    s := coalesce(s, '{}'::jsonb);
+
+    for op in select * from jsonb_array_elements(p_ops) loop
+        path := array(select jsonb_array_elements_text(op -> 'path'));
+
+        -- jsonb_set only creates the last key; make sure every parent object exists
+        for i in 1 .. coalesce(array_length(path, 1), 0) - 1 loop
+            if jsonb_typeof(s #> path[1:i]) is distinct from 'object' then
+                s := jsonb_set(s, path[1:i], '{}'::jsonb, true);
+            end if;
+        end loop;
+
+        case op ->> 'op'
+            when 'inc' then
+                current := coalesce((s #>> path)::numeric, (op ->> 'default')::numeric, 0);
+                s := jsonb_set(s, path, to_jsonb(current + (op ->> 'value')::numeric), true);
+            when 'set' then
+                s := jsonb_set(s, path, op -> 'value', true);
+            when 'max' then
+                current := coalesce((s #>> path)::numeric, 0);
+                other := coalesce((s #>> array(select jsonb_array_elements_text(op -> 'from')))::numeric, 0);
+                s := jsonb_set(s, path, to_jsonb(greatest(current, other)), true);
+            else
+                raise exception 'patch_player_stats: unknown op %', op ->> 'op';
+        end case;
+    end loop;
+
+    update players
+       set stats = s,
+           version = version + 1
+     where id = p_player_id;
+    return s;
+end;
+$$;
+
+create or replace function get_player_handicaps(player_id_input text)
+returns table (
+    course_id   bigint,
+    course_name text,
+    course_par  numeric,
+    avg_par     numeric,
+    best_score  numeric,
+    handicap    numeric
+)
+language sql
+stable
+as $$
+    select c.id, c.name, c.course_par, c.avg_par, h.score, h.handicap
+      from handicaps h
+      join courses c on c.id = h.course_id
+     where h.player_id = player_id_input
+     order by c.name;
+$$;
@@ -0,0 +1,12 @@
+-- Intentionally a no-op; kept so the version sequence has no gap.
+--
+-- This migration used to add a handicaps.id scan key and a bets(created_at) index for the
+-- local replica bootstrap. Keyset scans now page handicaps on its (player_id, course_id)
+-- primary key and the replica no longer copies bets, so neither is needed.
+--
+-- Databases that already applied the earlier version keep the unused column and index;
+-- they are harmless, and can be removed by hand with:
+--   drop index if exists handicaps_id_idx;
+--   alter table handicaps drop column if exists id;
+--   drop index if exists bets_created_at_idx;
+select 1;
@@ -0,0 +1,18 @@
+-- A finished game's result, written before ratings and bets are touched, so a crash or a
+-- failed ELO write mid-finalize can be picked up again after a restart.
+
+create table if not exists game_results (
+    game_id          text primary key,         -- lobby message id (bets.game_id)
+    game_type        text not null,
+    players          jsonb not null default '[]'::jsonb,
+    winner           jsonb,                    -- the voted winner, or "draw"
+    is_tournament    boolean not null default false,
+    ratings_applied  boolean not null default false,
+    payouts          jsonb not null default '[]'::jsonb,  -- [{player_id, choice, amount, won, payout}]
+    settled          jsonb not null default '[]'::jsonb,  -- indexes into payouts already paid out
+    completed        boolean not null default false,
+    created_at       timestamptz not null default now()
+);
+
+-- Restart recovery: where completed = false
+create index if not exists game_results_pending_idx on game_results (created_at) where not completed;
@@ -0,0 +1,42 @@
+-- Count a finished game towards the play-credit reward in one transaction: the stats patch,
+-- the threshold check, the counter reset and the credit payout all happen under the same
+-- row lock, so two games finishing together can't both see the threshold and pay twice.
+
+-- Returns {"stats": <stats after the patch>, "paid": bool, "credits": int}, or null if no such player.
+create or replace function count_game_for_credit(p_player_id text, p_ops jsonb, p_every integer, p_credits integer)
+returns jsonb
+language plpgsql
+as $$
+declare
+    s       jsonb;
+    counter numeric;
+    paid    boolean := false;
+    balance integer;
+begin
+    -- patch_player_stats takes the row lock (select ... for update) for the rest of this call
+    s := patch_player_stats(
+        p_player_id,
+        coalesce(p_ops, '[]'::jsonb) || jsonb_build_array(jsonb_build_object(
+            'op', 'inc', 'path', jsonb_build_array('games_since_credit'), 'value', 1, 'default', 0
+        ))
+    );
+    if s is null then
+        return null;
+    end if;
+
+    counter := coalesce((s ->> 'games_since_credit')::numeric, 0);
+    if counter >= p_every then
+        -- Subtract rather than reset so nothing counted past the threshold is lost
+        s := jsonb_set(s, '{games_since_credit}', to_jsonb(counter - p_every), true);
+        paid := true;
+        update players
+           set stats = s,
+               credits = coalesce(credits, 0) + p_credits,
+               version = version + 1
+         where id = p_player_id;
+    end if;
+
+    select credits into balance from players where id = p_player_id;
+    return jsonb_build_object('stats', s, 'paid', paid, 'credits', balance);
+end;
+$$;
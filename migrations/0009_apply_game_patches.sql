@@ -0,0 +1,38 @@
+-- Apply every rating and stats patch of one finished game in a single transaction, at most once.
+-- game_results.ratings_applied is the idempotency key: it is flipped in the same transaction,
+-- so a retry after a failure (nothing was written) applies everything, and a retry after a
+-- success (everything was written) applies nothing.
+
+-- p_patches: [{"player_id": "123", "ops": [<patch_player_stats ops>]}, ...]
+-- Every player also counts the game towards the play-credit reward (count_game_for_credit).
+-- Returns {"applied": bool, "players": [{"player_id", "stats", "paid", "credits"}]}.
+create or replace function apply_game_patches(p_game_id text, p_patches jsonb, p_every integer, p_credits integer)
+returns jsonb
+language plpgsql
+as $$
+declare
+    done    boolean;
+    patch   jsonb;
+    res     jsonb;
+    results jsonb := '[]'::jsonb;
+begin
+    select ratings_applied into done from game_results where game_id = p_game_id for update;
+    if not found then
+        raise exception 'apply_game_patches: no game_results row for %', p_game_id;
+    end if;
+    if done then
+        return jsonb_build_object('applied', false, 'players', results);
+    end if;
+
+    for patch in select * from jsonb_array_elements(p_patches) loop
+        res := count_game_for_credit(patch ->> 'player_id', patch -> 'ops', p_every, p_credits);
+        if res is null then
+            raise exception 'apply_game_patches: no players row for %', patch ->> 'player_id';
+        end if;
+        results := results || jsonb_build_array(res || jsonb_build_object('player_id', patch ->> 'player_id'));
+    end loop;
+
+    update game_results set ratings_applied = true where game_id = p_game_id;
+    return jsonb_build_object('applied', true, 'players', results);
+end;
+$$;
@@ -0,0 +1,55 @@
+-- Settle one bet and pay it out in a single transaction. The bets row moving from
+-- unsettled to settled is the idempotency key: the credit only happens on that transition,
+-- so retrying a settlement (after a crash, a failed write or a restart) never pays twice.
+
+alter table bets add column if not exists settled_at timestamptz;
+-- Rows settled before this column existed (refunds keep won = null and can't be told apart;
+-- game_results only tracks games finished after migration 0007, so they are never resumed)
+update bets set settled_at = created_at where won is not null and settled_at is null;
+
+-- Settlement progress now lives on the bets rows themselves
+alter table game_results drop column if exists settled;
+
+-- Settles the oldest unsettled bet matching (game, player, choice, amount): sets won / payout
+-- (a refund passes p_won = null and leaves payout alone) and credits p_credit to the player.
+-- Returns the player's new credits, 0 if nothing was credited, or null if there was no
+-- unsettled bet left, i.e. it was already settled.
+create or replace function settle_bet(p_game_id text, p_player_id text, p_choice text, p_amount integer,
+                                      p_won boolean, p_credit integer)
+returns integer
+language plpgsql
+as $$
+declare
+    bet_id      bigint;
+    new_credits integer := 0;
+begin
+    select id into bet_id
+      from bets
+     where game_id = p_game_id
+       and player_id = p_player_id
+       and choice = p_choice
+       and amount = p_amount
+       and settled_at is null
+     order by id
+     limit 1
+       for update;
+    if not found then
+        return null;
+    end if;
+
+    update bets
+       set won = p_won,
+           payout = case when p_won is null then payout else p_credit end,
+           settled_at = now()
+     where id = bet_id;
+
+    if p_credit > 0 then
+        update players
+           set credits = credits + p_credit,
+               version = version + 1
+         where id = p_player_id
+        returning credits into new_credits;
+    end if;
+    return new_credits;
+end;
+$$;